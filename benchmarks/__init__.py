@@ -0,0 +1,40 @@
+"""
+Micro benchmarks for the booking engine.
+
+Each module can be executed directly, e.g. ``python -m benchmarks.renderers``.
+"""
+import os
+import time
+from typing import Callable, Tuple
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking_engine.settings")
+django.setup()
+
+
+def best_of(func: Callable, repeat: int = 5) -> Tuple[float, object]:
+    """
+    Runs `func` `repeat` times and returns the fastest run time in seconds along
+    with the return value of the last run.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+
+    return best, result
+
+
+def setup_database():
+    """
+    Creates an empty test database (in memory for SQLite) with all the migrations
+    applied and points the default connection to it.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
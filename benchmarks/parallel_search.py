@@ -0,0 +1,127 @@
+"""
+Compares wide flexible searches evaluated in the request with searches evaluated in
+shards by the process pool (`listings.parallel`), for a growing number of workers.
+
+The test database is a temporary SQLite file (or the PostgreSQL test database)
+since the workers open their own connections. The first sharded search of each
+pool size starts the workers and is not timed.
+
+    python -m benchmarks.parallel_search --units 20000 --workers 2,4
+"""
+
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import urllib
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.test import APIClient
+
+from benchmarks import best_of, setup_database
+from listings import parallel
+from listings.models import BookingInfo, BookingReservation, Listing
+
+
+def seed_apartments(count: int, window_start: datetime.date, days: int):
+    """
+    Creates `count` apartments with random prices, each with a few reservations in
+    the window.
+    """
+    Listing.objects.bulk_create(
+        [
+            Listing(
+                listing_type=Listing.APARTMENT,
+                title=f"Apartment {index}",
+                country="UK",
+                city="London",
+            )
+            for index in range(count)
+        ]
+    )
+    booking_infos = []
+    for listing_id in Listing.objects.values_list("id", flat=True):
+        price = random.randint(20, 500)
+        booking_infos.append(
+            BookingInfo(listing_id=listing_id, price=price, lowest_price=price)
+        )
+    BookingInfo.objects.bulk_create(booking_infos)
+
+    reservations = []
+    for booking_info_id in BookingInfo.objects.values_list("id", flat=True):
+        # Non-overlapping stays, as apartments only take one reservation at a time
+        day = random.randint(0, 6)
+        while day < days:
+            start_date = window_start + datetime.timedelta(days=day)
+            nights = random.randint(1, 5)
+            reservations.append(
+                BookingReservation(
+                    booking_info_id=booking_info_id,
+                    start_date=start_date,
+                    end_date=start_date + datetime.timedelta(days=nights),
+                    exclusive=True,
+                )
+            )
+            day += nights + random.randint(3, 15)
+    BookingReservation.objects.bulk_create(reservations, batch_size=5000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20000)
+    parser.add_argument("--workers", default="2,4")
+    parser.add_argument("--days", type=int, default=90, help="Window length.")
+    parser.add_argument("--nights", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(0)
+    directory = tempfile.mkdtemp()
+    if connection.vendor == "sqlite":
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            directory, "benchmark.sqlite3"
+        )
+    setup_database()
+
+    window_start = datetime.date.today() + datetime.timedelta(days=1)
+    seed_apartments(args.units, window_start, args.days)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    query_params = urllib.parse.urlencode(
+        {
+            "nights": args.nights,
+            "window_start": window_start.isoformat(),
+            "window_end": (
+                window_start + datetime.timedelta(days=args.days - 1)
+            ).isoformat(),
+        }
+    )
+    client = APIClient()
+
+    def search():
+        response = client.get(f"/api/units/flexible/?{query_params}")
+        assert response.status_code == 200, response.content
+        return response.content
+
+    settings.SEARCH_SHARD_MIN_UNITS = 1
+    settings.SEARCH_WORKERS = 0
+    elapsed, expected = best_of(search, args.repeat)
+    print(f"{args.units} units, {args.days} day window, {args.nights} nights")
+    print(f"{'workers':>10}{'ms':>12}")
+    print(f"{'request':>10}{elapsed * 1000:>12.1f}")
+
+    for workers in [int(workers) for workers in args.workers.split(",")]:
+        settings.SEARCH_WORKERS = workers
+        assert search() == expected
+        elapsed, _ = best_of(search, args.repeat)
+        print(f"{workers:>10}{elapsed * 1000:>12.1f}")
+
+        parallel.get_executor().shutdown()
+        parallel._executor = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shows how price filtered, paginated `units` searches scale with the catalogue size.
+
+Searches with a low `max_price` read a narrow range of the price indexes and stop
+after a page of available units, so their latency should stay nearly flat while the
+catalogue grows. The unfiltered search has to price every unit and is included as a
+baseline.
+
+    python -m benchmarks.price_index --sizes 1000,10000,100000
+"""
+import argparse
+import datetime
+import random
+import urllib
+
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from benchmarks import best_of, setup_database
+from listings.filters import BookingInfoFilter
+from listings.models import BookingInfo, BookingReservation, Listing
+
+
+def seed_apartments(count: int):
+    """
+    Creates `count` apartments with random prices and a reservation every fifth
+    apartment.
+    """
+    first_id = (
+        Listing.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    ) + 1
+    Listing.objects.bulk_create(
+        [
+            Listing(
+                listing_type=Listing.APARTMENT,
+                title=f"Apartment {index}",
+                country="UK",
+                city="London",
+            )
+            for index in range(count)
+        ]
+    )
+    # SQLite does not return the primary keys of bulk inserted rows.
+    listing_ids = Listing.objects.filter(id__gte=first_id).values_list("id", flat=True)
+    booking_infos = []
+    for listing_id in listing_ids:
+        price = random.randint(20, 500)
+        booking_infos.append(
+            BookingInfo(listing_id=listing_id, price=price, lowest_price=price)
+        )
+    BookingInfo.objects.bulk_create(booking_infos)
+    booking_info_ids = BookingInfo.objects.filter(listing_id__gte=first_id).values_list(
+        "id", flat=True
+    )
+
+    start_date = datetime.date.today()
+    BookingReservation.objects.bulk_create(
+        [
+            BookingReservation(
+                booking_info_id=booking_info_id,
+                start_date=start_date,
+                end_date=start_date + datetime.timedelta(days=10),
+            )
+            for booking_info_id in booking_info_ids[::5]
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    setup_database()
+    client = APIClient()
+
+    check_in = datetime.date.today() + datetime.timedelta(days=2)
+    check_out = check_in + datetime.timedelta(days=3)
+    stay = {"check_in": check_in.isoformat(), "check_out": check_out.isoformat()}
+    searches = {
+        "max_price": {"max_price": 30},
+        "max_price + dates": {"max_price": 30, **stay},
+        "dates (baseline)": stay,
+    }
+
+    print(f"{'units':>10}  " + "".join(f"{name + ' ms':>22}" for name in searches))
+    seeded = 0
+    for size in [int(size) for size in args.sizes.split(",")]:
+        seed_apartments(size - seeded)
+        seeded = size
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        timings = []
+        for params in searches.values():
+            query_params = urllib.parse.urlencode(
+                {**params, "page_size": args.page_size}
+            )
+            elapsed, response = best_of(
+                lambda: client.get(f"/api/units/?{query_params}"), args.repeat
+            )
+            assert response.status_code == 200, response.content
+            timings.append(elapsed * 1000)
+
+        print(f"{size:>10}  " + "".join(f"{timing:>22.1f}" for timing in timings))
+
+    params = {"max_price": 30, **stay}
+    queryset = BookingInfoFilter(
+        params,
+        queryset=BookingInfo.objects.all(),
+        request=RequestFactory().get("/api/units/", params),
+    )
+    print("\nQuery plan of `max_price + dates`:")
+    print(queryset.qs.order_by("total_price", "id")[: args.page_size].explain())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares payload size and encode time of the `units` renderers.
+
+    python -m benchmarks.renderers --units 20000
+"""
+import argparse
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+from benchmarks import best_of
+from listings.models import BookingInfo, HotelRoomType, Listing
+from listings.renderers import get_optional_renderer_classes
+from listings.serializers import BookingInfoSerializer
+
+
+def build_units(count: int):
+    """
+    Returns `count` unsaved booking infos, half apartments and half hotel room types.
+    """
+    units = []
+    for index in range(count):
+        listing = Listing(
+            id=index,
+            listing_type=Listing.HOTEL if index % 2 else Listing.APARTMENT,
+            title=f"Listing {index}",
+            country="UK",
+            city="London",
+        )
+        if index % 2:
+            room_type = HotelRoomType(id=index, hotel=listing, title="Double")
+            unit = BookingInfo(id=index, hotel_room_type=room_type)
+        else:
+            unit = BookingInfo(id=index, listing=listing)
+
+        unit.price = Decimal(50 + index % 400)
+        units.append(unit)
+
+    return units
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = BookingInfoSerializer(build_units(args.units), many=True).data
+    print(f"{'renderer':<24}{'bytes':>12}{'encode ms':>12}")
+    for renderer_class in (JSONRenderer, *get_optional_renderer_classes()):
+        renderer = renderer_class()
+        elapsed, payload = best_of(lambda: renderer.render(data), args.repeat)
+        print(f"{renderer.format:<24}{len(payload):>12}{elapsed * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
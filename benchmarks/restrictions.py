@@ -0,0 +1,102 @@
+"""
+Shows that stay restrictions on every day of the catalogue do not change the latency
+of `units` searches.
+
+Each unit has its restrictions checked by seeking the check in and check out days in
+the (booking_info, date) restriction index, so the searches should take about as
+long with a restriction row for every unit and day as without any.
+
+    python -m benchmarks.restrictions --units 20000 --days 90
+"""
+
+import argparse
+import datetime
+import random
+import urllib
+
+from django.db import connection
+from rest_framework.test import APIClient
+
+from benchmarks import best_of, setup_database
+from benchmarks.price_index import seed_apartments
+from listings.models import BookingInfo, StayRestriction
+
+# Restriction rows inserted at once
+BATCH_SIZE = 10000
+
+
+def seed_restrictions(days: int):
+    """
+    Creates a restriction for every unit and each of the next `days` days, with a
+    random minimum stay and every seventh day closed to arrival.
+    """
+    start_date = datetime.date.today()
+    batch = []
+    for booking_info_id in BookingInfo.objects.values_list("id", flat=True):
+        for offset in range(days):
+            batch.append(
+                StayRestriction(
+                    booking_info_id=booking_info_id,
+                    date=start_date + datetime.timedelta(days=offset),
+                    min_stay=random.randint(1, 3),
+                    closed_to_arrival=offset % 7 == 0,
+                )
+            )
+            if len(batch) == BATCH_SIZE:
+                StayRestriction.objects.bulk_create(batch)
+                batch = []
+    StayRestriction.objects.bulk_create(batch)
+
+
+def time_searches(client: APIClient, searches: dict, page_size: int, repeat: int):
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+    timings = []
+    for params in searches.values():
+        query_params = urllib.parse.urlencode({**params, "page_size": page_size})
+        elapsed, response = best_of(
+            lambda: client.get(f"/api/units/?{query_params}"), repeat
+        )
+        assert response.status_code == 200, response.content
+        timings.append(elapsed * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    setup_database()
+    client = APIClient()
+    seed_apartments(args.units)
+
+    check_in = datetime.date.today() + datetime.timedelta(days=2)
+    check_out = check_in + datetime.timedelta(days=3)
+    stay = {"check_in": check_in.isoformat(), "check_out": check_out.isoformat()}
+    searches = {
+        "max_price + dates": {"max_price": 30, **stay},
+        "dates": stay,
+    }
+
+    print(
+        f"{'restrictions':>14}  " + "".join(f"{name + ' ms':>22}" for name in searches)
+    )
+    timings = time_searches(client, searches, args.page_size, args.repeat)
+    print(f"{0:>14}  " + "".join(f"{timing:>22.1f}" for timing in timings))
+
+    seed_restrictions(args.days)
+    timings = time_searches(client, searches, args.page_size, args.repeat)
+    print(
+        f"{StayRestriction.objects.count():>14}  "
+        + "".join(f"{timing:>22.1f}" for timing in timings)
+    )
+
+
+if __name__ == "__main__":
+    main()
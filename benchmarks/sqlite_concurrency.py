@@ -0,0 +1,192 @@
+"""
+Concurrent read/write load against `/api/units/` and `/api/reservations/` on a
+SQLite file database, comparing Django's stock SQLite configuration (rollback
+journal, a new connection per request) with the tuned one of the project settings
+(WAL, pragmas, busy timeout and persistent connections).
+
+Reader threads search available units while writer threads create reservations,
+each client keeping its HTTP connection open to a threaded WSGI server.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2 --duration 10
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer,
+    WSGIRequestHandler,
+    get_internal_wsgi_application,
+)
+from django.db import connection
+
+from benchmarks.price_index import seed_apartments
+from listings.models import BookingInfo
+
+PROFILES = ("stock", "tuned")
+
+
+def configure(profile: str, name: str):
+    """
+    Points the default database to the file `name` using the given profile. Must
+    run before the first database access.
+    """
+    database = settings.DATABASES["default"]
+    database["NAME"] = name
+    if profile == "stock":
+        database.update(ENGINE="django.db.backends.sqlite3", CONN_MAX_AGE=0, OPTIONS={})
+
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ["*"]
+
+
+def start_server() -> int:
+    """
+    Serves the project from a threaded WSGI server in the background and returns
+    its port.
+    """
+
+    class QuietWSGIRequestHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietWSGIRequestHandler)
+    server.set_app(get_internal_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def percentile(values: List[float], percent: int) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def run_profile(profile: str, args) -> Dict:
+    """
+    Seeds a fresh database with the given profile, runs the load and returns the
+    measured throughput and latencies.
+    """
+    directory = tempfile.mkdtemp()
+    configure(profile, os.path.join(directory, "db.sqlite3"))
+    call_command("migrate", verbosity=0)
+    random.seed(0)
+    seed_apartments(args.units)
+    booking_info_ids = list(BookingInfo.objects.values_list("id", flat=True))
+    connection.close()
+
+    port = start_server()
+    today = datetime.date.today()
+    deadline = time.perf_counter() + args.duration
+    results = {"read": [], "write": []}
+    errors = []
+
+    def client(kind: str):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        latencies = []
+        while time.perf_counter() < deadline:
+            check_in = today + datetime.timedelta(days=random.randint(1, 365))
+            check_out = check_in + datetime.timedelta(days=random.randint(1, 7))
+            started = time.perf_counter()
+            if kind == "read":
+                query_params = urllib.parse.urlencode(
+                    {
+                        "check_in": check_in.isoformat(),
+                        "check_out": check_out.isoformat(),
+                        "max_price": random.randint(50, 500),
+                        "page_size": 20,
+                    }
+                )
+                conn.request("GET", f"/api/units/?{query_params}")
+            else:
+                body = json.dumps(
+                    {
+                        "booking_info": random.choice(booking_info_ids),
+                        "start_date": check_in.isoformat(),
+                        "end_date": check_out.isoformat(),
+                    }
+                )
+                conn.request(
+                    "POST",
+                    "/api/reservations/",
+                    body,
+                    {"Content-Type": "application/json"},
+                )
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - started)
+            # 400 is a fully booked unit, anything else above is a failure
+            if response.status >= 500:
+                errors.append(response.status)
+        conn.close()
+        results[kind].extend(latencies)
+
+    threads = [
+        threading.Thread(target=client, args=("read",)) for _ in range(args.readers)
+    ] + [threading.Thread(target=client, args=("write",)) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "profile": profile,
+        "reads/s": len(results["read"]) / args.duration,
+        "read p95 ms": percentile(results["read"], 95) * 1000,
+        "writes/s": len(results["write"]) / args.duration,
+        "write p95 ms": percentile(results["write"], 95) * 1000,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profile", choices=PROFILES)
+    parser.add_argument("--units", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.profile, args)))
+        return
+
+    # Every profile runs in its own process, as the database settings can only be
+    # changed before the first connection.
+    rows = []
+    for profile in PROFILES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_concurrency", *sys.argv[1:]]
+            + ["--profile", profile],
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        rows.append(json.loads(output.decode().splitlines()[-1]))
+
+    columns = list(rows[0])
+    print("".join(f"{column:>14}" for column in columns))
+    for row in rows:
+        print(
+            "".join(
+                f"{value:>14.1f}" if isinstance(value, float) else f"{value:>14}"
+                for value in row.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Measures the cold start of a worker for each settings profile: the time to import
+and set up the project (`get_wsgi_application`), the time from there to the first
+response, and the import time per package and module (`python -X importtime`).
+
+Every run starts a fresh interpreter, so nothing is imported or cached beforehand.
+The first request does not need the database by default; pass e.g.
+`--path "/api/units/?page_size=20"` against a migrated database to include the
+first query.
+
+    python -m benchmarks.startup --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, List, Tuple
+
+PROFILES = ("booking_engine.settings", "booking_engine.settings_api")
+
+# Runs in the child interpreter. Prints the timings as the last line of stdout.
+CHILD = """
+import json, sys, time, wsgiref.util
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+
+application = get_wsgi_application()
+booted = time.perf_counter()
+
+path, _, query_string = sys.argv[1].partition("?")
+environ = {"PATH_INFO": path, "QUERY_STRING": query_string}
+wsgiref.util.setup_testing_defaults(environ)
+status = []
+response = application(environ, lambda code, headers: status.append(code))
+b"".join(response)
+response.close()
+responded = time.perf_counter()
+
+print(json.dumps({
+    "boot": booted - started,
+    "first_response": responded - booted,
+    "status": status[0],
+}))
+"""
+
+
+def parse_import_times(stderr: str) -> List[Tuple[str, int]]:
+    """
+    Returns the (module, self time in microseconds) pairs of the `-X importtime`
+    output.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        modules.append((fields[2].strip(), int(fields[0])))
+
+    return modules
+
+
+def measure(settings: str, path: str) -> Dict:
+    """
+    Boots the project with `settings` in a new interpreter, serves `path` once and
+    returns the timings along with the import times.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, path],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    result = json.loads(process.stdout.splitlines()[-1])
+    result["modules"] = parse_import_times(process.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--settings", nargs="+", default=PROFILES)
+    parser.add_argument("--path", default="/api/")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of packages and modules shown."
+    )
+    args = parser.parse_args()
+
+    for settings in args.settings:
+        runs = [measure(settings, args.path) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["boot"] + run["first_response"])
+        imports = sum(time for _, time in best["modules"])
+        packages: Counter = Counter()
+        for module, time in best["modules"]:
+            packages[module.split(".")[0]] += time
+
+        print(f"{settings} (best of {args.repeat}, GET {args.path} {best['status']})")
+        print(f"  boot                {best['boot'] * 1000:>10.1f} ms")
+        print(f"  first response      {best['first_response'] * 1000:>10.1f} ms")
+        print(
+            f"  imports             {imports / 1000:>10.1f} ms "
+            f"({len(best['modules'])} modules)"
+        )
+        print("  slowest packages (self time)")
+        for package, time in packages.most_common(args.top):
+            print(f"    {package:<40}{time / 1000:>10.1f} ms")
+        print("  slowest modules (self time)")
+        for module, time in sorted(best["modules"], key=lambda item: -item[1])[
+            : args.top
+        ]:
+            print(f"    {module:<40}{time / 1000:>10.1f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
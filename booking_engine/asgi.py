@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "booking_engine.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the apps are loaded by `get_asgi_application`
+from listings.changes import ChangeStream  # noqa: E402
+
+# Streams the availability change feed as server-sent events, which the Django
+# request cycle cannot do without holding a worker thread per client.
+application = ChangeStream(django_application)
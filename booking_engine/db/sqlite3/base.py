@@ -0,0 +1,35 @@
+"""
+SQLite database backend that initializes every new connection with the PRAGMA
+statements configured in ``OPTIONS["pragmas"]``, e.g.::
+
+    DATABASES = {
+        "default": {
+            "ENGINE": "booking_engine.db.sqlite3",
+            "NAME": "db.sqlite3",
+            "OPTIONS": {"pragmas": {"journal_mode": "wal", "synchronous": "normal"}},
+        }
+    }
+"""
+from typing import Dict
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_pragmas(self) -> Dict[str, object]:
+        """
+        Returns the PRAGMA statements to run on every new connection.
+        """
+        return self.settings_dict["OPTIONS"].get("pragmas", {})
+
+    def get_connection_params(self) -> Dict:
+        kwargs = super().get_connection_params()
+        # Not a `sqlite3.connect()` argument
+        kwargs.pop("pragmas", None)
+        return kwargs
+
+    def get_new_connection(self, conn_params: Dict):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.get_pragmas().items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
@@ -78,13 +78,80 @@ WSGI_APPLICATION = "booking_engine.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# SQLite connections are kept open between requests and initialized with the
+# pragmas below (see `booking_engine.db.sqlite3`). WAL lets readers carry on while a
+# reservation is written, and writers wait up to `timeout` seconds for the write lock
+# instead of failing with "database is locked".
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "booking_engine.db.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "CONN_MAX_AGE": int(os.environ.get("CONN_MAX_AGE", 600)),
+        "OPTIONS": {
+            "timeout": int(os.environ.get("SQLITE_TIMEOUT", 20)),
+            "pragmas": {
+                "journal_mode": "wal",
+                # Safe with WAL: a power loss may roll back the last commits, but
+                # never corrupts the database.
+                "synchronous": "normal",
+                # Negative values are in KiB: 64MB page cache per connection
+                "cache_size": -64000,
+                "mmap_size": 256 * 1024 * 1024,
+                "temp_store": "memory",
+            },
+        },
     }
 }
 
+# PostgreSQL is used instead of SQLite when `POSTGRES_DB` is set. It adds daterange
+# (GiST) indexes for overlap searches and rejects double booked apartments with an
+# exclusion constraint.
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", ""),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", ""),
+        "PORT": os.environ.get("POSTGRES_PORT", ""),
+    }
+
+
+# Seconds the swagger UI and schema are cached for once generated (0 disables it)
+SWAGGER_CACHE_TIMEOUT = int(os.environ.get("SWAGGER_CACHE_TIMEOUT", 24 * 60 * 60))
+
+# Seconds a unit is held for a guest between search and payment
+RESERVATION_HOLD_TTL = int(os.environ.get("RESERVATION_HOLD_TTL", 15 * 60))
+
+# Seconds the response of a request with an `Idempotency-Key` header is replayed to
+# its retries, see `listings.idempotency`
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+# Search guardrails: longest stay and flexible search window that can be searched,
+# most units returned by a list without `page_size`, and seconds a search query may
+# run (0 disables the timeout)
+MAX_STAY_NIGHTS = int(os.environ.get("MAX_STAY_NIGHTS", 30))
+MAX_SEARCH_WINDOW_DAYS = int(os.environ.get("MAX_SEARCH_WINDOW_DAYS", 92))
+MAX_SEARCH_RESULTS = int(os.environ.get("MAX_SEARCH_RESULTS", 1000))
+SEARCH_QUERY_TIMEOUT = float(os.environ.get("SEARCH_QUERY_TIMEOUT", 5))
+
+# Worker processes evaluating the shards of wide flexible searches (0 or 1 evaluates
+# searches in the request), and the smallest range of unit ids that is sharded, see
+# `listings.parallel`
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", 0))
+SEARCH_SHARD_MIN_UNITS = int(os.environ.get("SEARCH_SHARD_MIN_UNITS", 5000))
+
+# Days the changes of the availability change feed are kept by `prune_changes`
+CHANGE_FEED_RETENTION = int(os.environ.get("CHANGE_FEED_RETENTION", 7))
+
+# Memory-mapped availability snapshot shared by the workers, see `listings.snapshot`.
+# Searches ignore the snapshot when no path is set or once it is older than the max
+# age in seconds.
+AVAILABILITY_SNAPSHOT_PATH = os.environ.get("AVAILABILITY_SNAPSHOT_PATH") or None
+AVAILABILITY_SNAPSHOT_MAX_AGE = int(
+    os.environ.get("AVAILABILITY_SNAPSHOT_MAX_AGE", 15 * 60)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -0,0 +1,49 @@
+"""
+Settings for workers that only serve the API, e.g.::
+
+    DJANGO_SETTINGS_MODULE=booking_engine.settings_api gunicorn booking_engine.wsgi
+
+The admin, sessions, messages, static files and swagger apps are dropped along with
+their middleware, so that workers import and set up less before their first
+response (`python -m benchmarks.startup` compares both profiles). The API does not
+authenticate requests and responses are rendered as JSON, or in the optional
+binary formats, but not as the browsable API.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, TEMPLATES
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+        "drf_yasg",
+    )
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
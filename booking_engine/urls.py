@@ -13,39 +13,68 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+
+import functools
+from typing import Callable
+
+from django.apps import apps
+from django.conf import settings
 from django.urls import include, path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
 from rest_framework.routers import DefaultRouter
 
-from listings.views import BookingInfoViewSet, BookingReservationViewSet
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Booking Engine API",
-        default_version="v1",
-        description="API Documentation for Booking Engine",
-        terms_of_service="",
-        contact=openapi.Contact(email="contact@snippets.local"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
+from listings.views import (
+    AvailabilityChangeViewSet,
+    BookingInfoViewSet,
+    BookingReservationViewSet,
+    ReservationHoldViewSet,
 )
 
 
+@functools.lru_cache(maxsize=None)
+def get_swagger_view() -> Callable:
+    """
+    Builds the swagger UI view on its first request, so that workers do not import
+    drf_yasg when they boot. The UI and the generated schema are then cached for
+    `SWAGGER_CACHE_TIMEOUT` seconds.
+    """
+    from drf_yasg import openapi
+    from drf_yasg.views import get_schema_view
+    from rest_framework import permissions
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            title="Booking Engine API",
+            default_version="v1",
+            description="API Documentation for Booking Engine",
+            terms_of_service="",
+            contact=openapi.Contact(email="contact@snippets.local"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+    return schema_view.with_ui("swagger", cache_timeout=settings.SWAGGER_CACHE_TIMEOUT)
+
+
+def swagger_view(request, *args, **kwargs):
+    return get_swagger_view()(request, *args, **kwargs)
+
+
 router = DefaultRouter()
 router.register(r"units", BookingInfoViewSet, basename="units")
 router.register(r"reservations", BookingReservationViewSet, basename="reservations")
+router.register(r"holds", ReservationHoldViewSet, basename="holds")
+router.register(r"changes", AvailabilityChangeViewSet, basename="changes")
 
 
 urlpatterns = [
     path("api/", include(router.urls)),
-    path("admin/", admin.site.urls),
-    path(
-        "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
-        name="schema-swagger-ui",
-    ),
 ]
+
+# Left out by the API only settings (`booking_engine.settings_api`)
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if apps.is_installed("drf_yasg"):
+    urlpatterns.append(path("swagger/", swagger_view, name="schema-swagger-ui"))
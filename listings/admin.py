@@ -1,8 +1,71 @@
+from typing import Optional
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
 from . import models
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that skips the `COUNT(*)` of unfiltered changelists on large tables and
+    uses the row estimate of the database instead. Filtered changelists and small
+    tables are still counted exactly.
+    """
+
+    # Tables estimated below this size are counted exactly
+    threshold = 10000
+
+    @cached_property
+    def count(self) -> int:
+        query = self.object_list.query
+        if not query.where:
+            estimate = self.get_estimated_count()
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+
+        return super().count
+
+    def get_estimated_count(self) -> Optional[int]:
+        """
+        Returns the estimated number of rows of the table, or None when the database
+        has no estimate.
+        """
+        connection = connections[self.object_list.db]
+        table = self.object_list.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Maintained by VACUUM / ANALYZE, -1 if the table was never analyzed
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [table],
+                )
+            elif connection.vendor == "sqlite":
+                # A lookup at the end of the primary key index. Rows deleted since
+                # are still counted, which is fine for sizing the pagination.
+                cursor.execute(
+                    f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}"
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+
+        return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables with millions of rows. The changelist uses estimated counts
+    and does not count the unfiltered table a second time next to the filtered
+    results.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
 class HotelRoomTypeInline(admin.StackedInline):
     model = models.HotelRoomType
     extra = 1
@@ -33,23 +96,96 @@ class HotelRoomTypeAdmin(admin.ModelAdmin):
         "hotel",
         "title",
     )
+    list_select_related = ("hotel",)
+    raw_id_fields = ("hotel",)
     show_change_link = True
 
 
 @admin.register(models.HotelRoom)
-class HotelRoomAdmin(admin.ModelAdmin):
+class HotelRoomAdmin(EstimatedCountAdmin):
     list_display = ("room_number",)
+    raw_id_fields = ("hotel_room_type",)
+
+
+class RateOverrideInline(admin.TabularInline):
+    model = models.RateOverride
+    extra = 1
+
+
+class AllotmentInline(admin.TabularInline):
+    model = models.Allotment
+    extra = 1
 
 
 @admin.register(models.BookingInfo)
-class BookingInfoAdmin(admin.ModelAdmin):
-    pass
+class BookingInfoAdmin(EstimatedCountAdmin):
+    inlines = [RateOverrideInline, AllotmentInline]
+    list_display = ("__str__", "price")
+    # Used by `BookingInfo.__str__`
+    list_select_related = ("listing", "hotel_room_type__hotel")
+    raw_id_fields = ("listing", "hotel_room_type")
 
 
 @admin.register(models.BookingReservation)
-class BookingReservationAdmin(admin.ModelAdmin):
+class BookingReservationAdmin(EstimatedCountAdmin):
     """
     Admin view for :model:`listings.BookingReservation`
     """
 
     list_display = ("booking_info", "start_date", "end_date")
+    list_select_related = (
+        "booking_info__listing",
+        "booking_info__hotel_room_type__hotel",
+    )
+    raw_id_fields = ("booking_info",)
+    date_hierarchy = "start_date"
+    # Walks the `listings_reservation_start` index backwards, also within a
+    # `date_hierarchy` range.
+    ordering = ("-start_date", "-id")
+
+
+@admin.register(models.StayRestriction)
+class StayRestrictionAdmin(EstimatedCountAdmin):
+    """
+    Admin view for :model:`listings.StayRestriction`. Units get a row for every
+    restricted day, so they are not edited inline.
+    """
+
+    list_display = (
+        "booking_info",
+        "date",
+        "min_stay",
+        "max_stay",
+        "closed_to_arrival",
+        "closed_to_departure",
+    )
+    list_select_related = (
+        "booking_info__listing",
+        "booking_info__hotel_room_type__hotel",
+    )
+    raw_id_fields = ("booking_info",)
+    date_hierarchy = "date"
+
+
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin view for :model:`listings.Job`
+    """
+
+    list_display = ("name", "key", "status", "attempts", "run_after")
+    list_filter = ("status", "name")
+
+
+@admin.register(models.ReservationHold)
+class ReservationHoldAdmin(admin.ModelAdmin):
+    """
+    Admin view for :model:`listings.ReservationHold`
+    """
+
+    list_display = ("booking_info", "start_date", "end_date", "expires_at")
+    list_select_related = (
+        "booking_info__listing",
+        "booking_info__hotel_room_type__hotel",
+    )
+    raw_id_fields = ("booking_info",)
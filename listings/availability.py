@@ -0,0 +1,235 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from .models import (
+    BookingInfo,
+    BookingReservation,
+    HotelRoom,
+    ReservationHold,
+    StayRestriction,
+)
+
+# Number of (booking info, check in, check out) rows in a single VALUES list, on
+# databases without a limit on query parameters (see `get_check_chunk_size`).
+AVAILABILITY_CHECK_CHUNK_SIZE = 1000
+
+
+def find_flexible_check_ins(
+    queryset: Union[QuerySet, List[BookingInfo]],
+    nights: int,
+    window_start: datetime.date,
+    window_end: datetime.date,
+) -> Dict[int, List[datetime.date]]:
+    """
+    Returns, for each booking info in the queryset, the check in dates between
+    `window_start` and `window_end` (inclusive) where a stay of `nights` nights is
+    available. A check in date qualifies when `BookingInfoFilter` would return the
+    unit for `check_in=day` and `check_out=day + nights`.
+
+    All the reservations (and active holds) that touch the window are fetched with a
+    single query each and every unit is then evaluated with a sliding window over
+    its sorted reservation start and end dates, instead of running one search per
+    candidate check in. Only the open rooms are counted, like for a search without
+    a channel. The stay restrictions that reject a stay of `nights` nights are read
+    with one more query and skip their check in (or check out) days.
+    """
+    stay = datetime.timedelta(days=nights)
+    open_rooms: Dict[int, int] = dict(
+        queryset.with_capacity().values_list("id", "open_rooms")
+    )
+
+    starts: Dict[int, List[datetime.date]] = defaultdict(list)
+    ends: Dict[int, List[datetime.date]] = defaultdict(list)
+    for blocking in (
+        BookingReservation.objects.filter(allotted=False),
+        ReservationHold.objects.active(),
+    ):
+        reservations = (
+            blocking.filter(booking_info__in=queryset.values("id"))
+            .overlapping(window_start, window_end + stay)
+            .values_list("booking_info_id", "start_date", "end_date")
+        )
+        for booking_info_id, start_date, end_date in reservations:
+            starts[booking_info_id].append(start_date)
+            ends[booking_info_id].append(end_date)
+
+    closed_arrivals: Dict[int, Set[datetime.date]] = defaultdict(set)
+    closed_departures: Dict[int, Set[datetime.date]] = defaultdict(set)
+    restrictions = (
+        StayRestriction.objects.filter(
+            booking_info__in=queryset.values("id"),
+            date__gte=window_start,
+            date__lte=window_end + stay,
+        )
+        .filter(
+            Q(closed_to_arrival=True)
+            | Q(min_stay__gt=nights)
+            | Q(max_stay__lt=nights)
+            | Q(closed_to_departure=True)
+        )
+        .values_list(
+            "booking_info_id",
+            "date",
+            "min_stay",
+            "max_stay",
+            "closed_to_arrival",
+            "closed_to_departure",
+        )
+    )
+    for (
+        booking_info_id,
+        date,
+        min_stay,
+        max_stay,
+        closed_to_arrival,
+        closed_to_departure,
+    ) in restrictions:
+        if (
+            closed_to_arrival
+            or min_stay > nights
+            or (max_stay is not None and max_stay < nights)
+        ):
+            closed_arrivals[booking_info_id].add(date)
+        if closed_to_departure:
+            closed_departures[booking_info_id].add(date)
+
+    days: int = (window_end - window_start).days + 1
+    check_ins: Dict[int, List[datetime.date]] = {}
+    for booking_info_id, rooms in open_rooms.items():
+        unit_starts = sorted(starts[booking_info_id])
+        unit_ends = sorted(ends[booking_info_id])
+        unit_closed_arrivals = closed_arrivals.get(booking_info_id, ())
+        unit_closed_departures = closed_departures.get(booking_info_id, ())
+
+        # A reservation overlaps the stay [day, day + nights] when it starts on or
+        # before the check out date and does not end before the check in date. Both
+        # counts only grow as the window slides forward, so each unit is evaluated in
+        # a single pass over its reservations.
+        started = ended = 0
+        available: List[datetime.date] = []
+        for offset in range(days):
+            check_in = window_start + datetime.timedelta(days=offset)
+            check_out = check_in + stay
+            while started < len(unit_starts) and unit_starts[started] <= check_out:
+                started += 1
+            while ended < len(unit_ends) and unit_ends[ended] < check_in:
+                ended += 1
+
+            if (
+                rooms - (started - ended) > 0
+                and check_in not in unit_closed_arrivals
+                and check_out not in unit_closed_departures
+            ):
+                available.append(check_in)
+
+        if available:
+            check_ins[booking_info_id] = available
+
+    return check_ins
+
+
+def get_check_chunk_size() -> int:
+    """
+    Returns the number of pairs checked with a single query. Every pair takes four
+    query parameters and the query one more, so databases limiting the number of
+    parameters (999 for SQLite builds before 3.32) get smaller chunks.
+    """
+    max_query_params: Optional[int] = connection.features.max_query_params
+    if max_query_params is None:
+        return AVAILABILITY_CHECK_CHUNK_SIZE
+
+    return min(AVAILABILITY_CHECK_CHUNK_SIZE, (max_query_params - 1) // 4)
+
+
+def check_availability(
+    checks: Sequence[Tuple[int, datetime.date, datetime.date]],
+) -> List[Optional[int]]:
+    """
+    Returns the number of available rooms for each (booking info id, check in,
+    check out) pair, in the order of `checks`, or None for unknown booking info ids.
+    The counts match `BookingInfoQuerySet.with_availability`.
+
+    The pairs are sent as a VALUES list joined against the booking info and counted
+    against the reservations and active holds in the database, so thousands of
+    pairs are answered with a few set based queries instead of one search each. Only
+    the open rooms are counted, like for a search without a channel.
+    """
+    chunk_size: int = get_check_chunk_size()
+    results: List[Optional[int]] = []
+    for offset in range(0, len(checks), chunk_size):
+        results.extend(_check_availability(checks[offset : offset + chunk_size]))
+    return results
+
+
+def _check_availability(
+    checks: Sequence[Tuple[int, datetime.date, datetime.date]],
+) -> List[Optional[int]]:
+    if not checks:
+        return []
+
+    ops = connection.ops
+    qn = ops.quote_name
+    values: List = []
+    for position, (booking_info_id, check_in, check_out) in enumerate(checks):
+        values.extend(
+            [
+                position,
+                booking_info_id,
+                ops.adapt_datefield_value(check_in),
+                ops.adapt_datefield_value(check_out),
+            ]
+        )
+
+    # Reservations and holds overlap the stay when they start on or before the check
+    # out date and end on or after the check in date, like
+    # `BookingReservationQuerySet.overlapping`. The open rooms are computed like
+    # `BookingInfoQuerySet.with_capacity`.
+    sql = f"""
+        WITH checks (position, booking_info_id, check_in, check_out) AS (
+            VALUES {", ".join(["(%s, %s, %s, %s)"] * len(checks))}
+        )
+        SELECT
+            checks.position,
+            booking_info.id,
+            CASE
+                WHEN booking_info.listing_id IS NOT NULL THEN 1
+                WHEN booking_info.hotel_room_type_id IS NOT NULL THEN (
+                    SELECT COUNT(*) * (100 + booking_info.overbooking_margin) / 100
+                    FROM {qn(HotelRoom._meta.db_table)} room
+                    WHERE room.hotel_room_type_id = booking_info.hotel_room_type_id
+                )
+                ELSE 0
+            END
+            - booking_info.allotted_rooms
+            - (
+                SELECT COUNT(*) FROM {qn(BookingReservation._meta.db_table)} reservation
+                WHERE reservation.booking_info_id = checks.booking_info_id
+                AND NOT reservation.allotted
+                AND reservation.start_date <= checks.check_out
+                AND reservation.end_date >= checks.check_in
+            )
+            - (
+                SELECT COUNT(*) FROM {qn(ReservationHold._meta.db_table)} hold
+                WHERE hold.booking_info_id = checks.booking_info_id
+                AND hold.expires_at > %s
+                AND hold.start_date <= checks.check_out
+                AND hold.end_date >= checks.check_in
+            )
+        FROM checks
+        LEFT JOIN {qn(BookingInfo._meta.db_table)} booking_info
+            ON booking_info.id = checks.booking_info_id
+        ORDER BY checks.position
+    """
+    values.append(ops.adapt_datetimefield_value(timezone.now()))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+        return [
+            available_rooms if booking_info_id is not None else None
+            for _, booking_info_id, available_rooms in cursor.fetchall()
+        ]
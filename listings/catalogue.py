@@ -0,0 +1,386 @@
+import csv
+import itertools
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Min, Q
+
+from . import changes
+from .geo import get_grid_cell
+from .models import (
+    AvailabilityChange,
+    BookingInfo,
+    DailyRate,
+    HotelRoom,
+    HotelRoomType,
+    Listing,
+)
+
+LISTING_FIELDS = (
+    "listing_type",
+    "title",
+    "country",
+    "city",
+    "latitude",
+    "longitude",
+    "grid_cell",
+)
+
+
+class CatalogueError(Exception):
+    pass
+
+
+def read_records(path: str, format: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Streams the records of a CSV (with a header row) or JSON Lines file. The format
+    is taken from the file extension unless given.
+    """
+    if format is None:
+        format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+    with open(path, newline="", encoding="utf-8") as file:
+        if format == "csv":
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class CatalogueImporter:
+    """
+    Upserts listings, hotel room types, hotel rooms and their booking info from flat
+    records, one per apartment or hotel room:
+
+    - `external_id`: identifies the listing (:model:`listings.Listing.external_id`)
+    - `listing_type`: "apartment" (default) or "hotel"
+    - `title`, `country`, `city`: the listing
+    - `latitude`, `longitude`: coordinates of the listing (optional)
+    - `price`: nightly price of the apartment or of the hotel room type
+    - `room_type`: title of the hotel room type (hotels only)
+    - `room_number`: hotel room number (hotels only, optional)
+
+    Records are processed in batches, each in a single transaction and with a
+    constant number of queries: existing rows are looked up by their natural keys,
+    new rows are inserted with `bulk_create` and changed rows are saved with
+    `bulk_update`. The ids of the parents are kept in in-memory maps to link the
+    children. Importing the same records again changes nothing, so an interrupted
+    import can safely resume from the last committed batch.
+    """
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+        self.stats = Counter()
+
+    def run(
+        self,
+        records: Iterable[Dict],
+        skip: int = 0,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Imports the records after the first `skip` ones and returns the number of
+        processed records (including the skipped ones). `on_batch` is called with
+        that number after every committed batch.
+        """
+        processed = skip
+        records = iter(records)
+        for _ in itertools.islice(records, skip):
+            pass
+
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                break
+
+            with transaction.atomic():
+                self.import_batch(
+                    [
+                        self.clean(record, number)
+                        for number, record in enumerate(batch, processed + 1)
+                    ]
+                )
+
+            processed += len(batch)
+            if on_batch is not None:
+                on_batch(processed)
+
+        return processed
+
+    def clean(self, record: Dict, number: int) -> Dict:
+        """
+        Validates a record and normalizes its values.
+        """
+        record = {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in record.items()
+        }
+        record.setdefault("listing_type", Listing.APARTMENT)
+        record["listing_type"] = record["listing_type"] or Listing.APARTMENT
+
+        for field in ("external_id", "title", "price"):
+            if not record.get(field):
+                raise CatalogueError(f"Record {number}: {field} is required.")
+
+        if record["listing_type"] not in (Listing.APARTMENT, Listing.HOTEL):
+            raise CatalogueError(
+                f"Record {number}: invalid listing_type {record['listing_type']!r}."
+            )
+
+        if record["listing_type"] == Listing.HOTEL and not record.get("room_type"):
+            raise CatalogueError(f"Record {number}: room_type is required for hotels.")
+
+        try:
+            record["price"] = Decimal(str(record["price"]))
+        except InvalidOperation:
+            raise CatalogueError(f"Record {number}: invalid price {record['price']!r}.")
+
+        for field, limit in (("latitude", 90), ("longitude", 180)):
+            value = record.get(field)
+            if value in (None, ""):
+                record[field] = None
+                continue
+            try:
+                record[field] = Decimal(str(value)).quantize(Decimal("0.000001"))
+                valid = abs(record[field]) <= limit
+            except InvalidOperation:
+                valid = False
+            if not valid:
+                raise CatalogueError(f"Record {number}: invalid {field} {value!r}.")
+        record["grid_cell"] = get_grid_cell(record["latitude"], record["longitude"])
+
+        record["external_id"] = str(record["external_id"])
+        record.setdefault("country", "")
+        record.setdefault("city", "")
+        return record
+
+    def import_batch(self, records: List[Dict]):
+        listing_ids = self.upsert_listings(records)
+        room_type_ids = self.create_room_types(records, listing_ids)
+        # Recorded last, as the changes of other transactions wait for the batch to
+        # commit from then on (see `listings.changes`)
+        changes.record_many(
+            self.upsert_booking_infos(records, listing_ids, room_type_ids)
+            + self.create_rooms(records, listing_ids, room_type_ids)
+        )
+
+    def upsert_listings(self, records: List[Dict]) -> Dict[str, int]:
+        """
+        Creates or updates the listings of the records and returns their ids by
+        external id. The last record of a listing wins.
+        """
+        listings: Dict[str, Dict] = {
+            record["external_id"]: {field: record[field] for field in LISTING_FIELDS}
+            for record in records
+        }
+        existing: Dict[str, Dict] = {
+            values.pop("external_id"): values
+            for values in Listing.objects.filter(
+                external_id__in=listings.keys()
+            ).values("id", "external_id", *LISTING_FIELDS)
+        }
+
+        new_listings: List[Listing] = []
+        changed_listings: List[Listing] = []
+        for external_id, fields in listings.items():
+            current = existing.get(external_id)
+            if current is None:
+                new_listings.append(Listing(external_id=external_id, **fields))
+            elif any(current[field] != fields[field] for field in LISTING_FIELDS):
+                changed_listings.append(Listing(id=current["id"], **fields))
+
+        Listing.objects.bulk_create(new_listings, batch_size=self.batch_size)
+        Listing.objects.bulk_update(
+            changed_listings, LISTING_FIELDS, batch_size=self.batch_size
+        )
+        self.stats["listings created"] += len(new_listings)
+        self.stats["listings updated"] += len(changed_listings)
+
+        listing_ids = {
+            external_id: values["id"] for external_id, values in existing.items()
+        }
+        if new_listings:
+            # SQLite does not return the primary keys of bulk inserted rows.
+            listing_ids.update(
+                Listing.objects.filter(
+                    external_id__in=[listing.external_id for listing in new_listings]
+                ).values_list("external_id", "id")
+            )
+
+        return listing_ids
+
+    def create_room_types(
+        self, records: List[Dict], listing_ids: Dict[str, int]
+    ) -> Dict[Tuple[int, str], int]:
+        """
+        Creates the missing hotel room types of the records and returns their ids by
+        hotel id and title.
+        """
+        keys = {
+            (listing_ids[record["external_id"]], record["room_type"])
+            for record in records
+            if record["listing_type"] == Listing.HOTEL
+        }
+        if not keys:
+            return {}
+
+        hotel_ids = {hotel_id for hotel_id, _ in keys}
+
+        def get_room_type_ids() -> Dict[Tuple[int, str], int]:
+            return {
+                (hotel_id, title): room_type_id
+                for room_type_id, hotel_id, title in HotelRoomType.objects.filter(
+                    hotel_id__in=hotel_ids
+                ).values_list("id", "hotel_id", "title")
+            }
+
+        room_type_ids = get_room_type_ids()
+        new_room_types = [
+            HotelRoomType(hotel_id=hotel_id, title=title)
+            for hotel_id, title in sorted(keys - room_type_ids.keys())
+        ]
+        if new_room_types:
+            HotelRoomType.objects.bulk_create(
+                new_room_types, batch_size=self.batch_size
+            )
+            self.stats["hotel room types created"] += len(new_room_types)
+            room_type_ids = get_room_type_ids()
+
+        return room_type_ids
+
+    def upsert_booking_infos(
+        self,
+        records: List[Dict],
+        listing_ids: Dict[str, int],
+        room_type_ids: Dict[Tuple[int, str], int],
+    ) -> List[changes.Change]:
+        """
+        Creates or updates the booking info of every apartment and hotel room type
+        in the records. The last record of a unit sets its price. Returns the
+        changes of the units for the change feed.
+        """
+        apartment_prices: Dict[int, Decimal] = {}
+        room_type_prices: Dict[int, Decimal] = {}
+        for record in records:
+            listing_id = listing_ids[record["external_id"]]
+            if record["listing_type"] == Listing.HOTEL:
+                room_type_id = room_type_ids[(listing_id, record["room_type"])]
+                room_type_prices[room_type_id] = record["price"]
+            else:
+                apartment_prices[listing_id] = record["price"]
+
+        existing = BookingInfo.objects.filter(
+            Q(listing_id__in=apartment_prices.keys())
+            | Q(hotel_room_type_id__in=room_type_prices.keys())
+        ).values_list("id", "listing_id", "hotel_room_type_id", "price")
+
+        changed_prices: Dict[int, Decimal] = {}
+        for booking_info_id, listing_id, room_type_id, price in existing:
+            if listing_id is not None:
+                new_price = apartment_prices.pop(listing_id)
+            else:
+                new_price = room_type_prices.pop(room_type_id)
+            if new_price != price:
+                changed_prices[booking_info_id] = new_price
+
+        # Units without booking info are left in the price maps. New units have no
+        # rate overrides yet, so their lowest price is their base price.
+        new_booking_infos = [
+            BookingInfo(listing_id=listing_id, price=price, lowest_price=price)
+            for listing_id, price in apartment_prices.items()
+        ] + [
+            BookingInfo(
+                hotel_room_type_id=room_type_id, price=price, lowest_price=price
+            )
+            for room_type_id, price in room_type_prices.items()
+        ]
+        BookingInfo.objects.bulk_create(new_booking_infos, batch_size=self.batch_size)
+
+        lowest_rates: Dict[int, Decimal] = dict(
+            DailyRate.objects.filter(booking_info_id__in=changed_prices.keys())
+            .values("booking_info_id")
+            .annotate(lowest_rate=Min("price"))
+            .values_list("booking_info_id", "lowest_rate")
+        )
+        changed_booking_infos = [
+            BookingInfo(
+                id=booking_info_id,
+                price=price,
+                lowest_price=min(price, lowest_rates.get(booking_info_id, price)),
+            )
+            for booking_info_id, price in changed_prices.items()
+        ]
+        BookingInfo.objects.bulk_update(
+            changed_booking_infos,
+            ("price", "lowest_price"),
+            batch_size=self.batch_size,
+        )
+        self.stats["booking info created"] += len(new_booking_infos)
+        self.stats["booking info updated"] += len(changed_booking_infos)
+
+        # `bulk_create` and `bulk_update` do not send signals. SQLite does not return
+        # the primary keys of bulk inserted rows.
+        new_booking_info_ids = (
+            BookingInfo.objects.filter(
+                Q(listing_id__in=apartment_prices.keys())
+                | Q(hotel_room_type_id__in=room_type_prices.keys())
+            ).values_list("id", flat=True)
+            if new_booking_infos
+            else []
+        )
+        return [
+            (booking_info_id, AvailabilityChange.AVAILABILITY, None, None)
+            for booking_info_id in new_booking_info_ids
+        ] + [
+            (booking_info_id, AvailabilityChange.PRICE, None, None)
+            for booking_info_id in changed_prices
+        ]
+
+    def create_rooms(
+        self,
+        records: List[Dict],
+        listing_ids: Dict[str, int],
+        room_type_ids: Dict[Tuple[int, str], int],
+    ) -> List[changes.Change]:
+        """
+        Creates the missing hotel rooms of the records. Returns the changes of their
+        room types for the change feed.
+        """
+        keys = {
+            (
+                room_type_ids[
+                    (listing_ids[record["external_id"]], record["room_type"])
+                ],
+                str(record["room_number"]),
+            )
+            for record in records
+            if record["listing_type"] == Listing.HOTEL and record.get("room_number")
+        }
+        if not keys:
+            return []
+
+        existing = set(
+            HotelRoom.objects.filter(
+                hotel_room_type_id__in={room_type_id for room_type_id, _ in keys}
+            ).values_list("hotel_room_type_id", "room_number")
+        )
+        new_rooms = [
+            HotelRoom(hotel_room_type_id=room_type_id, room_number=room_number)
+            for room_type_id, room_number in sorted(keys - existing)
+        ]
+        HotelRoom.objects.bulk_create(new_rooms, batch_size=self.batch_size)
+        self.stats["hotel rooms created"] += len(new_rooms)
+
+        if not new_rooms:
+            return []
+
+        return [
+            (booking_info_id, AvailabilityChange.AVAILABILITY, None, None)
+            for booking_info_id in BookingInfo.objects.filter(
+                hotel_room_type_id__in={room.hotel_room_type_id for room in new_rooms}
+            ).values_list("id", flat=True)
+        ]
@@ -0,0 +1,253 @@
+"""
+A feed of the availability and price changes of the booking infos, for channels
+that keep a copy of the inventory and would otherwise poll the whole unit search.
+
+Every change is a row of :model:`listings.AvailabilityChange`, inserted in the
+transaction of the reservation, hold, rate or unit change that causes it (see
+`listings.signals`). Its primary key is a sequence number: consumers read the changes
+after the last one they have seen with `GET /api/changes/?since=<id>`, or keep a
+`ChangeStream` open to receive them as server-sent events, and only fetch the units
+and dates that changed.
+
+Sequence numbers are assigned on insert while changes become visible on commit. So
+that a change never becomes visible after a later one was read, sequence numbers are
+handed out in commit order: on PostgreSQL, a transaction takes the transaction level
+advisory lock `SEQUENCE_LOCK` before inserting its first change and keeps it until
+it commits, and SQLite serializes every write transaction anyway. A consumer that
+has read a change has therefore seen every earlier one, however long the transaction
+of that earlier change ran. Changes should be recorded last in their transaction,
+as the transactions recording changes commit one at a time from then on.
+"""
+
+import asyncio
+import datetime
+import json
+import urllib.parse
+from contextlib import contextmanager
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import AvailabilityChange
+
+# (booking info id, kind, start date, end date), with empty dates for every day
+Change = Tuple[int, str, Optional[datetime.date], Optional[datetime.date]]
+
+# Key of the PostgreSQL advisory lock held by the transactions recording changes
+SEQUENCE_LOCK = 0x6368616E676573
+
+
+def take_sequence_lock(execute, sql, params, many, context):
+    """
+    Execute wrapper prepending the lock on the sequence numbers to the insert of
+    changes. Both are sent at once and run in the same (implicit) transaction, so
+    the lock costs no round trip and is held until the insert commits.
+    """
+    return execute(
+        f"SELECT pg_advisory_xact_lock({SEQUENCE_LOCK}); {sql}", params, many, context
+    )
+
+
+@contextmanager
+def sequence_lock(using: str = DEFAULT_DB_ALIAS) -> Iterator[None]:
+    """
+    Makes the changes inserted in the block take the lock on the sequence numbers
+    until the end of the transaction, so that the changes of concurrent
+    transactions are numbered in commit order. A no-op on SQLite, where write
+    transactions are serialized.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        yield
+        return
+
+    with connection.execute_wrapper(take_sequence_lock):
+        yield
+
+
+def record(
+    booking_info_id: int,
+    kind: str,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+) -> AvailabilityChange:
+    """
+    Adds a change of the booking info to the feed. Without dates, every day of the
+    booking info may have changed.
+    """
+    with sequence_lock():
+        return AvailabilityChange.objects.create(
+            booking_info_id=booking_info_id,
+            kind=kind,
+            start_date=start_date,
+            end_date=end_date,
+        )
+
+
+def record_many(changes: Iterable[Change]) -> List[AvailabilityChange]:
+    """
+    Adds several changes to the feed with a single insert.
+    """
+    changes = [
+        AvailabilityChange(
+            booking_info_id=booking_info_id,
+            kind=kind,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        for booking_info_id, kind, start_date, end_date in changes
+    ]
+    if not changes:
+        return []
+
+    with sequence_lock():
+        return AvailabilityChange.objects.bulk_create(changes)
+
+
+def get_changes(since: int, limit: int) -> List[AvailabilityChange]:
+    """
+    Returns up to `limit` changes after the change `since`, in sequence order.
+    """
+    return list(AvailabilityChange.objects.filter(id__gt=since).order_by("id")[:limit])
+
+
+def format_event(data: Dict) -> bytes:
+    """
+    Returns a serialized change as a server-sent event. The event id is the sequence
+    number, which browsers send back as `Last-Event-ID` when they reconnect.
+    """
+    return (
+        f"id: {data['id']}\nevent: change\n"
+        f"data: {json.dumps(data, cls=JSONEncoder)}\n\n"
+    ).encode()
+
+
+class ChangeStream:
+    """
+    ASGI application streaming the change feed as server-sent events on `path` and
+    passing every other request to `application`:
+
+        GET /api/changes/stream/?since=<id>
+
+    The stream starts after `since`, or after the `Last-Event-ID` header of a
+    reconnecting client, and polls the feed every `poll_interval` seconds. Comments
+    are sent every `keepalive` seconds without changes, so that proxies keep the
+    connection open.
+    """
+
+    def __init__(
+        self,
+        application: Callable[..., Awaitable],
+        path: str = "/api/changes/stream/",
+        poll_interval: float = 1.0,
+        keepalive: float = 15.0,
+    ):
+        self.application = application
+        self.path = path
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.application(scope, receive, send)
+
+        # Imported here as the serializers record changes with this module
+        from .serializers import AvailabilityChangeSerializer, ChangeFeedSerializer
+
+        if scope["method"] != "GET":
+            return await self.send_json(
+                send, 405, {"detail": f"Method \"{scope['method']}\" not allowed."}
+            )
+
+        params = ChangeFeedSerializer(data=self.get_params(scope))
+        if not params.is_valid():
+            return await self.send_json(send, 400, params.errors)
+
+        since: int = params.validated_data["since"]
+        limit: int = ChangeFeedSerializer.MAX_LIMIT
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    # Disables response buffering in nginx
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            idle = 0.0
+            while not disconnected.done():
+                changes = await sync_to_async(get_changes)(since, limit)
+                if changes:
+                    since = changes[-1].id
+                    data = AvailabilityChangeSerializer(changes, many=True).data
+                    body = b"".join(format_event(change) for change in data)
+                    idle = 0.0
+                elif idle >= self.keepalive:
+                    body = b": keepalive\n\n"
+                    idle = 0.0
+                else:
+                    body = b""
+
+                if body:
+                    await send(
+                        {"type": "http.response.body", "body": body, "more_body": True}
+                    )
+                if len(changes) == limit:
+                    # Catch up without waiting
+                    continue
+
+                await asyncio.wait({disconnected}, timeout=self.poll_interval)
+                idle += self.poll_interval
+        finally:
+            disconnected.cancel()
+
+    def get_params(self, scope: Dict) -> Dict[str, str]:
+        params = {
+            name: values[-1]
+            for name, values in urllib.parse.parse_qs(
+                scope["query_string"].decode("latin-1")
+            ).items()
+        }
+        for name, value in scope["headers"]:
+            if name == b"last-event-id" and value:
+                params["since"] = value.decode("latin-1")
+
+        return params
+
+    async def wait_for_disconnect(self, receive: Callable):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    async def send_json(self, send: Callable, status: int, data: Dict):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": json.dumps(data, cls=JSONEncoder).encode(),
+            }
+        )
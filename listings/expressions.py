@@ -0,0 +1,127 @@
+import datetime
+import json
+from typing import List, Sequence, Tuple
+
+from django.db.models import (
+    BooleanField,
+    DateField,
+    F,
+    Func,
+    IntegerField,
+    QuerySet,
+    Subquery,
+    Value,
+)
+
+
+class SubqueryCount(Subquery):
+    """
+    Counts the rows of a correlated queryset, e.g.
+
+        SubqueryCount(HotelRoom.objects.filter(hotel_room_type=OuterRef("pk")))
+
+    Unlike `Count()` over a relation, the outer query is not grouped. It can still be
+    filtered in its WHERE clause, walk an index in order and stop at its LIMIT.
+    """
+
+    output_field = IntegerField()
+
+    def __init__(self, queryset: QuerySet, **extra):
+        queryset = (
+            queryset.order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        super().__init__(queryset, **extra)
+
+
+class DateRangeOverlaps(Func):
+    """
+    Checks whether the inclusive date range stored in two date columns overlaps the
+    inclusive range from `start_date` to `end_date`, e.g.
+
+        BookingReservation.objects.filter(
+            DateRangeOverlaps("start_date", "end_date", check_in, check_out)
+        )
+
+    On PostgreSQL the check is written as `daterange(...) && daterange(...)` so it can
+    be answered from GiST indexes on the date range. Other databases compare the
+    bounds, which works with regular B-tree indexes.
+    """
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(
+        self,
+        start_field: str,
+        end_field: str,
+        start_date: datetime.date,
+        end_date: datetime.date,
+    ):
+        super().__init__(
+            F(start_field),
+            F(end_field),
+            Value(start_date, output_field=DateField()),
+            Value(end_date, output_field=DateField()),
+            output_field=BooleanField(),
+        )
+
+    def compile_bounds(self, compiler, connection) -> Tuple[List[str], List[List]]:
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.append(list(expression_params))
+
+        return sqls, params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start, end, start_date, end_date), params = self.compile_bounds(
+            compiler, connection
+        )
+        return (
+            f"({start} <= {end_date} AND {end} >= {start_date})",
+            params[0] + params[3] + params[1] + params[2],
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (start, end, start_date, end_date), params = self.compile_bounds(
+            compiler, connection
+        )
+        return (
+            f"daterange({start}, {end}, '[]') && "
+            f"daterange({start_date}, {end_date}, '[]')",
+            params[0] + params[1] + params[2] + params[3],
+        )
+
+
+class InIntegers(Func):
+    """
+    Checks whether an integer column is in a list of values sent as a single query
+    parameter, e.g.
+
+        BookingInfo.objects.filter(InIntegers("id", booking_info_ids))
+
+    Unlike `id__in`, the list can hold more values than the database accepts query
+    parameters. PostgreSQL compares against an array (`= ANY(...)`) and SQLite
+    against the values of a JSON array (`json_each`).
+    """
+
+    conditional = True
+    output_field = BooleanField()
+
+    def __init__(self, field: str, values: Sequence[int]):
+        super().__init__(F(field), output_field=BooleanField())
+        self.values = [int(value) for value in values]
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        return (
+            f"({sql} IN (SELECT value FROM json_each(%s)))",
+            [*params, json.dumps(self.values)],
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.get_source_expressions()[0])
+        return f"({sql} = ANY(%s::bigint[]))", [*params, self.values]
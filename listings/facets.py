@@ -0,0 +1,106 @@
+"""
+Facet counts of unit searches: the number of matching units per country, city,
+listing type and price bucket.
+
+Every facet is counted from a single grouped query over the filtered search queryset.
+The units are grouped by all the facets at once, which returns at most one row per
+(country, city, listing type, price bucket) combination, and the counts of each
+facet are then summed up from those rows. This is what `GROUPING SETS` would do in
+the database, without running one search per facet.
+"""
+
+from collections import Counter
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    QuerySet,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Floor
+
+from .models import Listing
+
+
+def count_facets(
+    queryset: QuerySet, bucket_size: Decimal, nights: Optional[int] = None
+) -> Dict:
+    """
+    Returns the facet counts of a filtered :model:`listings.BookingInfo` queryset.
+    Prices are bucketed by `bucket_size`. When the search is for a stay of `nights`
+    nights (so the queryset is annotated with its `total_price`), the average nightly
+    price of the stay is bucketed, like `max_price` filters it.
+    """
+    price_field = DecimalField(max_digits=10, decimal_places=2)
+    price = (
+        ExpressionWrapper(F("total_price") / nights, output_field=price_field)
+        if nights
+        else F("price")
+    )
+    groups = (
+        queryset.order_by()
+        .annotate(
+            facet_country=Coalesce(
+                "listing__country", "hotel_room_type__hotel__country"
+            ),
+            facet_city=Coalesce("listing__city", "hotel_room_type__hotel__city"),
+            facet_listing_type=Case(
+                When(listing__isnull=False, then=Value(Listing.APARTMENT)),
+                default=Value(Listing.HOTEL),
+                output_field=CharField(),
+            ),
+            facet_price_bucket=Floor(
+                ExpressionWrapper(price / bucket_size, output_field=price_field)
+            ),
+        )
+        .values(
+            "facet_country", "facet_city", "facet_listing_type", "facet_price_bucket"
+        )
+        .annotate(count=Count("id"))
+    )
+
+    countries, cities, listing_types, price_buckets = (Counter() for _ in range(4))
+    for group in groups:
+        countries[group["facet_country"]] += group["count"]
+        cities[group["facet_country"], group["facet_city"]] += group["count"]
+        listing_types[group["facet_listing_type"]] += group["count"]
+        price_buckets[int(group["facet_price_bucket"])] += group["count"]
+
+    return {
+        "total": sum(countries.values()),
+        "country": get_counts(countries),
+        "city": [
+            {"value": city, "country": country, "count": count}
+            for (country, city), count in sorted(
+                cities.items(), key=lambda item: (-item[1], item[0])
+            )
+        ],
+        "listing_type": get_counts(listing_types),
+        "price": [
+            {
+                "min": bucket * bucket_size,
+                "max": (bucket + 1) * bucket_size,
+                "count": price_buckets[bucket],
+            }
+            for bucket in sorted(price_buckets)
+        ],
+    }
+
+
+def get_counts(counter: Counter) -> List[Dict]:
+    """
+    Returns the counts of a facet, most common values first.
+    """
+    return [
+        {"value": value, "count": count}
+        for value, count in sorted(
+            counter.items(), key=lambda item: (-item[1], item[0])
+        )
+    ]
@@ -1,12 +1,25 @@
 import datetime
-from typing import List, Union
+from typing import List, Optional, Union
 
-from django.db.models import Case, Count, F, IntegerField, Q, QuerySet, Value, When
+from django import forms
+from django.conf import settings
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Least
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 from rest_framework import serializers
 
-from .models import BookingInfo
+from . import geo
+from .expressions import InIntegers
+from .models import BookingInfo, HotelRoomType, Listing, get_stay_nights
+from .serializers import validate_stay_nights
+
+# Largest search radius in km
+MAX_RADIUS = 500
+
+
+class IntegerFilter(filters.NumberFilter):
+    field_class = forms.IntegerField
 
 
 class BookingInfoFilter(filters.FilterSet):
@@ -14,9 +27,16 @@ class BookingInfoFilter(filters.FilterSet):
     Custom filterset class for :model:`listings.BookingInfo`
     """
 
-    max_price = filters.NumberFilter(field_name="price", lookup_expr="lte")
+    max_price = filters.NumberFilter(method="filter_max_price")
     check_in = filters.DateFilter(method="filter_check_in")
     check_out = filters.DateFilter(method="filter_check_out")
+    lat = filters.NumberFilter(method="filter_location")
+    lng = filters.NumberFilter(method="filter_location")
+    radius = filters.NumberFilter(method="filter_location")
+    bbox = filters.CharFilter(method="filter_location")
+    rooms = IntegerFilter(method="filter_rooms", min_value=1)
+    occupancy = IntegerFilter(method="filter_occupancy", min_value=1)
+    channel = filters.CharFilter(method="filter_channel")
 
     class Meta:
         model = BookingInfo
@@ -24,8 +44,31 @@ class BookingInfoFilter(filters.FilterSet):
             "max_price",
             "check_in",
             "check_out",
+            "lat",
+            "lng",
+            "radius",
+            "bbox",
+            "rooms",
+            "occupancy",
+            "channel",
         )
 
+    def filter_max_price(self, queryset, name, value):
+        """
+        Filters units by their nightly price. When a check in / check out range is
+        given, the average nightly price of the stay is used instead so rate
+        overrides are taken into account.
+        """
+        if self.stay_nights:
+            # The average nightly price of a stay is never below the lowest nightly
+            # price of the unit. Filtering on the indexed `lowest_price` first keeps
+            # searches with a low max_price from pricing every stay in the catalogue.
+            return queryset.filter(
+                lowest_price__lte=value, total_price__lte=value * self.stay_nights
+            )
+
+        return queryset.filter(price__lte=value)
+
     def filter_check_in(self, queryset, name, value):
         """
         Unused in favor of `filter_check_in_and_check_out_bookings`.
@@ -38,6 +81,133 @@ class BookingInfoFilter(filters.FilterSet):
         """
         return queryset
 
+    def filter_occupancy(self, queryset, name, value):
+        """
+        Filters units by the number of guests each room has to sleep.
+        """
+        return queryset.filter(max_occupancy__gte=value)
+
+    def filter_channel(self, queryset, name, value):
+        """
+        Unused in favor of `filter_check_in_and_check_out_bookings`.
+        """
+        return queryset
+
+    def filter_rooms(self, queryset, name, value):
+        """
+        Unused in favor of `filter_room_combinations`.
+        """
+        return queryset
+
+    def filter_room_combinations(self, queryset: QuerySet, rooms: int) -> QuerySet:
+        """
+        Returns the hotel room types that make up the cheapest combination of `rooms`
+        available rooms in their hotel, annotated with the number of `rooms` to book
+        of each. Hotels without enough available rooms across their room types, and
+        apartments, are left out.
+
+        The queryset must already be filtered by availability (and any other search
+        criteria) and priced for the stay. The cheapest combination fills up the room
+        types of a hotel from the lowest price, so a room type is part of it when the
+        rooms of the cheaper room types do not add up to `rooms` yet. The available
+        rooms of the hotel and of its cheaper room types are summed by correlated
+        subqueries over the same filtered queryset, so the whole selection happens in
+        the database and stays correct across pages.
+        """
+        hotel = "hotel_room_type__hotel"
+        siblings = queryset.order_by().filter(**{hotel: OuterRef(hotel)}).values(hotel)
+        cheaper = Q(total_price__lt=OuterRef("total_price")) | Q(
+            total_price=OuterRef("total_price"), id__lt=OuterRef("id")
+        )
+
+        def sum_available_rooms(siblings: QuerySet) -> Coalesce:
+            return Coalesce(
+                Subquery(
+                    siblings.annotate(total=Sum("available_rooms")).values("total")
+                ),
+                Value(0),
+            )
+
+        return (
+            queryset.filter(hotel_room_type__isnull=False)
+            .annotate(
+                hotel_rooms=sum_available_rooms(siblings),
+                cheaper_rooms=sum_available_rooms(siblings.filter(cheaper)),
+            )
+            .filter(hotel_rooms__gte=rooms, cheaper_rooms__lt=rooms)
+            .annotate(
+                rooms=Least(F("available_rooms"), Value(rooms) - F("cheaper_rooms"))
+            )
+        )
+
+    def filter_location(self, queryset, name, value):
+        """
+        Unused in favor of `filter_nearby`.
+        """
+        return queryset
+
+    def filter_nearby(self, queryset: QuerySet, listings: QuerySet) -> QuerySet:
+        """
+        Returns the apartments and the hotel room types of the given listings. The
+        listings are found from the grid cell index in a subquery, and the units are
+        then looked up by their (unique) listing and hotel room type indexes.
+        """
+        listing_ids = listings.values("pk")
+        return queryset.filter(
+            Q(listing__in=listing_ids)
+            | Q(hotel_room_type__in=HotelRoomType.objects.filter(hotel__in=listing_ids))
+        )
+
+    def get_location(self) -> Optional[QuerySet]:
+        """
+        Returns the listings matching the `lat` / `lng` / `radius` or the `bbox`
+        (min_lat,min_lng,max_lat,max_lng) query parameters, or None when the search
+        is not limited to an area.
+        """
+        params = self.request.GET
+        point_params = [name for name in ("lat", "lng", "radius") if name in params]
+        if point_params and "bbox" in params:
+            raise serializers.ValidationError(
+                _("Please provide either lat, lng and radius or bbox.")
+            )
+
+        if "bbox" in params:
+            try:
+                bounding_box = tuple(
+                    float(value) for value in params["bbox"].split(",")
+                )
+            except ValueError:
+                bounding_box = ()
+            if (
+                len(bounding_box) != 4
+                or not -90 <= bounding_box[0] <= bounding_box[2] <= 90
+                or not all(-180 <= value <= 180 for value in bounding_box[1::2])
+            ):
+                raise serializers.ValidationError(
+                    _("bbox must be min_lat,min_lng,max_lat,max_lng.")
+                )
+            return geo.filter_bounding_box(Listing.objects.all(), bounding_box)
+
+        if not point_params:
+            return None
+
+        if len(point_params) < 3:
+            raise serializers.ValidationError(
+                _("Please provide lat, lng and radius values.")
+            )
+
+        latitude, longitude, radius = (
+            float(self.form.cleaned_data[name]) for name in ("lat", "lng", "radius")
+        )
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            raise serializers.ValidationError(_("Invalid lat or lng value."))
+        if not 0 < radius <= MAX_RADIUS:
+            raise serializers.ValidationError(
+                _("radius must be between 0 and %(max)s km.") % {"max": MAX_RADIUS}
+            )
+
+        return geo.filter_radius(Listing.objects.all(), latitude, longitude, radius)
+
     def filter_check_in_and_check_out_bookings(
         self,
         queryset: Union[QuerySet, List[BookingInfo]],
@@ -46,54 +216,48 @@ class BookingInfoFilter(filters.FilterSet):
     ) -> Union[QuerySet, List[BookingInfo]]:
         """
         Returns queryset based on whether rooms/apartments are available on a given
-        check in / check out range.
-        """
-        return queryset.annotate(
-            # Get all reservations that overlap the given check in and check out dates.
-            reservations_made=Count(
-                "reservations",
-                filter=(
-                    Q(
-                        reservations__start_date__lte=check_in,
-                        reservations__end_date__gte=check_in,
-                    )
-                    | Q(
-                        reservations__start_date__lte=check_out,
-                        reservations__end_date__gte=check_out,
-                    )
-                    | Q(
-                        reservations__start_date__gte=check_in,
-                        reservations__end_date__lte=check_out,
-                    )
-                    | Q(
-                        reservations__start_date__lte=check_in,
-                        reservations__end_date__gte=check_out,
-                    )
-                ),
-                distinct=True,
-            ),
-            # Get the total rooms for each listing. Hotel rooms count for hotels while
-            # apartments always return 1.
-            total_rooms=Case(
-                When(
-                    listing__isnull=False,  # For apartment bookings
-                    then=Value(1),
-                ),
-                When(
-                    hotel_room_type__isnull=False,  # For hotel bookings
-                    then=Count("hotel_room_type__hotel_rooms", distinct=True),
-                ),
-                default=Value(0),
-                output_field=IntegerField(),
-            ),
-            available_rooms=F("total_rooms") - F("reservations_made"),
-        ).filter(available_rooms__gt=0)
+        check in / check out range and their stay restrictions allow the stay.
+
+        When the availability snapshot covers the stay, the available units are read
+        from it (see `listings.snapshot`) instead of counting the reservations of
+        every unit in the query. Room searches (`rooms` > 1) need the available rooms
+        of each unit in the query, and the snapshot only counts the open rooms, so
+        room and `channel` searches always count them there.
+        """
+        queryset = queryset.allowing_stay(check_in, check_out)
+        rooms = self.form.cleaned_data.get("rooms")
+        channel = self.form.cleaned_data.get("channel")
+        if (
+            settings.AVAILABILITY_SNAPSHOT_PATH
+            and (not rooms or rooms == 1)
+            and not channel
+        ):
+            # Imported on use, so workers without a snapshot do not load numpy
+            from .snapshot import get_snapshot
+
+            snapshot = get_snapshot()
+        else:
+            snapshot = None
+        if snapshot is not None and snapshot.covers(check_in, check_out):
+            return queryset.filter(
+                InIntegers("id", snapshot.get_available_ids(check_in, check_out))
+            )
+
+        return queryset.with_availability(check_in, check_out, channel=channel).filter(
+            available_rooms__gt=0
+        )
 
     def filter_queryset(self, queryset):
         """
         Executes the filtering in the queryset but with an additional validation for
         check_in and check_out fields.
         """
+        self.stay_nights = None
+
+        listings = self.get_location()
+        if listings is not None:
+            queryset = self.filter_nearby(queryset, listings)
+
         if "check_in" in self.request.GET and "check_out" not in self.request.GET:
             raise serializers.ValidationError(_("Please provide check_out value."))
 
@@ -105,16 +269,18 @@ class BookingInfoFilter(filters.FilterSet):
         if "check_in" in self.request.GET and "check_out" in self.request.GET:
             check_in = datetime.datetime.strptime(
                 self.request.GET.get("check_in"), "%Y-%m-%d"
-            )
+            ).date()
             check_out = datetime.datetime.strptime(
                 self.request.GET.get("check_out"), "%Y-%m-%d"
-            )
+            ).date()
 
             if check_in > check_out:
                 raise serializers.ValidationError(
                     _("Check in date must not be later than check out date.")
                 )
 
+            validate_stay_nights(get_stay_nights(check_in, check_out))
+
             # NOTE: By default, filtering is done on each field separately. We can't do
             # that for check in and check out date range. We need both fields to
             # properly filter the reservations made. Hence, the implementation of this
@@ -125,4 +291,20 @@ class BookingInfoFilter(filters.FilterSet):
                 check_out,
             )
 
-        return super().filter_queryset(queryset)
+            # Price the whole stay, including any rate overrides, and sort by it.
+            self.stay_nights = get_stay_nights(check_in, check_out)
+            queryset = queryset.with_total_price(check_in, check_out).order_by(
+                "total_price", "id"
+            )
+
+        rooms = self.form.cleaned_data.get("rooms")
+        if rooms and not self.stay_nights:
+            raise serializers.ValidationError(
+                _("Please provide check_in and check_out values to search rooms.")
+            )
+
+        queryset = super().filter_queryset(queryset)
+        if rooms and rooms > 1:
+            queryset = self.filter_room_combinations(queryset, rooms)
+
+        return queryset
@@ -0,0 +1,160 @@
+"""
+Proximity search without a spatial database.
+
+The world is divided in square cells of `GRID_CELL_SIZE` degrees, numbered row by row
+from the south west corner, and every :model:`listings.Listing` with coordinates
+stores the number of its cell in the indexed `grid_cell` column. The cells of a
+bounding box are contiguous within each row, so the listings in the box are found
+with one index range scan per row of cells, followed by an exact check of the
+coordinates of the (few) listings in the border cells.
+"""
+
+import math
+from decimal import Decimal
+from typing import List, Optional, Tuple, Union
+
+from django.db.models import ExpressionWrapper, F, FloatField, Q, QuerySet, Value
+
+# 0.1 degrees is about 11km along a meridian, so a city sized radius only touches a
+# handful of rows.
+GRID_CELL_SIZE = Decimal("0.1")
+GRID_COLUMNS = int(360 / GRID_CELL_SIZE)
+GRID_ROWS = int(180 / GRID_CELL_SIZE)
+
+# Bounding boxes spanning more rows are searched with a single range from their first
+# to their last cell, which reads more index entries but keeps the query short.
+MAX_GRID_ROW_RANGES = 50
+
+KM_PER_DEGREE = 111.32
+
+Number = Union[int, float, Decimal]
+BoundingBox = Tuple[float, float, float, float]
+
+
+def get_grid_cell(latitude: Optional[Number], longitude: Optional[Number]):
+    """
+    Returns the number of the grid cell containing the coordinates, or None when
+    they are not set.
+    """
+    if latitude is None or longitude is None:
+        return None
+
+    row = min(int((Decimal(str(latitude)) + 90) // GRID_CELL_SIZE), GRID_ROWS - 1)
+    # Longitude 180 is the east edge of the last column, like latitude 90 of the
+    # last row. Wrapping it to the first column would empty boxes ending on it.
+    column = min(
+        int((Decimal(str(longitude)) + 180) // GRID_CELL_SIZE), GRID_COLUMNS - 1
+    )
+    return row * GRID_COLUMNS + column
+
+
+def get_bounding_box(latitude: float, longitude: float, radius: float) -> BoundingBox:
+    """
+    Returns the (min latitude, min longitude, max latitude, max longitude) box
+    around a circle of `radius` km. Longitudes wrap around the antimeridian, so the
+    min longitude is greater than the max longitude when the box crosses it.
+    """
+    latitude_delta = radius / KM_PER_DEGREE
+    min_latitude = max(latitude - latitude_delta, -90.0)
+    max_latitude = min(latitude + latitude_delta, 90.0)
+
+    # Meridians converge towards the poles. Use the widest parallel of the box.
+    widest = max(abs(min_latitude), abs(max_latitude))
+    cos_latitude = math.cos(math.radians(min(widest, 89.9)))
+    longitude_delta = radius / (KM_PER_DEGREE * cos_latitude)
+    if longitude_delta >= 180:
+        return min_latitude, -180.0, max_latitude, 180.0
+
+    min_longitude = (longitude - longitude_delta + 180) % 360 - 180
+    max_longitude = (longitude + longitude_delta + 180) % 360 - 180
+    return min_latitude, min_longitude, max_latitude, max_longitude
+
+
+def get_grid_cell_ranges(bounding_box: BoundingBox) -> List[Tuple[int, int]]:
+    """
+    Returns the inclusive ranges of grid cells covering the bounding box.
+    """
+    min_latitude, min_longitude, max_latitude, max_longitude = bounding_box
+    first_cell = get_grid_cell(min_latitude, min_longitude)
+    last_cell = get_grid_cell(max_latitude, max_longitude)
+    first_row, first_column = divmod(first_cell, GRID_COLUMNS)
+    last_row, last_column = divmod(last_cell, GRID_COLUMNS)
+
+    if max_longitude - min_longitude >= 360:
+        # Whole rows, which are contiguous
+        return [(first_row * GRID_COLUMNS, (last_row + 1) * GRID_COLUMNS - 1)]
+
+    if first_column <= last_column:
+        column_ranges = [(first_column, last_column)]
+    else:
+        # The box crosses the antimeridian
+        column_ranges = [(first_column, GRID_COLUMNS - 1), (0, last_column)]
+
+    if (last_row - first_row + 1) * len(column_ranges) > MAX_GRID_ROW_RANGES:
+        if len(column_ranges) == 1:
+            return [(first_cell, last_cell)]
+        return [(first_row * GRID_COLUMNS, (last_row + 1) * GRID_COLUMNS - 1)]
+
+    return [
+        (row * GRID_COLUMNS + start, row * GRID_COLUMNS + end)
+        for row in range(first_row, last_row + 1)
+        for start, end in column_ranges
+    ]
+
+
+def filter_bounding_box(queryset: QuerySet, bounding_box: BoundingBox) -> QuerySet:
+    """
+    Filters a queryset of :model:`listings.Listing` by a bounding box.
+    """
+    min_latitude, min_longitude, max_latitude, max_longitude = bounding_box
+
+    cells = Q()
+    for start, end in get_grid_cell_ranges(bounding_box):
+        cells |= Q(grid_cell__range=(start, end))
+
+    if min_longitude <= max_longitude:
+        longitudes = Q(longitude__gte=min_longitude, longitude__lte=max_longitude)
+    else:
+        longitudes = Q(longitude__gte=min_longitude) | Q(longitude__lte=max_longitude)
+
+    return queryset.filter(
+        cells,
+        longitudes,
+        latitude__gte=min_latitude,
+        latitude__lte=max_latitude,
+    )
+
+
+def filter_radius(
+    queryset: QuerySet, latitude: float, longitude: float, radius: float
+) -> QuerySet:
+    """
+    Filters a queryset of :model:`listings.Listing` by their distance (in km) from a
+    point. The distance is approximated on a plane tangent to the point, which is
+    accurate to well under a percent at city scale.
+    """
+    queryset = filter_bounding_box(
+        queryset, get_bounding_box(latitude, longitude, radius)
+    )
+    longitude_scale = math.cos(math.radians(latitude))
+
+    # Listings across the antimeridian are measured from the point shifted by a
+    # full turn.
+    def squared_distance(center_longitude: float) -> ExpressionWrapper:
+        return ExpressionWrapper(
+            (F("latitude") - Value(latitude)) * (F("latitude") - Value(latitude))
+            + (F("longitude") - Value(center_longitude))
+            * (F("longitude") - Value(center_longitude))
+            * Value(longitude_scale**2),
+            output_field=FloatField(),
+        )
+
+    max_squared_distance = (radius / KM_PER_DEGREE) ** 2
+    within = Q(squared_distance__lte=max_squared_distance)
+    queryset = queryset.annotate(squared_distance=squared_distance(longitude))
+    if abs(longitude) + radius / (KM_PER_DEGREE * max(longitude_scale, 1e-3)) > 180:
+        shifted = longitude - 360 if longitude > 0 else longitude + 360
+        queryset = queryset.annotate(shifted_squared_distance=squared_distance(shifted))
+        within |= Q(shifted_squared_distance__lte=max_squared_distance)
+
+    return queryset.filter(within)
@@ -0,0 +1,120 @@
+"""
+Idempotent requests, so that retries of the booking gateway do not create duplicate
+reservations.
+
+A request with an `Idempotency-Key` header inserts the key before it runs, in the
+same transaction as its work, and stores its response on the key when it succeeds.
+A retry of the request finds the key and gets the stored response back, marked with
+an `Idempotent-Replayed` header, without being run again.
+
+A duplicate sent while the first request is still running has to wait for the key
+to be inserted: on PostgreSQL the insert blocks on the uncommitted key of the unique
+index, and on SQLite on the write lock. Once the first request commits, the
+duplicate replays its response. If the first request fails, its key is rolled back
+along with its work, and the duplicate runs instead.
+
+A key sent with a different request is rejected. Keys expire after
+`IDEMPOTENCY_KEY_TTL` seconds; `prune_idempotency_keys` deletes them.
+"""
+
+import datetime
+import hashlib
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = _("The Idempotency-Key was already used for a different request.")
+    default_code = "idempotency_key_reused"
+
+
+def get_key(request: Request) -> Optional[str]:
+    """
+    Returns the idempotency key of the request, or None when it has none.
+    """
+    key: Optional[str] = request.headers.get(HEADER)
+    if key is not None and not 0 < len(key) <= 255:
+        raise serializers.ValidationError(
+            {HEADER: [_("Must be between 1 and 255 characters long.")]}
+        )
+    return key
+
+
+def get_fingerprint(request: Request) -> str:
+    """
+    Returns the SHA-256 of the method, path and data of the request, which retries
+    of the request share.
+    """
+    data = request.data
+    if hasattr(data, "lists"):
+        # Form data
+        data = dict(data.lists())
+    encoded = json.dumps(
+        [request.method, request.path, data], cls=JSONEncoder, sort_keys=True
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def claim(key: str, fingerprint: str) -> IdempotencyKey:
+    """
+    Inserts the key, or returns it when a previous request inserted it, waiting for
+    that request to finish. Must run in a transaction. Expired keys are reused.
+    """
+    expires_at = timezone.now() + datetime.timedelta(
+        seconds=settings.IDEMPOTENCY_KEY_TTL
+    )
+    try:
+        # Inserting first, rather than reading first, is what waits for a request
+        # with the same key that has not committed yet
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                key=key, fingerprint=fingerprint, expires_at=expires_at
+            )
+    except IntegrityError:
+        record = IdempotencyKey.objects.select_for_update().get(key=key)
+
+    if record.expires_at <= timezone.now():
+        record.fingerprint = fingerprint
+        record.status_code = record.response = None
+        record.expires_at = expires_at
+        record.save()
+    elif record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+
+    return record
+
+
+def replay(record: IdempotencyKey) -> Response:
+    """
+    Returns the stored response of the key.
+    """
+    return Response(
+        record.response,
+        status=record.status_code,
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def store(record: IdempotencyKey, response: Response):
+    """
+    Stores the response of the request on its key.
+    """
+    record.status_code = response.status_code
+    record.response = response.data
+    record.save(update_fields=("status_code", "response"))
@@ -0,0 +1,229 @@
+"""
+A small database backed job queue for work that does not need to run while the
+client waits, e.g. refreshing caches and projections after a reservation is created.
+
+Jobs are rows of :model:`listings.Job`, inserted with `enqueue` in the transaction of
+the change that causes them, so they are only run if that change is committed. The
+`run_jobs` management command claims due jobs in batches and runs them with the
+handler registered for their name:
+
+    @register("send_confirmation", max_attempts=3)
+    def send_confirmation(payloads):
+        ...
+
+    enqueue("send_confirmation", {"reservation": reservation.pk})
+
+Handlers receive a list of payloads. Pending jobs with the same name and (non-empty)
+key are coalesced, so a handler runs once for many changes of the same object. A
+handler that raises is retried with an exponential backoff until `max_attempts`,
+after which its jobs are kept as failed.
+"""
+
+import datetime
+import logging
+import time
+import traceback
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Running jobs claimed longer ago than this are assumed to belong to a dead worker
+# and are claimed again.
+LEASE = datetime.timedelta(minutes=10)
+
+BOOKING_INFO_CHANGED = "booking_info_changed"
+
+
+class JobType:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[Dict]], None],
+        max_attempts: int = 5,
+        retry_delay: datetime.timedelta = datetime.timedelta(seconds=30),
+    ):
+        self.name = name
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+
+registry: Dict[str, JobType] = {}
+
+
+def register(name: str, **options) -> Callable:
+    """
+    Decorator registering a job handler under `name`. See `JobType` for the options.
+    """
+
+    def decorator(handler: Callable[[List[Dict]], None]) -> Callable:
+        registry[name] = JobType(name, handler, **options)
+        return handler
+
+    return decorator
+
+
+def enqueue(
+    name: str,
+    payload: Optional[Dict] = None,
+    key: str = "",
+    run_after: Optional[datetime.datetime] = None,
+) -> Job:
+    """
+    Adds a job to the queue. Jobs with the same `name` and `key` that are pending
+    together are run once, with the payload of the latest one.
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown job {name!r}.")
+
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        key=key,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def enqueue_many(name: str, payloads: Dict[str, Dict]) -> List[Job]:
+    """
+    Adds a job for every (key, payload) item of `payloads` with a single insert.
+    """
+    if name not in registry:
+        raise KeyError(f"Unknown job {name!r}.")
+
+    now = timezone.now()
+    return Job.objects.bulk_create(
+        [
+            Job(name=name, payload=payload, key=key, run_after=now)
+            for key, payload in payloads.items()
+        ]
+    )
+
+
+def claim_jobs(worker: str, limit: int) -> List[Job]:
+    """
+    Marks up to `limit` due jobs as running for `worker` and returns them. Safe to
+    call from concurrent workers: a job is only claimed by the worker whose update
+    still finds it due.
+    """
+    now = timezone.now()
+    due = Q(status=Job.PENDING, run_after__lte=now) | Q(
+        status=Job.RUNNING, claimed_at__lt=now - LEASE
+    )
+    job_ids = list(
+        Job.objects.filter(due)
+        .order_by("run_after", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    if not job_ids:
+        return []
+
+    Job.objects.filter(due, id__in=job_ids).update(
+        status=Job.RUNNING, claimed_by=worker, claimed_at=now
+    )
+    return list(
+        Job.objects.filter(id__in=job_ids, status=Job.RUNNING, claimed_by=worker)
+    )
+
+
+def run_jobs(jobs: List[Job]) -> int:
+    """
+    Runs claimed jobs, coalescing the jobs with the same name and key, and returns
+    the number of handler calls that failed.
+    """
+    jobs_by_name: Dict[str, List[Job]] = defaultdict(list)
+    for job in sorted(jobs, key=lambda job: job.id):
+        jobs_by_name[job.name].append(job)
+
+    failures = 0
+    for name, named_jobs in jobs_by_name.items():
+        job_type = registry.get(name)
+        if job_type is None:
+            fail_jobs(named_jobs, None, f"Unknown job {name!r}.")
+            failures += 1
+            continue
+
+        # The latest job of each key wins, jobs without a key are run one by one
+        payloads: Dict[object, Dict] = {}
+        for job in named_jobs:
+            payloads[job.key or job.id] = job.payload
+
+        try:
+            with transaction.atomic():
+                job_type.handler(list(payloads.values()))
+        except Exception:
+            logger.exception("Job %s failed", name)
+            fail_jobs(named_jobs, job_type, traceback.format_exc())
+            failures += 1
+        else:
+            Job.objects.filter(id__in=[job.id for job in named_jobs]).delete()
+
+    return failures
+
+
+def fail_jobs(jobs: List[Job], job_type: Optional[JobType], error: str):
+    """
+    Schedules the jobs for a retry with an exponential backoff, or marks them as
+    failed once they ran out of attempts.
+    """
+    now = timezone.now()
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = error
+        job.claimed_by = ""
+        job.claimed_at = None
+        if job_type is None or job.attempts >= job_type.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_after = now + job_type.retry_delay * 2 ** (job.attempts - 1)
+
+    Job.objects.bulk_update(
+        jobs,
+        ("attempts", "last_error", "claimed_by", "claimed_at", "status", "run_after"),
+    )
+
+
+def work(
+    batch_size: int = 100,
+    poll_interval: float = 1.0,
+    once: bool = False,
+    worker: Optional[str] = None,
+) -> int:
+    """
+    Claims and runs batches of jobs until interrupted, or until the queue is empty
+    when `once` is set. Returns the number of processed jobs.
+    """
+    worker = worker or uuid.uuid4().hex
+    processed = 0
+    while True:
+        jobs = claim_jobs(worker, batch_size)
+        if not jobs:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+
+        run_jobs(jobs)
+        processed += len(jobs)
+
+
+@register(BOOKING_INFO_CHANGED)
+def send_booking_info_changed(payloads: List[Dict]):
+    """
+    Sends `listings.signals.booking_info_changed` once for the booking info of every
+    reservation change since the last run. Deferred post-booking work (cache
+    invalidation, projections, notifications) should be connected to that signal.
+    """
+    from .signals import booking_info_changed
+
+    booking_info_ids = sorted({payload["booking_info"] for payload in payloads})
+    booking_info_changed.send(sender=Job, booking_info_ids=booking_info_ids)
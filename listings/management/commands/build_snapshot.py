@@ -0,0 +1,59 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from ...snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a new generation of the memory-mapped availability snapshot that the "
+        "unit searches read (see `listings.snapshot`). Meant to run every few "
+        "minutes, well within AVAILABILITY_SNAPSHOT_MAX_AGE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=settings.AVAILABILITY_SNAPSHOT_PATH,
+            help="Snapshot file. AVAILABILITY_SNAPSHOT_PATH by default.",
+        )
+        parser.add_argument(
+            "--start-date",
+            type=datetime.date.fromisoformat,
+            help="First day of the snapshot (YYYY-MM-DD). Today by default.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Number of days of the snapshot."
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database the reservations are read from.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["path"]:
+            raise CommandError("Set AVAILABILITY_SNAPSHOT_PATH or pass --path.")
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        try:
+            header = build_snapshot(
+                options["path"],
+                options["start_date"] or timezone.now().date(),
+                options["days"],
+                using=options["database"],
+            )
+        except OSError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote the snapshot of {header['units']} units from "
+                f"{header['start_date']} ({header['days']} days) to {options['path']}."
+            )
+        )
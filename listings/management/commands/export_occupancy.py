@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from ...occupancy import compute_occupancy, write_occupancy_parquet
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the daily occupancy of every unit (reservations and total rooms per "
+        "booking info and day) to a Parquet file for offline analytics. Meant to run "
+        "nightly, against a replica when there is one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Parquet file to write.")
+        parser.add_argument(
+            "--start-date",
+            type=datetime.date.fromisoformat,
+            help="First day of the snapshot (YYYY-MM-DD). Today by default.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Number of days of the snapshot."
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database the reservations are read from.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        start_date: datetime.date = options["start_date"] or timezone.now().date()
+        occupancy = compute_occupancy(
+            start_date, options["days"], using=options["database"]
+        )
+        try:
+            rows: int = write_occupancy_parquet(
+                options["path"],
+                occupancy,
+                metadata={
+                    "start_date": start_date.isoformat(),
+                    "created_at": timezone.now().isoformat(),
+                },
+            )
+        except ImportError:
+            raise CommandError("Writing Parquet files requires pyarrow.")
+        except OSError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {rows} rows ({len(occupancy['booking_info_id'])} units, "
+                f"{options['days']} days) to {options['path']}."
+            )
+        )
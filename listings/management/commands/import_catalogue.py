@@ -0,0 +1,72 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...catalogue import CatalogueError, CatalogueImporter, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports listings, hotel room types, hotel rooms and their booking info from "
+        "a CSV or JSON Lines file. See `listings.catalogue.CatalogueImporter` for the "
+        "record fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON Lines file to import.")
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="File format. Taken from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of records imported per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "File recording the number of imported records after every batch. "
+                "Running the command again with the same checkpoint resumes the "
+                "import after the last committed batch. Removed once the import "
+                "completes."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        checkpoint: str = options["checkpoint"]
+        skip: int = 0
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                skip = int(file.read().strip() or 0)
+            self.stdout.write(f"Resuming after {skip} records.")
+
+        def on_batch(processed: int):
+            if checkpoint:
+                # Replaced atomically so an interruption never leaves it half written
+                with open(f"{checkpoint}.tmp", "w") as file:
+                    file.write(str(processed))
+                os.replace(f"{checkpoint}.tmp", checkpoint)
+
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{processed} records imported.")
+
+        importer = CatalogueImporter(batch_size=options["batch_size"])
+        try:
+            processed: int = importer.run(
+                read_records(options["path"], options["format"]),
+                skip=skip,
+                on_batch=on_batch,
+            )
+        except (CatalogueError, OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        for name, count in sorted(importer.stats.items()):
+            if count:
+                self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {processed - skip} records."))
@@ -0,0 +1,45 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import AvailabilityChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the changes of the availability change feed older than the "
+        "retention. Consumers further behind have to read the units again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CHANGE_FEED_RETENTION,
+            help="Number of days of changes to keep.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of changes deleted per query, to keep write locks short.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options["days"])
+        deleted = 0
+        while True:
+            # Read from the `created_at` index
+            change_ids = list(
+                AvailabilityChange.objects.filter(created_at__lt=before)
+                .order_by("created_at")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not change_ids:
+                break
+
+            deleted += AvailabilityChange.objects.filter(id__in=change_ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} changes."))
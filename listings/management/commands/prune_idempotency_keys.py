@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired idempotency keys. Retries with an expired key already run "
+        "as new requests, this only keeps the table small."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of keys deleted per query, to keep write locks short.",
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            # Read from the `expires_at` index
+            key_ids = list(
+                IdempotencyKey.objects.filter(expires_at__lte=now)
+                .order_by("expires_at")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not key_ids:
+                break
+
+            deleted += IdempotencyKey.objects.filter(id__in=key_ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired keys."))
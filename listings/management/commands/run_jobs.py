@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ... import jobs
+
+
+def init_process():
+    """
+    Prepares a worker process. Connections inherited from the parent process must
+    not be shared, so every process opens its own.
+    """
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Runs the jobs of the background job queue (see `listings.jobs`)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes claiming jobs concurrently.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of jobs claimed at a time by each worker.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no due jobs left instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {
+            "batch_size": options["batch_size"],
+            "poll_interval": options["poll_interval"],
+            "once": options["once"],
+        }
+        if options["processes"] > 1:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options["processes"], initializer=init_process
+            ) as executor:
+                futures = [
+                    executor.submit(jobs.work, **kwargs)
+                    for _ in range(options["processes"])
+                ]
+                processed = sum(future.result() for future in futures)
+        else:
+            processed = jobs.work(**kwargs)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
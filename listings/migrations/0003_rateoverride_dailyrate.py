@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-19 01:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_bookingreservation'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='bookingreservation',
+            options={'ordering': ('end_date', 'start_date'), 'verbose_name': 'Booking Reservation', 'verbose_name_plural': 'Booking Reservations'},
+        ),
+        migrations.CreateModel(
+            name='RateOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('weekends_only', models.BooleanField(default=False, help_text='Only override the price of Friday and Saturday nights.')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('booking_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_overrides', to='listings.bookinginfo')),
+            ],
+            options={
+                'verbose_name': 'Rate Override',
+                'verbose_name_plural': 'Rate Overrides',
+                'ordering': ('start_date', 'end_date'),
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('booking_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rates', to='listings.bookinginfo')),
+            ],
+            options={
+                'verbose_name': 'Daily Rate',
+                'verbose_name_plural': 'Daily Rates',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='dailyrate',
+            index=models.Index(fields=['booking_info', 'date', 'price'], name='listings_dailyrate_covering'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrate',
+            constraint=models.UniqueConstraint(fields=('booking_info', 'date'), name='listings_dailyrate_unique_date'),
+        ),
+    ]
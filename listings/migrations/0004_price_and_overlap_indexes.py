@@ -0,0 +1,48 @@
+# Generated by Django 3.2 on 2026-10-19 01:51
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Least
+
+
+def populate_lowest_price(apps, schema_editor):
+    BookingInfo = apps.get_model('listings', 'BookingInfo')
+    DailyRate = apps.get_model('listings', 'DailyRate')
+    lowest_rate = (
+        DailyRate.objects.filter(booking_info=OuterRef('pk'))
+        .values('booking_info')
+        .annotate(lowest_rate=Min('price'))
+        .values('lowest_rate')
+    )
+    BookingInfo.objects.update(
+        lowest_price=Least('price', Coalesce(Subquery(lowest_rate), 'price'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_rateoverride_dailyrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookinginfo',
+            name='lowest_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Lowest nightly price including rate overrides. Used to discard units from price filtered searches without pricing every stay.', max_digits=6),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_lowest_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bookinginfo',
+            index=models.Index(fields=['price', 'id', 'listing', 'hotel_room_type'], name='listings_bookinginfo_price'),
+        ),
+        migrations.AddIndex(
+            model_name='bookinginfo',
+            index=models.Index(fields=['lowest_price', 'id'], name='listings_bookinginfo_lowest'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingreservation',
+            index=models.Index(fields=['booking_info', 'start_date', 'end_date'], name='listings_reservation_overlap'),
+        ),
+    ]
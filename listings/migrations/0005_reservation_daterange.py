@@ -0,0 +1,69 @@
+# Generated by Django 3.2 on 2026-10-19 01:58
+
+from django.db import migrations, models
+
+# PostgreSQL only. Reservations are stored as two date columns so SQLite keeps
+# working; the daterange is an expression over them. The booking info id is wrapped
+# in an int8range so the exclusion constraint only needs the built-in GiST range
+# operator classes instead of the btree_gist extension.
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX listings_reservation_period
+    ON listings_bookingreservation
+    USING gist (daterange(start_date, end_date, '[]'))
+    """,
+    """
+    ALTER TABLE listings_bookingreservation
+    ADD CONSTRAINT listings_reservation_no_double_booking
+    EXCLUDE USING gist (
+        int8range(booking_info_id, booking_info_id, '[]') WITH &&,
+        daterange(start_date, end_date, '[]') WITH &&
+    )
+    WHERE (exclusive)
+    """,
+]
+POSTGRESQL_BACKWARD = [
+    """
+    ALTER TABLE listings_bookingreservation
+    DROP CONSTRAINT listings_reservation_no_double_booking
+    """,
+    "DROP INDEX listings_reservation_period",
+]
+
+
+def populate_exclusive(apps, schema_editor):
+    BookingReservation = apps.get_model('listings', 'BookingReservation')
+    BookingReservation.objects.filter(booking_info__listing__isnull=False).update(
+        exclusive=True
+    )
+
+
+def add_postgresql_range_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRESQL_FORWARD:
+            schema_editor.execute(sql)
+
+
+def remove_postgresql_range_constraints(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in POSTGRESQL_BACKWARD:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_price_and_overlap_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingreservation',
+            name='exclusive',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether the unit can only hold one reservation at a time (apartments). On PostgreSQL, overlapping exclusive reservations are rejected by an exclusion constraint.'),
+        ),
+        migrations.RunPython(populate_exclusive, migrations.RunPython.noop),
+        migrations.RunPython(
+            add_postgresql_range_constraints, remove_postgresql_range_constraints
+        ),
+    ]
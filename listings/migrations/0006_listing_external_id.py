@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_reservation_daterange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Identifier of the listing in imported catalogues.', max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_listing_external_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingreservation',
+            index=models.Index(fields=['start_date', 'id'], name='listings_reservation_start'),
+        ),
+    ]
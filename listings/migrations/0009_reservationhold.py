@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-19 02:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='listings.bookinginfo')),
+            ],
+            options={
+                'verbose_name': 'Reservation Hold',
+                'verbose_name_plural': 'Reservation Holds',
+                'ordering': ('expires_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reservationhold',
+            index=models.Index(fields=['booking_info', 'expires_at', 'start_date', 'end_date'], name='listings_hold_active'),
+        ),
+        migrations.AddIndex(
+            model_name='reservationhold',
+            index=models.Index(fields=['expires_at'], name='listings_hold_expiry'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-19 02:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0009_reservationhold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='grid_cell',
+            field=models.IntegerField(blank=True, editable=False, help_text='Grid cell of the coordinates (see `listings.geo`). Lets proximity searches read index ranges instead of every listing.', null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['grid_cell', 'latitude', 'longitude'], name='listings_listing_grid_cell'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_listing_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookinginfo',
+            name='max_occupancy',
+            field=models.PositiveSmallIntegerField(default=2, help_text='Number of guests a room (or apartment) sleeps.'),
+        ),
+    ]
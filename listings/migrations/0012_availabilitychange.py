@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_bookinginfo_max_occupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_info_id', models.PositiveIntegerField()),
+                ('kind', models.CharField(choices=[('availability', 'Availability'), ('price', 'Price')], max_length=16)),
+                ('start_date', models.DateField(blank=True, help_text='First changed day, or empty when every day may have changed.', null=True)),
+                ('end_date', models.DateField(blank=True, help_text='Last changed day, or empty when every day may have changed.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Availability Change',
+                'verbose_name_plural': 'Availability Changes',
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='availabilitychange',
+            index=models.Index(fields=['created_at'], name='listings_change_created'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.2 on 2026-10-19 03:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_availabilitychange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Allotment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=64)),
+                ('rooms', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Allotment',
+                'verbose_name_plural': 'Allotments',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='bookingreservation',
+            name='listings_reservation_overlap',
+        ),
+        migrations.AddField(
+            model_name='bookinginfo',
+            name='allotted_rooms',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Rooms allotted to sales channels, summed from the allotments. Only the channels sell them.'),
+        ),
+        migrations.AddField(
+            model_name='bookinginfo',
+            name='overbooking_margin',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Percentage of the hotel rooms that may be sold on top of them, rounded down to whole rooms. Apartments are never overbooked.'),
+        ),
+        migrations.AddField(
+            model_name='bookingreservation',
+            name='allotted',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether the reservation takes a room of the allotment of its channel rather than an open room.'),
+        ),
+        migrations.AddField(
+            model_name='bookingreservation',
+            name='channel',
+            field=models.CharField(blank=True, help_text='Sales channel of the reservation, empty for direct bookings.', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='bookingreservation',
+            index=models.Index(fields=['booking_info', 'start_date', 'end_date', 'allotted', 'channel'], name='listings_reservation_overlap'),
+        ),
+        migrations.AddField(
+            model_name='allotment',
+            name='booking_info',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allotments', to='listings.bookinginfo'),
+        ),
+        migrations.AddConstraint(
+            model_name='allotment',
+            constraint=models.UniqueConstraint(fields=('booking_info', 'channel'), name='listings_allotment_unique_channel'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-19 03:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0013_overbooking_and_allotments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StayRestriction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('min_stay', models.PositiveSmallIntegerField(default=1, help_text='Fewest nights of a stay checking in on the date.')),
+                ('max_stay', models.PositiveSmallIntegerField(blank=True, help_text='Most nights of a stay checking in on the date, if limited.', null=True)),
+                ('closed_to_arrival', models.BooleanField(default=False)),
+                ('closed_to_departure', models.BooleanField(default=False)),
+                ('booking_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stay_restrictions', to='listings.bookinginfo')),
+            ],
+            options={
+                'verbose_name': 'Stay Restriction',
+                'verbose_name_plural': 'Stay Restrictions',
+                'ordering': ('date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stayrestriction',
+            index=models.Index(fields=['booking_info', 'date', 'min_stay', 'max_stay', 'closed_to_arrival', 'closed_to_departure'], name='listings_restriction_covering'),
+        ),
+        migrations.AddConstraint(
+            model_name='stayrestriction',
+            constraint=models.UniqueConstraint(fields=('booking_info', 'date'), name='listings_restriction_unique_date'),
+        ),
+    ]
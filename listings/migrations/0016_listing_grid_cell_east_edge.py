@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import F
+
+# `listings.geo.GRID_COLUMNS` when this migration was written
+GRID_COLUMNS = 3600
+
+
+def move_east_edge_listings(apps, schema_editor):
+    """
+    Moves the listings on longitude 180 from the first to the last column of their
+    grid row, where `get_grid_cell` now puts them.
+    """
+    Listing = apps.get_model("listings", "Listing")
+    Listing.objects.filter(longitude=180, grid_cell__isnull=False).update(
+        grid_cell=F("grid_cell") + GRID_COLUMNS - 1
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0015_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_east_edge_listings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0016_listing_grid_cell_east_edge'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='availabilitychange',
+            name='booking_info_id',
+            field=models.PositiveBigIntegerField(),
+        ),
+    ]
@@ -1,3 +1,16 @@
+from django.conf import settings
+from django.db import transaction
+
+from . import idempotency
+from .timeouts import (
+    LockTimeout,
+    QueryTimeout,
+    is_lock_timeout,
+    is_query_timeout,
+    query_timeout,
+)
+
+
 class RepresentationMixin(object):
     """
     This mixin will handle representation of nested serializers. When used,
@@ -36,3 +49,61 @@ class RepresentationMixin(object):
                     data.update({field: serializer.data})
 
         return data
+
+
+class QueryTimeoutMixin(object):
+    """
+    This mixin limits every query of the view to `SEARCH_QUERY_TIMEOUT` seconds, and
+    returns a `QueryTimeout` error (400) for the queries that run longer instead of
+    keeping the worker busy.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with query_timeout(settings.SEARCH_QUERY_TIMEOUT):
+            return super(QueryTimeoutMixin, self).dispatch(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        if is_query_timeout(exc):
+            exc = QueryTimeout()
+
+        return super(QueryTimeoutMixin, self).handle_exception(exc)
+
+
+class LockTimeoutMixin(object):
+    """
+    This mixin returns a `LockTimeout` error (409) for the writes of the view that
+    could not take their lock, e.g. on SQLite when another request keeps the
+    database locked, instead of a server error. The request can be retried.
+    """
+
+    def handle_exception(self, exc):
+        if is_lock_timeout(exc):
+            exc = LockTimeout()
+
+        return super(LockTimeoutMixin, self).handle_exception(exc)
+
+
+class IdempotentCreateMixin(object):
+    """
+    This mixin makes `create` requests with an `Idempotency-Key` header idempotent:
+    a retry of the request returns the response of the first one instead of running
+    again, and concurrent duplicates wait for the first one to finish. Failed
+    requests are not stored, so their retries run again. See `listings.idempotency`.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = idempotency.get_key(request)
+        if key is None:
+            return super(IdempotentCreateMixin, self).create(request, *args, **kwargs)
+
+        fingerprint = idempotency.get_fingerprint(request)
+        with transaction.atomic():
+            record = idempotency.claim(key, fingerprint)
+            if record.status_code is not None:
+                return idempotency.replay(record)
+
+            response = super(IdempotentCreateMixin, self).create(
+                request, *args, **kwargs
+            )
+            idempotency.store(record, response)
+            return response
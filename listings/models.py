@@ -1,6 +1,32 @@
-from django.db import models
+import datetime
+import uuid
+from decimal import Decimal
+from typing import Dict, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .expressions import DateRangeOverlaps, SubqueryCount
+from .geo import get_grid_cell
+
 
 class Listing(models.Model):
     HOTEL = "hotel"
@@ -22,10 +48,46 @@ class Listing(models.Model):
     city = models.CharField(
         max_length=255,
     )
+    external_id = models.CharField(
+        max_length=255,
+        unique=True,
+        blank=True,
+        null=True,
+        help_text=_("Identifier of the listing in imported catalogues."),
+    )
+    latitude = models.DecimalField(
+        max_digits=8, decimal_places=6, blank=True, null=True
+    )
+    longitude = models.DecimalField(
+        max_digits=9, decimal_places=6, blank=True, null=True
+    )
+    grid_cell = models.IntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_(
+            "Grid cell of the coordinates (see `listings.geo`). Lets proximity "
+            "searches read index ranges instead of every listing."
+        ),
+    )
+
+    class Meta:
+        indexes = [
+            # Covers the coordinates so the exact bounding box check of the listings
+            # in the border cells does not read the table.
+            models.Index(
+                fields=("grid_cell", "latitude", "longitude"),
+                name="listings_listing_grid_cell",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.grid_cell = get_grid_cell(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
 
 class HotelRoomType(models.Model):
     hotel = models.ForeignKey(
@@ -59,6 +121,206 @@ class HotelRoom(models.Model):
         return f"{self.room_number}"
 
 
+def get_stay_nights(check_in: datetime.date, check_out: datetime.date) -> int:
+    """
+    Returns the number of nights of a stay. A stay that checks in and out on the same
+    day counts as a single night.
+    """
+    return max((check_out - check_in).days, 1)
+
+
+class BookingInfoQuerySet(models.QuerySet):
+    def with_total_rooms(self) -> "BookingInfoQuerySet":
+        """
+        Annotates the total rooms for each booking info. Hotel rooms count for hotels
+        while apartments always return 1.
+        """
+        return self.annotate(
+            total_rooms=Case(
+                When(
+                    listing__isnull=False,  # For apartment bookings
+                    then=Value(1),
+                ),
+                When(
+                    hotel_room_type__isnull=False,  # For hotel bookings
+                    then=SubqueryCount(
+                        HotelRoom.objects.filter(
+                            hotel_room_type=OuterRef("hotel_room_type")
+                        )
+                    ),
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+    def with_capacity(self, channel: Optional[str] = None) -> "BookingInfoQuerySet":
+        """
+        Annotates the total rooms and the rooms each booking info can sell:
+        `open_rooms`, the hotel rooms plus the overbooking margin less the rooms
+        allotted to channels, which every channel sells, and `channel_rooms`, the
+        rooms allotted to `channel`.
+        """
+        if channel:
+            channel_rooms = Coalesce(
+                Subquery(
+                    Allotment.objects.filter(
+                        booking_info=OuterRef("pk"), channel=channel
+                    ).values("rooms")
+                ),
+                Value(0),
+            )
+        else:
+            channel_rooms = Value(0)
+
+        return self.with_total_rooms().annotate(
+            open_rooms=Case(
+                When(listing__isnull=False, then=Value(1)),
+                # Integer division rounds the margin down to whole rooms
+                default=F("total_rooms") * (100 + F("overbooking_margin")) / 100,
+                output_field=IntegerField(),
+            )
+            - F("allotted_rooms"),
+            channel_rooms=channel_rooms,
+        )
+
+    def with_availability(
+        self,
+        check_in: datetime.date,
+        check_out: datetime.date,
+        exclude_hold: Optional[int] = None,
+        channel: Optional[str] = None,
+    ) -> "BookingInfoQuerySet":
+        """
+        Annotates the capacity (see `with_capacity`), the reservations made, the
+        active holds and the available rooms for each booking info on a given check
+        in / check out range, as sold by `channel`. The hold with the `exclude_hold`
+        id is not counted, e.g. when it is being turned into a reservation.
+
+        Reservations taken from an allotment only count against the allotment of
+        their channel, and the others (and holds) against the open rooms. The free
+        rooms of the allotment of `channel` are annotated as `allotment_rooms` and
+        added to the available rooms.
+
+        Every count is a correlated subquery rather than an aggregate over a join, so
+        the queryset is not grouped. Filtering on `available_rooms` stays in the WHERE
+        clause and a price ordered, limited query walks the price index and stops once
+        the page is filled, instead of aggregating and sorting the whole table.
+        """
+        # Get all reservations that overlap the given check in and check out dates.
+        reservations = BookingReservation.objects.filter(
+            booking_info=OuterRef("pk")
+        ).overlapping(check_in, check_out)
+        holds = ReservationHold.objects.filter(booking_info=OuterRef("pk")).active()
+        if exclude_hold is not None:
+            holds = holds.exclude(pk=exclude_hold)
+
+        return self.with_capacity(channel).annotate(
+            reservations_made=SubqueryCount(reservations.filter(allotted=False)),
+            holds_made=SubqueryCount(holds.overlapping(check_in, check_out)),
+            allotment_rooms=F("channel_rooms")
+            - (
+                SubqueryCount(reservations.filter(allotted=True, channel=channel))
+                if channel
+                else Value(0)
+            ),
+            available_rooms=F("open_rooms")
+            - F("reservations_made")
+            - F("holds_made")
+            + F("allotment_rooms"),
+        )
+
+    def with_restrictions(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> "BookingInfoQuerySet":
+        """
+        Annotates whether the :model:`listings.StayRestriction` rows of each booking
+        info reject a stay from `check_in` to `check_out` as `restricted`.
+        """
+        return self.annotate(restricted=get_stay_restricted(check_in, check_out))
+
+    def allowing_stay(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> "BookingInfoQuerySet":
+        """
+        Returns the booking infos whose stay restrictions allow a stay from
+        `check_in` to `check_out`.
+        """
+        return self.alias(restricted=get_stay_restricted(check_in, check_out)).filter(
+            restricted=False
+        )
+
+    def with_total_price(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> "BookingInfoQuerySet":
+        """
+        Annotates the total price of a stay from `check_in` to `check_out` for each
+        booking info. Nights with a :model:`listings.DailyRate` use its price while the
+        remaining nights use the base price.
+        """
+        nights: int = get_stay_nights(check_in, check_out)
+        last_night = check_in + datetime.timedelta(days=nights - 1)
+        price_field = DecimalField(max_digits=10, decimal_places=2)
+
+        # Sum the difference between the overriding and the base price of every
+        # overridden night in the stay. The subquery is answered from the
+        # (booking_info, date, price) covering index without touching the table.
+        rate_difference = (
+            DailyRate.objects.filter(
+                booking_info=OuterRef("pk"),
+                date__gte=check_in,
+                date__lte=last_night,
+            )
+            .values("booking_info")
+            .annotate(
+                difference=Sum(
+                    ExpressionWrapper(
+                        F("price") - OuterRef("price"), output_field=price_field
+                    )
+                )
+            )
+            .values("difference")
+        )
+        return self.annotate(
+            total_price=ExpressionWrapper(
+                F("price") * nights
+                + Coalesce(
+                    Subquery(rate_difference, output_field=price_field),
+                    Value(Decimal(0)),
+                    output_field=price_field,
+                ),
+                output_field=price_field,
+            )
+        )
+
+
+def get_stay_restricted(check_in: datetime.date, check_out: datetime.date) -> Exists:
+    """
+    Returns whether the restrictions of the booking info reject a stay from
+    `check_in` to `check_out`: the check in day is closed to arrival or its minimum
+    or maximum stay excludes the stay nights, or the check out day is closed to
+    departure.
+
+    Only the rows of the check in and check out days are read, with two seeks on the
+    (booking_info, date) covering index, so restrictions on every day of the
+    catalogue cost each unit the same as none.
+    """
+    nights: int = get_stay_nights(check_in, check_out)
+    return Exists(
+        StayRestriction.objects.filter(
+            booking_info=OuterRef("pk"), date__in=sorted({check_in, check_out})
+        ).filter(
+            Q(date=check_in)
+            & (
+                Q(closed_to_arrival=True)
+                | Q(min_stay__gt=nights)
+                | Q(max_stay__lt=nights)
+            )
+            | Q(date=check_out, closed_to_departure=True)
+        )
+    )
+
+
 class BookingInfo(models.Model):
     listing = models.OneToOneField(
         Listing,
@@ -75,6 +337,49 @@ class BookingInfo(models.Model):
         related_name="booking_info",
     )
     price = models.DecimalField(max_digits=6, decimal_places=2)
+    lowest_price = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        editable=False,
+        help_text=_(
+            "Lowest nightly price including rate overrides. Used to discard units "
+            "from price filtered searches without pricing every stay."
+        ),
+    )
+    max_occupancy = models.PositiveSmallIntegerField(
+        default=2, help_text=_("Number of guests a room (or apartment) sleeps.")
+    )
+    overbooking_margin = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_(
+            "Percentage of the hotel rooms that may be sold on top of them, rounded "
+            "down to whole rooms. Apartments are never overbooked."
+        ),
+    )
+    allotted_rooms = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=_(
+            "Rooms allotted to sales channels, summed from the allotments. Only the "
+            "channels sell them."
+        ),
+    )
+
+    objects = BookingInfoQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Lets price ordered searches walk the index and stop after a page. The
+            # primary key breaks ties so the order is stable for cursor pagination.
+            models.Index(
+                fields=("price", "id", "listing", "hotel_room_type"),
+                name="listings_bookinginfo_price",
+            ),
+            models.Index(
+                fields=("lowest_price", "id"),
+                name="listings_bookinginfo_lowest",
+            ),
+        ]
 
     def __str__(self):
         if self.listing:
@@ -84,6 +389,104 @@ class BookingInfo(models.Model):
 
         return f"{obj} {self.price}"
 
+    def save(self, *args, **kwargs):
+        self.lowest_price = self.get_lowest_price()
+        super().save(*args, **kwargs)
+
+    def get_lowest_price(self) -> Decimal:
+        """
+        Returns the lowest nightly price of this instance, considering the base price
+        and every :model:`listings.DailyRate`.
+        """
+        lowest_rate = (
+            self.daily_rates.aggregate(lowest_rate=Min("price"))["lowest_rate"]
+            if self.pk
+            else None
+        )
+        return min(self.price, lowest_rate) if lowest_rate is not None else self.price
+
+    @transaction.atomic
+    def rebuild_daily_rates(self):
+        """
+        Recreates the :model:`listings.DailyRate` rows of this instance from its
+        :model:`listings.RateOverride` objects. Weekend overrides take precedence over
+        the other overrides and, among overrides of the same kind, the latest one
+        wins.
+        """
+        prices: Dict[datetime.date, Decimal] = {}
+        for override in self.rate_overrides.order_by("weekends_only", "id"):
+            day = override.start_date
+            while day <= override.end_date:
+                if not override.weekends_only or day.weekday() in RateOverride.WEEKEND:
+                    prices[day] = override.price
+                day += datetime.timedelta(days=1)
+
+        self.daily_rates.all().delete()
+        DailyRate.objects.bulk_create(
+            [
+                DailyRate(booking_info=self, date=day, price=price)
+                for day, price in prices.items()
+            ]
+        )
+
+        self.lowest_price = self.get_lowest_price()
+        BookingInfo.objects.filter(pk=self.pk).update(lowest_price=self.lowest_price)
+
+    def update_allotted_rooms(self):
+        """
+        Sums the rooms of the :model:`listings.Allotment` objects of this instance
+        into `allotted_rooms`.
+        """
+        self.allotted_rooms = (
+            self.allotments.aggregate(rooms=Sum("rooms"))["rooms"] or 0
+        )
+        BookingInfo.objects.filter(pk=self.pk).update(
+            allotted_rooms=self.allotted_rooms
+        )
+
+
+class Allotment(models.Model):
+    """
+    Rooms of a booking info that only `channel` sells. Reservations of the channel
+    take a room of its allotment while one is free, and an open room after that.
+    Lowering an allotment below the reservations already taken from it overstates
+    the open rooms of the other channels until those reservations are over.
+    """
+
+    booking_info = models.ForeignKey(
+        "listings.BookingInfo",
+        related_name="allotments",
+        on_delete=models.CASCADE,
+    )
+    channel = models.CharField(max_length=64)
+    rooms = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = _("Allotment")
+        verbose_name_plural = _("Allotments")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("booking_info", "channel"),
+                name="listings_allotment_unique_channel",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_info} {self.channel}"
+
+
+class BookingReservationQuerySet(models.QuerySet):
+    def overlapping(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> "BookingReservationQuerySet":
+        """
+        Returns the reservations that block any day between `start_date` and
+        `end_date`. Both ends of the range are inclusive.
+        """
+        return self.filter(
+            DateRangeOverlaps("start_date", "end_date", start_date, end_date)
+        )
+
 
 class BookingReservation(models.Model):
     """
@@ -97,8 +500,346 @@ class BookingReservation(models.Model):
     )
     start_date = models.DateField()
     end_date = models.DateField()
+    channel = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text=_("Sales channel of the reservation, empty for direct bookings."),
+    )
+    allotted = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_(
+            "Whether the reservation takes a room of the allotment of its channel "
+            "rather than an open room."
+        ),
+    )
+    exclusive = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_(
+            "Whether the unit can only hold one reservation at a time (apartments). "
+            "On PostgreSQL, overlapping exclusive reservations are rejected by an "
+            "exclusion constraint."
+        ),
+    )
+
+    objects = BookingReservationQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("Booking Reservation")
         verbose_name_plural = _("Booking Reservations")
         ordering = ("end_date", "start_date")
+        indexes = [
+            # Covers the overlap check of `BookingReservationQuerySet.overlapping`,
+            # also when counting the reservations of an allotment
+            models.Index(
+                fields=(
+                    "booking_info",
+                    "start_date",
+                    "end_date",
+                    "allotted",
+                    "channel",
+                ),
+                name="listings_reservation_overlap",
+            ),
+            # Latest reservations first and `start_date` ranges in the admin
+            models.Index(
+                fields=("start_date", "id"),
+                name="listings_reservation_start",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.exclusive = self.booking_info.listing_id is not None
+        super().save(*args, **kwargs)
+
+
+class ReservationHoldQuerySet(BookingReservationQuerySet):
+    def active(self) -> "ReservationHoldQuerySet":
+        """
+        Returns the holds that have not expired yet. Expired holds stop counting
+        against availability right away, before they are swept.
+        """
+        return self.filter(expires_at__gt=timezone.now())
+
+
+class ReservationHold(models.Model):
+    """
+    Holds a unit for a short time between search and payment. Active holds count
+    against availability like reservations, and a hold can be turned into a
+    reservation with its token.
+    """
+
+    booking_info = models.ForeignKey(
+        "listings.BookingInfo",
+        related_name="holds",
+        on_delete=models.CASCADE,
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ReservationHoldQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Reservation Hold")
+        verbose_name_plural = _("Reservation Holds")
+        ordering = ("expires_at",)
+        indexes = [
+            # Active holds of a unit: `expires_at > now` is a range on the index
+            models.Index(
+                fields=("booking_info", "expires_at", "start_date", "end_date"),
+                name="listings_hold_active",
+            ),
+            # Sweeping expired holds
+            models.Index(fields=("expires_at",), name="listings_hold_expiry"),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_info} {self.start_date} - {self.end_date}"
+
+    @property
+    def is_active(self) -> bool:
+        return self.expires_at > timezone.now()
+
+
+class RateOverride(models.Model):
+    """
+    Overrides the nightly price of a booking info for the nights between
+    `start_date` and `end_date` (inclusive), e.g. for a season or for weekends.
+    """
+
+    # Friday and Saturday nights
+    WEEKEND = (4, 5)
+
+    booking_info = models.ForeignKey(
+        "listings.BookingInfo",
+        related_name="rate_overrides",
+        on_delete=models.CASCADE,
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    weekends_only = models.BooleanField(
+        default=False,
+        help_text=_("Only override the price of Friday and Saturday nights."),
+    )
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        verbose_name = _("Rate Override")
+        verbose_name_plural = _("Rate Overrides")
+        ordering = ("start_date", "end_date")
+
+    def __str__(self):
+        return f"{self.booking_info} {self.start_date} - {self.end_date}"
+
+
+class StayRestriction(models.Model):
+    """
+    Stay restrictions of a booking info on `date`, set by revenue management. The
+    minimum and maximum stay and closed to arrival apply to stays checking in on
+    the date, and closed to departure to stays checking out on it.
+    """
+
+    booking_info = models.ForeignKey(
+        "listings.BookingInfo",
+        related_name="stay_restrictions",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    min_stay = models.PositiveSmallIntegerField(
+        default=1, help_text=_("Fewest nights of a stay checking in on the date.")
+    )
+    max_stay = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        help_text=_("Most nights of a stay checking in on the date, if limited."),
+    )
+    closed_to_arrival = models.BooleanField(default=False)
+    closed_to_departure = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = _("Stay Restriction")
+        verbose_name_plural = _("Stay Restrictions")
+        ordering = ("date",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=("booking_info", "date"),
+                name="listings_restriction_unique_date",
+            ),
+        ]
+        indexes = [
+            # Covers the restriction check of `BookingInfoQuerySet.allowing_stay`
+            models.Index(
+                fields=(
+                    "booking_info",
+                    "date",
+                    "min_stay",
+                    "max_stay",
+                    "closed_to_arrival",
+                    "closed_to_departure",
+                ),
+                name="listings_restriction_covering",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_info} {self.date}"
+
+
+class DailyRate(models.Model):
+    """
+    Stores the effective nightly price of a booking info for each night that has a
+    :model:`listings.RateOverride`. Rows are rebuilt from the overrides and should
+    not be edited directly.
+    """
+
+    booking_info = models.ForeignKey(
+        "listings.BookingInfo",
+        related_name="daily_rates",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField()
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        verbose_name = _("Daily Rate")
+        verbose_name_plural = _("Daily Rates")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("booking_info", "date"),
+                name="listings_dailyrate_unique_date",
+            ),
+        ]
+        indexes = [
+            # Covers the stay price subquery of `BookingInfoQuerySet.with_total_price`
+            models.Index(
+                fields=("booking_info", "date", "price"),
+                name="listings_dailyrate_covering",
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    Deferred work run by the `run_jobs` worker, e.g. after a reservation is created.
+    See `listings.jobs`.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_(
+            "Pending jobs with the same name and key are coalesced and run once."
+        ),
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Job")
+        verbose_name_plural = _("Jobs")
+        ordering = ("run_after", "id")
+        indexes = [
+            # Claiming the next due jobs
+            models.Index(
+                fields=("status", "run_after", "id"),
+                name="listings_job_due",
+            ),
+            models.Index(fields=("claimed_by",), name="listings_job_claimed_by"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.key}".strip()
+
+
+class AvailabilityChange(models.Model):
+    """
+    A change of the availability or prices of a booking info, recorded in the
+    transaction of the change. The primary key is the sequence number of the change
+    feed. See `listings.changes`.
+    """
+
+    AVAILABILITY = "availability"
+    PRICE = "price"
+    KIND_CHOICES = (
+        (AVAILABILITY, "Availability"),
+        (PRICE, "Price"),
+    )
+
+    # Intentionally not a foreign key: changes outlive the booking info they are
+    # about, so that consumers also learn about deleted units. Big like the primary
+    # key of `BookingInfo`.
+    booking_info_id = models.PositiveBigIntegerField()
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    start_date = models.DateField(
+        blank=True,
+        null=True,
+        help_text=_("First changed day, or empty when every day may have changed."),
+    )
+    end_date = models.DateField(
+        blank=True,
+        null=True,
+        help_text=_("Last changed day, or empty when every day may have changed."),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Availability Change")
+        verbose_name_plural = _("Availability Changes")
+        ordering = ("id",)
+        indexes = [
+            # Pruning old changes
+            models.Index(fields=("created_at",), name="listings_change_created"),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.kind} {self.booking_info_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response of a request made with an `Idempotency-Key` header, replayed to
+    retries of the request until `expires_at`. See `listings.idempotency`.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text=_("SHA-256 of the method, path and data of the request."),
+    )
+    # Empty until the request completes, which is in the transaction that inserts
+    # the key, so other requests never see a key without its response.
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response = models.JSONField(encoder=DjangoJSONEncoder, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = _("Idempotency Key")
+        verbose_name_plural = _("Idempotency Keys")
+        indexes = [
+            # Pruning expired keys
+            models.Index(fields=("expires_at",), name="listings_idempotency_expiry"),
+        ]
+
+    def __str__(self):
+        return self.key
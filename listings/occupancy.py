@@ -0,0 +1,236 @@
+"""
+Daily occupancy of every unit, for offline analytics.
+
+`compute_occupancy` reads the units and the reservations of a date range with one
+query each and counts the reservations covering every (booking info, day) with a
+vectorized sweep: each reservation adds 1 on its first day and -1 after its last
+day, and a cumulative sum along the days turns these steps into daily counts. The
+cost is one pass over the reservations plus one over the (units x days) matrix,
+however long the stays are.
+
+`write_occupancy_parquet` stores the result as a Parquet file with one row per
+unit and day, which analysts can load with pyarrow or pandas without touching the
+database.
+"""
+
+import datetime
+import os
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import BookingInfo, BookingReservation, Listing
+
+# Number of reservations read from the database cursor at once
+RESERVATION_CHUNK_SIZE = 10000
+
+
+def compute_occupancy(
+    start_date: datetime.date, days: int, using: str = DEFAULT_DB_ALIAS
+) -> Dict[str, numpy.ndarray]:
+    """
+    Returns the occupancy of every booking info over the `days` days from
+    `start_date`, read from the `using` database (e.g. a replica), as arrays:
+
+    - `booking_info_id`, `country`, `city`, `listing_type`, `room_type` and
+      `total_rooms`: one entry per booking info, in id order
+    - `dates`: the `days` days
+    - `booked`: the number of reservations covering each (booking info, day)
+
+    Reservations block every day from their start to their end date, like
+    `BookingReservationQuerySet.overlapping` counts them. Holds are not counted.
+    """
+    end_date = start_date + datetime.timedelta(days=days - 1)
+    units = list(
+        BookingInfo.objects.using(using)
+        .with_total_rooms()
+        .annotate(
+            unit_country=Coalesce(
+                "listing__country", "hotel_room_type__hotel__country"
+            ),
+            unit_city=Coalesce("listing__city", "hotel_room_type__hotel__city"),
+            unit_listing_type=Case(
+                When(listing__isnull=False, then=Value(Listing.APARTMENT)),
+                default=Value(Listing.HOTEL),
+                output_field=CharField(),
+            ),
+            unit_room_type=F("hotel_room_type__title"),
+        )
+        .order_by("id")
+        .values_list(
+            "id",
+            "unit_country",
+            "unit_city",
+            "unit_listing_type",
+            "unit_room_type",
+            "total_rooms",
+        )
+    )
+    ids, countries, cities, listing_types, room_types, total_rooms = (
+        list(zip(*units)) or [()] * 6
+    )
+    booking_info_ids = numpy.array(ids, dtype=numpy.int64)
+    reservations = (
+        BookingReservation.objects.using(using)
+        .overlapping(start_date, end_date)
+        .order_by()
+        .values_list("booking_info_id", "start_date", "end_date")
+        .iterator(chunk_size=RESERVATION_CHUNK_SIZE)
+    )
+
+    return {
+        "booking_info_id": booking_info_ids,
+        "country": numpy.array(countries, dtype=object),
+        "city": numpy.array(cities, dtype=object),
+        "listing_type": numpy.array(listing_types, dtype=object),
+        "room_type": numpy.array(room_types, dtype=object),
+        "total_rooms": numpy.array(total_rooms, dtype=numpy.int32),
+        "dates": numpy.arange(
+            numpy.datetime64(start_date, "D"), numpy.datetime64(end_date, "D") + 1
+        ),
+        "booked": count_booked(booking_info_ids, reservations, start_date, days),
+    }
+
+
+def count_booked(
+    booking_info_ids: numpy.ndarray,
+    reservations: Iterable,
+    start_date: datetime.date,
+    days: int,
+) -> numpy.ndarray:
+    """
+    Returns the (booking info, day) matrix of the number of `reservations`
+    (booking info id, start date, end date) covering each of the `days` days from
+    `start_date`. `booking_info_ids` must be sorted.
+    """
+    started, ended = count_started_and_ended(
+        booking_info_ids, reservations, start_date, days
+    )
+    return started - ended
+
+
+def count_started_and_ended(
+    booking_info_ids: numpy.ndarray,
+    reservations: Iterable,
+    start_date: datetime.date,
+    days: int,
+) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Returns two (booking info, day) matrices for the `days` days from `start_date`:
+    the number of `reservations` (booking info id, start date, end date) starting on
+    or before each day, and the number ending before it. Reservations starting
+    before `start_date` count as starting on it. `booking_info_ids` must be sorted.
+    """
+    origin: int = start_date.toordinal()
+    firsts, afters = [], []
+    chunk = []
+    for reservation in reservations:
+        chunk.append(reservation)
+        if len(chunk) == RESERVATION_CHUNK_SIZE:
+            add_steps(firsts, afters, booking_info_ids, chunk, origin, days)
+            chunk = []
+    add_steps(firsts, afters, booking_info_ids, chunk, origin, days)
+
+    # Steps of the flattened (booking info, day + 1) matrices. The extra column
+    # collects the steps after the last day and is dropped.
+    shape = (len(booking_info_ids), days + 1)
+    return tuple(
+        numpy.cumsum(
+            numpy.bincount(
+                numpy.concatenate(positions or [numpy.empty(0, dtype=numpy.int64)]),
+                minlength=shape[0] * shape[1],
+            ).reshape(shape),
+            axis=1,
+            dtype=numpy.int32,
+        )[:, :days]
+        for positions in (firsts, afters)
+    )
+
+
+def add_steps(
+    firsts: List[numpy.ndarray],
+    afters: List[numpy.ndarray],
+    booking_info_ids: numpy.ndarray,
+    reservations: list,
+    origin: int,
+    days: int,
+):
+    """
+    Appends the positions of the first day and of the day after the last day of
+    each reservation in the flattened (booking info, day + 1) matrix. Days outside
+    the range are clipped to its ends. Reservations of booking infos that are not
+    in `booking_info_ids`, e.g. units created after they were read, are skipped.
+    """
+    if not reservations:
+        return
+
+    ids, starts, ends = zip(*reservations)
+    reservation_ids = numpy.array(ids, dtype=numpy.int64)
+    rows = numpy.searchsorted(booking_info_ids, reservation_ids)
+    known = rows < len(booking_info_ids)
+    known[known] = booking_info_ids[rows[known]] == reservation_ids[known]
+    if not known.all():
+        rows = rows[known]
+        starts = [start for start, keep in zip(starts, known) if keep]
+        ends = [end for end, keep in zip(ends, known) if keep]
+    # Ordinals convert much faster than date objects to `datetime64` arrays
+    first_days = get_ordinals(starts) - origin
+    after_days = get_ordinals(ends) - origin + 1
+    firsts.append(rows * (days + 1) + numpy.clip(first_days, 0, days))
+    afters.append(rows * (days + 1) + numpy.clip(after_days, 0, days))
+
+
+def get_ordinals(dates: Sequence[datetime.date]) -> numpy.ndarray:
+    """
+    Returns the proleptic Gregorian ordinals of `dates`.
+    """
+    return numpy.fromiter(
+        map(datetime.date.toordinal, dates), dtype=numpy.int64, count=len(dates)
+    )
+
+
+def write_occupancy_parquet(
+    path: str, occupancy: Dict[str, numpy.ndarray], metadata: Dict[str, str] = None
+) -> int:
+    """
+    Writes the `compute_occupancy` result to a Parquet file, one row per day and
+    booking info, sorted by day so readers can skip row groups by date. The text
+    columns are dictionary encoded. The file is replaced atomically. Returns the
+    number of rows. Requires the optional `pyarrow` package.
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    units = len(occupancy["booking_info_id"])
+    days = len(occupancy["dates"])
+    # Row of the unit of every (day, unit) row
+    unit_index = pyarrow.array(numpy.tile(numpy.arange(units, dtype=numpy.int32), days))
+
+    def unit_column(name: str, type: pyarrow.DataType = None) -> pyarrow.Array:
+        values = pyarrow.array(occupancy[name], type=type)
+        if type is None:
+            # Text columns store every distinct value once
+            values = values.dictionary_encode()
+        return values.take(unit_index)
+
+    table = pyarrow.table(
+        {
+            "date": pyarrow.array(numpy.repeat(occupancy["dates"], units)),
+            "booking_info_id": unit_column("booking_info_id", pyarrow.int64()),
+            "country": unit_column("country"),
+            "city": unit_column("city"),
+            "listing_type": unit_column("listing_type"),
+            "room_type": unit_column("room_type"),
+            "total_rooms": unit_column("total_rooms", pyarrow.int32()),
+            "booked": pyarrow.array(occupancy["booked"].T.ravel()),
+        }
+    )
+    if metadata:
+        table = table.replace_schema_metadata(metadata)
+
+    pyarrow.parquet.write_table(table, f"{path}.tmp", compression="zstd")
+    os.replace(f"{path}.tmp", path)
+    return table.num_rows
@@ -0,0 +1,59 @@
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class UnitCursorPagination(CursorPagination):
+    """
+    Opt-in cursor pagination for the `units` endpoints. Lists are only paginated when
+    the `page_size` query parameter is given.
+
+    Pages are read in price order with `LIMIT page_size + 1`, so the query stops as
+    soon as a page of available units is found. Unlike offset pagination, no
+    `COUNT(*)` of the whole result is needed.
+
+    Lists without `page_size` are read with `LIMIT MAX_SEARCH_RESULTS + 1` too, and
+    searches matching more units than that are rejected rather than returned whole.
+    """
+
+    page_size = None
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("price", "id")
+
+    def get_ordering(self, request, queryset, view) -> Tuple[str, ...]:
+        """
+        Searches with a check in / check out range are sorted by the total price of
+        the stay instead of the nightly price.
+        """
+        if "total_price" in queryset.query.annotations:
+            return ("total_price", "id")
+
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List]:
+        self.unpaginated = self.get_page_size(request) is None
+        if not self.unpaginated:
+            return super().paginate_queryset(queryset, request, view)
+
+        units = list(queryset[: settings.MAX_SEARCH_RESULTS + 1])
+        if len(units) > settings.MAX_SEARCH_RESULTS:
+            raise serializers.ValidationError(
+                _(
+                    "The search matches more than %(max)s units, please narrow it "
+                    "down or use page_size."
+                )
+                % {"max": settings.MAX_SEARCH_RESULTS}
+            )
+
+        return units
+
+    def get_paginated_response(self, data) -> Response:
+        if self.unpaginated:
+            return Response(data)
+
+        return super().get_paginated_response(data)
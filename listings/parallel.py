@@ -0,0 +1,221 @@
+"""
+Sharded evaluation of wide flexible searches in a process pool.
+
+A flexible search over the whole catalogue and a long window is CPU bound once the
+rows leave the database: the check in dates of every unit are computed in Python
+(`find_flexible_check_ins`) and the units are then serialized. With
+`SEARCH_WORKERS` > 1, a search whose matching units span at least
+`SEARCH_SHARD_MIN_UNITS` ids is split into one id range per worker. Each worker
+process runs the search query restricted to its range, computes the check in dates
+and serializes its units in the order of the search. The sorted shards are merged
+with `heapq.merge`, so the response is the same as evaluating the search in the
+request.
+
+The search query is sent to the workers pickled (`QuerySet.query`), so the shards
+run exactly the filters of the request. Workers are started with `spawn` and set up
+Django themselves. This module is imported before that happens, so the models are
+imported in the functions.
+"""
+
+import datetime
+import heapq
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.db.models import Max, Min, QuerySet
+
+logger = logging.getLogger(__name__)
+
+# A serialized unit and the values of the search ordering it is sorted by
+Row = Tuple[tuple, Dict]
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def setup_worker(settings_module: str, database_names: Dict[str, str]):
+    """
+    Sets up Django in a worker process, connected to the same databases as the
+    process that started it (e.g. the test databases).
+    """
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+
+    import django
+
+    django.setup()
+    for alias, name in database_names.items():
+        connections[alias].settings_dict["NAME"] = name
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Returns the process pool of this process, started on first use.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.SEARCH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_worker,
+            initargs=(
+                os.environ.get("DJANGO_SETTINGS_MODULE", "booking_engine.settings"),
+                {
+                    alias: connections[alias].settings_dict["NAME"]
+                    for alias in connections
+                },
+            ),
+        )
+    return _executor
+
+
+def can_merge(ordering: Tuple) -> bool:
+    """
+    Returns whether shards sorted by `ordering` can be merged on the attributes of
+    their units, i.e. unless the ordering is empty, descending, related or an
+    expression.
+    """
+    return bool(ordering) and all(
+        isinstance(field, str) and not field.startswith("-") and "__" not in field
+        for field in ordering
+    )
+
+
+def validate_result_count(count: int):
+    """
+    Raises ValidationError for flexible searches matching more than
+    `MAX_SEARCH_RESULTS` units, before they are serialized.
+    """
+    from django.utils.translation import gettext as _
+    from rest_framework import serializers
+
+    if count > settings.MAX_SEARCH_RESULTS:
+        raise serializers.ValidationError(
+            _("The search matches more than %(max)s units, please narrow it down.")
+            % {"max": settings.MAX_SEARCH_RESULTS}
+        )
+
+
+def evaluate_flexible(
+    queryset: QuerySet,
+    nights: int,
+    window_start: datetime.date,
+    window_end: datetime.date,
+    context: Optional[Dict] = None,
+) -> List[Row]:
+    """
+    Returns the units of the queryset available for `nights` nights with a check in
+    date in the window, serialized along with their check in dates and sorted like
+    the queryset.
+    """
+    from .availability import find_flexible_check_ins
+    from .expressions import InIntegers
+    from .serializers import FlexibleBookingInfoSerializer
+
+    check_ins = find_flexible_check_ins(queryset, nights, window_start, window_end)
+    validate_result_count(len(check_ins))
+
+    units = []
+    for unit in queryset.filter(InIntegers("id", check_ins)):
+        unit.check_in_dates = check_ins[unit.id]
+        units.append(unit)
+
+    data = FlexibleBookingInfoSerializer(units, many=True, context=context or {}).data
+    ordering = queryset.query.order_by
+    return [
+        (tuple(getattr(unit, field) for field in ordering), item)
+        for unit, item in zip(units, data)
+    ]
+
+
+def evaluate_shard(
+    query: bytes,
+    first_id: int,
+    last_id: int,
+    nights: int,
+    window_start: datetime.date,
+    window_end: datetime.date,
+) -> List[Row]:
+    """
+    Evaluates the pickled search `query` for the units from `first_id` to `last_id`
+    in a worker process, with the statement timeout of the searches.
+    """
+    from .models import BookingInfo
+    from .timeouts import QueryTimeout, is_query_timeout, query_timeout
+
+    queryset = BookingInfo.objects.all()
+    queryset.query = pickle.loads(query)
+    try:
+        with query_timeout(settings.SEARCH_QUERY_TIMEOUT):
+            return evaluate_flexible(
+                queryset.filter(id__gte=first_id, id__lte=last_id),
+                nights,
+                window_start,
+                window_end,
+            )
+    except OperationalError as error:
+        # The cause that tells timeouts apart does not survive pickling
+        if is_query_timeout(error):
+            raise QueryTimeout()
+        raise
+
+
+def search_flexible(
+    queryset: QuerySet,
+    nights: int,
+    window_start: datetime.date,
+    window_end: datetime.date,
+    context: Optional[Dict] = None,
+) -> List[Dict]:
+    """
+    Returns the serialized results of a flexible search, evaluated in shards by the
+    process pool when the search is wide enough, or in the request otherwise.
+    Searches matching more than `MAX_SEARCH_RESULTS` units are rejected.
+    """
+    global _executor
+
+    workers: int = settings.SEARCH_WORKERS
+    if workers > 1 and can_merge(queryset.query.order_by):
+        bounds = queryset.order_by().aggregate(first_id=Min("id"), last_id=Max("id"))
+        first_id, last_id = bounds["first_id"], bounds["last_id"]
+        if (
+            first_id is not None
+            and last_id - first_id + 1 >= settings.SEARCH_SHARD_MIN_UNITS
+        ):
+            query = pickle.dumps(queryset.query)
+            size = -(-(last_id - first_id + 1) // workers)
+            try:
+                futures = [
+                    get_executor().submit(
+                        evaluate_shard,
+                        query,
+                        shard_id,
+                        min(shard_id + size - 1, last_id),
+                        nights,
+                        window_start,
+                        window_end,
+                    )
+                    for shard_id in range(first_id, last_id + 1, size)
+                ]
+                shards = [future.result() for future in futures]
+            except BrokenProcessPool:
+                # A worker died. Start a new pool for the next search.
+                logger.exception("Search worker pool is broken")
+                _executor = None
+            else:
+                # Each shard is within the limit, their sum may not be
+                validate_result_count(sum(len(shard) for shard in shards))
+                return [item for _, item in heapq.merge(*shards, key=itemgetter(0))]
+
+    return [
+        item
+        for _, item in evaluate_flexible(
+            queryset, nights, window_start, window_end, context
+        )
+    ]
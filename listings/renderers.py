@@ -0,0 +1,107 @@
+import importlib.util
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from rest_framework.renderers import BaseRenderer
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pyarrow
+
+
+def is_installed(package: str) -> bool:
+    """
+    Returns whether an optional package is installed, without importing it. The
+    renderers import their package on first use, so workers do not pay for pyarrow
+    (and numpy) on boot.
+    """
+    return importlib.util.find_spec(package) is not None
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the response data as MessagePack. Requires the optional `msgpack`
+    package.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+
+        import msgpack
+
+        return msgpack.packb(data, use_bin_type=True, default=str)
+
+
+class ArrowIPCRenderer(BaseRenderer):
+    """
+    Renders the response data as a columnar Apache Arrow IPC stream. Each object in
+    the response becomes a row and each field becomes a column, so clients can load
+    the result straight into a dataframe. Requires the optional `pyarrow` package.
+    """
+
+    media_type = "application/vnd.apache.arrow.stream"
+    format = "arrow"
+    charset = None
+    render_style = "binary"
+    compression = "lz4"
+
+    def get_write_options(self) -> "pyarrow.ipc.IpcWriteOptions":
+        """
+        Returns the IPC write options. Record batches are compressed whenever the
+        installed pyarrow build supports the codec.
+        """
+        import pyarrow
+
+        compression = (
+            self.compression
+            if self.compression and pyarrow.Codec.is_available(self.compression)
+            else None
+        )
+        return pyarrow.ipc.IpcWriteOptions(compression=compression)
+
+    def get_rows(self, data: Any) -> List[Dict]:
+        """
+        Returns the response data as a list of rows. Single objects and error
+        payloads are rendered as a table with a single row.
+        """
+        if isinstance(data, Mapping):
+            return [data]
+
+        if isinstance(data, list) and all(isinstance(row, Mapping) for row in data):
+            return data
+
+        return [{"detail": data}]
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+
+        import pyarrow
+
+        table = pyarrow.Table.from_pylist(self.get_rows(data))
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(
+            sink, table.schema, options=self.get_write_options()
+        ) as writer:
+            writer.write_table(table)
+
+        return sink.getvalue().to_pybytes()
+
+
+def get_optional_renderer_classes() -> List[type]:
+    """
+    Returns the compact renderer classes whose dependencies are installed.
+    """
+    renderer_classes = []
+    if is_installed("msgpack"):
+        renderer_classes.append(MessagePackRenderer)
+
+    if is_installed("pyarrow"):
+        renderer_classes.append(ArrowIPCRenderer)
+
+    return renderer_classes
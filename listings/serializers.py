@@ -1,12 +1,26 @@
-from typing import Dict, List, Union
+import datetime
+from typing import Dict, Iterable, List, Optional, Set
 
-from django.db.models import Q, QuerySet
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField, Case, Value, When
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from . import models
+from . import changes, jobs, models
+from .availability import check_availability
 from .mixins import RepresentationMixin
 
+FULLY_BOOKED_MESSAGE = _(
+    "Rooms are fully booked for the specified date range. Please try a different "
+    "date range."
+)
+RESTRICTED_MESSAGE = _(
+    "The stay does not meet the stay restrictions of the unit for the specified date "
+    "range."
+)
+
 
 class ListingSerializer(serializers.ModelSerializer):
     """
@@ -21,6 +35,8 @@ class ListingSerializer(serializers.ModelSerializer):
             "title",
             "country",
             "city",
+            "latitude",
+            "longitude",
         )
         read_only_fields = ("id",)
 
@@ -55,6 +71,13 @@ class BookingInfoSerializer(RepresentationMixin, serializers.ModelSerializer):
     listing_type = serializers.SerializerMethodField()
     country = serializers.SerializerMethodField()
     city = serializers.SerializerMethodField()
+    # Only present when searching with a check in / check out range.
+    total_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+    # Only present when searching for several rooms: the number of rooms of this
+    # hotel room type in the cheapest combination of its hotel.
+    rooms = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.BookingInfo
@@ -67,6 +90,9 @@ class BookingInfoSerializer(RepresentationMixin, serializers.ModelSerializer):
             "city",
             "hotel_room_type",
             "price",
+            "total_price",
+            "max_occupancy",
+            "rooms",
         )
         read_only_fields = ("id",)
         nested_serializers = [
@@ -109,11 +135,181 @@ class BookingInfoSerializer(RepresentationMixin, serializers.ModelSerializer):
         return obj.listing.city if obj.listing else obj.hotel_room_type.hotel.city
 
 
+def validate_stay_nights(nights: int):
+    """
+    Raises ValidationError for searches of stays longer than `MAX_STAY_NIGHTS`
+    nights, which would have to count and price too many nights of every unit.
+    """
+    if nights > settings.MAX_STAY_NIGHTS:
+        raise serializers.ValidationError(
+            _("Stays can not be longer than %(max)s nights.")
+            % {"max": settings.MAX_STAY_NIGHTS}
+        )
+
+
+class FlexibleSearchSerializer(serializers.Serializer):
+    """
+    Serializer class for the query parameters of the flexible date search.
+    """
+
+    nights = serializers.IntegerField(min_value=1)
+    window_start = serializers.DateField()
+    window_end = serializers.DateField()
+
+    def validate(self, data: Dict) -> Dict:
+        """
+        Custom validation to check for valid window_start and window_end values.
+        """
+        if data.get("window_start") > data.get("window_end"):
+            raise serializers.ValidationError(
+                _("window_start must not be later than window_end.")
+            )
+        if (
+            data.get("window_end") - data.get("window_start")
+        ).days >= settings.MAX_SEARCH_WINDOW_DAYS:
+            raise serializers.ValidationError(
+                _("The window can not be longer than %(max)s days.")
+                % {"max": settings.MAX_SEARCH_WINDOW_DAYS}
+            )
+
+        validate_stay_nights(data.get("nights"))
+
+        return data
+
+
+class FacetSearchSerializer(serializers.Serializer):
+    """
+    Serializer class for the query parameters of the search facets.
+    """
+
+    price_bucket = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=1, default=50
+    )
+
+
+class AvailabilityCheckSerializer(serializers.Serializer):
+    """
+    Serializer class for a single (booking info, date range) pair of a batch
+    availability check.
+    """
+
+    booking_info = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+    available_rooms = serializers.IntegerField(read_only=True, allow_null=True)
+    available = serializers.SerializerMethodField()
+
+    def validate(self, data: Dict) -> Dict:
+        """
+        Custom validation to check for valid check_in and check_out values.
+        """
+        if data.get("check_in") > data.get("check_out"):
+            raise serializers.ValidationError(
+                _("Check in date must not be later than check out date.")
+            )
+
+        validate_stay_nights(
+            models.get_stay_nights(data.get("check_in"), data.get("check_out"))
+        )
+        return data
+
+    def get_available(self, obj: Dict) -> bool:
+        """
+        Returns whether a room is available. Unknown booking info is not available.
+        """
+        return bool(obj["available_rooms"] and obj["available_rooms"] > 0)
+
+
+class BatchAvailabilitySerializer(serializers.Serializer):
+    """
+    Serializer class for the body of the batch availability check.
+    """
+
+    MAX_CHECKS = 10000
+
+    checks = serializers.ListField(
+        child=AvailabilityCheckSerializer(),
+        allow_empty=False,
+        max_length=MAX_CHECKS,
+    )
+
+
+class FlexibleBookingInfoSerializer(BookingInfoSerializer):
+    """
+    Serializer class for :model:`listings.BookingInfo` in flexible date searches.
+    Includes the check in dates where the requested stay is available.
+    """
+
+    check_in_dates = serializers.ListField(
+        child=serializers.DateField(), read_only=True
+    )
+
+    class Meta(BookingInfoSerializer.Meta):
+        fields = BookingInfoSerializer.Meta.fields + ("check_in_dates",)
+
+
+def validate_availability(data: Dict, exclude_hold: Optional[int] = None) -> bool:
+    """
+    Checks that `start_date` is not later than `end_date` and that the booking info
+    has a room available in that range for the `channel` of the data, counting
+    reservations and active holds, and that its stay restrictions allow the stay.
+    Returns whether a room of the allotment of the channel is free, which the
+    reservation then takes.
+    """
+    # start date must not be later than end date
+    if data.get("start_date") > data.get("end_date"):
+        raise serializers.ValidationError(
+            _("start_date must not be later than end_date.")
+        )
+
+    # Check room availability
+    booking_info: models.BookingInfo = data.get("booking_info")
+    available_rooms, allotment_rooms, restricted = (
+        models.BookingInfo.objects.with_availability(
+            data.get("start_date"),
+            data.get("end_date"),
+            exclude_hold=exclude_hold,
+            channel=data.get("channel"),
+        )
+        .with_restrictions(data.get("start_date"), data.get("end_date"))
+        .values_list("available_rooms", "allotment_rooms", "restricted")
+        .get(pk=booking_info.pk)
+    )
+
+    if restricted:
+        raise serializers.ValidationError(RESTRICTED_MESSAGE)
+
+    if available_rooms <= 0:
+        raise serializers.ValidationError(FULLY_BOOKED_MESSAGE)
+
+    return allotment_rooms > 0
+
+
+def lock_booking_info(booking_info: models.BookingInfo):
+    """
+    Locks the booking info row until the end of the transaction, serializing the
+    reservations and holds of the unit. A no-op on SQLite, where writes are
+    serialized by the database lock.
+    """
+    models.BookingInfo.objects.select_for_update().values_list("pk").get(
+        pk=booking_info.pk
+    )
+
+
 class BookingReservationSerializer(RepresentationMixin, serializers.ModelSerializer):
     """
     Serializer class for :model:`listings.BookingReservation`
     """
 
+    # Token of a :model:`listings.ReservationHold` covering the reservation, which is
+    # released when the reservation is created.
+    hold = serializers.SlugRelatedField(
+        slug_field="token",
+        queryset=models.ReservationHold.objects.all(),
+        required=False,
+        write_only=True,
+    )
+
     class Meta:
         model = models.BookingReservation
         fields = (
@@ -121,6 +317,8 @@ class BookingReservationSerializer(RepresentationMixin, serializers.ModelSeriali
             "booking_info",
             "start_date",
             "end_date",
+            "channel",
+            "hold",
         )
         read_only_fields = ("id",)
 
@@ -129,48 +327,334 @@ class BookingReservationSerializer(RepresentationMixin, serializers.ModelSeriali
         Custom validation to check for valid start_date and end_date values along with
         room availability.
         """
-        # start date must not be later than end date
-        if data.get("start_date") > data.get("end_date"):
+        hold: Optional[models.ReservationHold] = data.get("hold")
+        if hold is not None and not (
+            hold.is_active
+            and hold.booking_info_id == data.get("booking_info").pk
+            and hold.start_date <= data.get("start_date")
+            and data.get("end_date") <= hold.end_date
+        ):
             raise serializers.ValidationError(
-                _("start_date must not be later than end_date.")
+                {"hold": _("The hold has expired or does not cover this reservation.")}
             )
 
-        # Check room availability
-        booking_info: models.BookingInfo = data.get("booking_info")
-        overlapping_reservations: Union[
-            QuerySet, List[models.BookingReservation]
-        ] = booking_info.reservations.filter(
-            Q(
-                start_date__lte=data.get("start_date"),
-                end_date__gte=data.get("start_date"),
-            )
-            | Q(
-                start_date__lte=data.get("end_date"),
-                end_date__gte=data.get("end_date"),
+        validate_availability(data, exclude_hold=hold.pk if hold else None)
+        return data
+
+    def create(self, validated_data: Dict) -> models.BookingReservation:
+        """
+        Creates the reservation and releases its hold. The booking info row is locked
+        and its availability checked again, so concurrent requests cannot take the
+        same room. The database (the exclusion constraint on PostgreSQL) also rejects
+        overlapping reservations of the same apartment. The reservation takes a room
+        of the allotment of its channel while one is free.
+        """
+        hold: Optional[models.ReservationHold] = validated_data.pop("hold", None)
+        try:
+            with transaction.atomic():
+                lock_booking_info(validated_data["booking_info"])
+                validated_data["allotted"] = validate_availability(
+                    validated_data, exclude_hold=hold.pk if hold else None
+                )
+                reservation = super().create(validated_data)
+                if hold is not None:
+                    hold.delete()
+                return reservation
+        except IntegrityError:
+            raise serializers.ValidationError(FULLY_BOOKED_MESSAGE)
+
+
+class ReservationHoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer class for :model:`listings.ReservationHold`
+    """
+
+    class Meta:
+        model = models.ReservationHold
+        fields = (
+            "token",
+            "booking_info",
+            "start_date",
+            "end_date",
+            "expires_at",
+        )
+        read_only_fields = ("token", "expires_at")
+
+    def validate(self, data: Dict) -> Dict:
+        """
+        Custom validation to check for valid start_date and end_date values along with
+        room availability.
+        """
+        validate_availability(data)
+        return data
+
+    def create(self, validated_data: Dict) -> models.ReservationHold:
+        """
+        Creates the hold for `RESERVATION_HOLD_TTL` seconds. The booking info row is
+        locked and its availability checked again, so concurrent checkouts of the
+        last room cannot both get a hold (on databases with row locks).
+        """
+        with transaction.atomic():
+            lock_booking_info(validated_data["booking_info"])
+            validate_availability(validated_data)
+            return super().create(
+                {
+                    **validated_data,
+                    "expires_at": timezone.now()
+                    + datetime.timedelta(seconds=settings.RESERVATION_HOLD_TTL),
+                }
             )
-            | Q(
-                start_date__gte=data.get("start_date"),
-                end_date__lte=data.get("end_date"),
+
+
+class CartItemSerializer(serializers.Serializer):
+    """
+    Serializer class for a single reservation of a cart.
+    """
+
+    booking_info = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    # Carts only book open rooms, the allotments of channels are not counted
+    channel = serializers.CharField(
+        max_length=64, required=False, allow_blank=True, write_only=True
+    )
+
+    def validate_channel(self, value: str) -> str:
+        """
+        Rejects sales channels, whose allotted rooms are booked one reservation at a
+        time.
+        """
+        if value:
+            raise serializers.ValidationError(
+                _(
+                    "Carts only book open rooms. Reserve the rooms allotted to a "
+                    "channel one by one with its channel."
+                )
             )
-            | Q(
-                start_date__lte=data.get("start_date"),
-                end_date__gte=data.get("end_date"),
+        return value
+
+    def validate(self, data: Dict) -> Dict:
+        """
+        Custom validation to check for valid start_date and end_date values.
+        """
+        if data.get("start_date") > data.get("end_date"):
+            raise serializers.ValidationError(
+                _("start_date must not be later than end_date.")
             )
-        ).distinct()
 
-        total_rooms: int = (
-            1
-            if booking_info.listing
-            else booking_info.hotel_room_type.hotel_rooms.count()
+        validate_stay_nights(
+            models.get_stay_nights(data.get("start_date"), data.get("end_date"))
         )
-        available_rooms: int = total_rooms - overlapping_reservations.count()
+        return data
 
-        if available_rooms <= 0:
-            raise serializers.ValidationError(
-                _(
-                    "Rooms are fully booked for the specified date range. Please try a "
-                    "different date range."
+
+def count_peak_items(items: List[Dict], item: Dict) -> int:
+    """
+    Returns the most items of the cart on the unit of `item` on any single day of
+    its date range, `item` included. Sweeps the start and end dates of the
+    overlapping items, so items that overlap `item` but not each other only count
+    once.
+    """
+    events = []
+    for other in items:
+        if (
+            other["booking_info"] == item["booking_info"]
+            and other["start_date"] <= item["end_date"]
+            and other["end_date"] >= item["start_date"]
+        ):
+            events.append((max(other["start_date"], item["start_date"]), 1))
+            # End dates are inclusive, the item stops counting the next day.
+            events.append(
+                (
+                    min(other["end_date"], item["end_date"])
+                    + datetime.timedelta(days=1),
+                    -1,
                 )
             )
 
+    peak = count = 0
+    # Items ending on a day are removed before the ones starting on it are added.
+    for day, delta in sorted(events):
+        count += delta
+        peak = max(peak, count)
+    return peak
+
+
+def get_restricted_items(items: List[Dict]) -> Set[int]:
+    """
+    Returns the indexes of the items of a cart whose stay the restrictions of their
+    unit reject, with a single query over the units of the cart. Each stay is only
+    checked against the restrictions of its own unit.
+    """
+    stays = sorted(
+        {(item["booking_info"], item["start_date"], item["end_date"]) for item in items}
+    )
+    names = {stay: f"restricted_{index}" for index, stay in enumerate(stays)}
+    rows = (
+        models.BookingInfo.objects.filter(pk__in={stay[0] for stay in stays})
+        .annotate(
+            **{
+                name: Case(
+                    When(pk=stay[0], then=models.get_stay_restricted(*stay[1:])),
+                    default=Value(False),
+                    output_field=BooleanField(),
+                )
+                for stay, name in names.items()
+            }
+        )
+        .values(*names.values())
+    )
+    restricted = {stay for row in rows for stay, name in names.items() if row[name]}
+
+    return {
+        index
+        for index, item in enumerate(items)
+        if (item["booking_info"], item["start_date"], item["end_date"]) in restricted
+    }
+
+
+def validate_cart_availability(items: List[Dict]):
+    """
+    Checks that every item of a cart has a room available, counting the other items
+    of the cart on the same unit on the busiest day of the item, and that the stay
+    restrictions of its unit allow its stay. The availability of all the items is
+    counted with a single set based query, and their restrictions with another.
+    """
+    available_rooms = check_availability(
+        [(item["booking_info"], item["start_date"], item["end_date"]) for item in items]
+    )
+    restricted = get_restricted_items(items)
+
+    errors = {}
+    for index, (item, rooms) in enumerate(zip(items, available_rooms)):
+        if rooms is None:
+            errors[index] = {"booking_info": [_("Invalid pk - object does not exist.")]}
+            continue
+
+        if index in restricted:
+            errors[index] = {"non_field_errors": [RESTRICTED_MESSAGE]}
+        elif rooms < count_peak_items(items, item):
+            errors[index] = {"non_field_errors": [FULLY_BOOKED_MESSAGE]}
+
+    if errors:
+        raise serializers.ValidationError({"items": errors})
+
+
+def lock_booking_infos(booking_info_ids: Iterable[int]) -> Set[int]:
+    """
+    Locks the booking info rows until the end of the transaction, in primary key
+    order so that concurrent carts sharing units wait for each other instead of
+    deadlocking. Returns the ids of the apartments among them.
+    """
+    return {
+        pk
+        for pk, listing_id in models.BookingInfo.objects.select_for_update()
+        .filter(pk__in=booking_info_ids)
+        .order_by("pk")
+        .values_list("pk", "listing_id")
+        if listing_id is not None
+    }
+
+
+class CartSerializer(serializers.Serializer):
+    """
+    Serializer class for booking several units at once. The reservations of a cart
+    are all created or none is.
+    """
+
+    MAX_ITEMS = 50
+
+    items = serializers.ListField(
+        child=CartItemSerializer(),
+        allow_empty=False,
+        max_length=MAX_ITEMS,
+    )
+
+    def validate(self, data: Dict) -> Dict:
+        validate_cart_availability(data["items"])
         return data
+
+    def create(self, validated_data: Dict) -> List[models.BookingReservation]:
+        """
+        Creates the reservations of the cart in a single transaction. The booking
+        info rows are locked and the availability checked again before the
+        reservations are inserted with a single statement.
+        """
+        items: List[Dict] = validated_data["items"]
+        booking_info_ids = sorted({item["booking_info"] for item in items})
+        try:
+            with transaction.atomic():
+                apartment_ids = lock_booking_infos(booking_info_ids)
+                validate_cart_availability(items)
+
+                reservations = models.BookingReservation.objects.bulk_create(
+                    [
+                        models.BookingReservation(
+                            booking_info_id=item["booking_info"],
+                            start_date=item["start_date"],
+                            end_date=item["end_date"],
+                            exclusive=item["booking_info"] in apartment_ids,
+                        )
+                        for item in items
+                    ]
+                )
+                if not connection.features.can_return_rows_from_bulk_insert:
+                    # SQLite does not return the primary keys of bulk inserted rows.
+                    # Writes are serialized by the database lock, so the rows just
+                    # inserted are the ones with the highest ids, in order.
+                    ids = models.BookingReservation.objects.order_by("-pk").values_list(
+                        "pk", flat=True
+                    )[: len(reservations)]
+                    for reservation, pk in zip(reservations, reversed(list(ids))):
+                        reservation.pk = pk
+
+                # `bulk_create` does not send `post_save`
+                changes.record_many(
+                    (
+                        item["booking_info"],
+                        models.AvailabilityChange.AVAILABILITY,
+                        item["start_date"],
+                        item["end_date"],
+                    )
+                    for item in items
+                )
+                jobs.enqueue_many(
+                    jobs.BOOKING_INFO_CHANGED,
+                    {
+                        str(booking_info_id): {"booking_info": booking_info_id}
+                        for booking_info_id in booking_info_ids
+                    },
+                )
+                return reservations
+        except IntegrityError:
+            raise serializers.ValidationError(FULLY_BOOKED_MESSAGE)
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    """
+    Serializer class for the query parameters of the change feed.
+    """
+
+    MAX_LIMIT = 1000
+
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=100)
+
+
+class AvailabilityChangeSerializer(serializers.ModelSerializer):
+    """
+    Serializer class for :model:`listings.AvailabilityChange`
+    """
+
+    booking_info = serializers.IntegerField(source="booking_info_id")
+
+    class Meta:
+        model = models.AvailabilityChange
+        fields = (
+            "id",
+            "booking_info",
+            "kind",
+            "start_date",
+            "end_date",
+            "created_at",
+        )
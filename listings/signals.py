@@ -0,0 +1,131 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import changes, jobs
+from .models import (
+    Allotment,
+    AvailabilityChange,
+    BookingInfo,
+    BookingReservation,
+    HotelRoom,
+    RateOverride,
+    ReservationHold,
+    StayRestriction,
+)
+
+# Sent by the `run_jobs` worker with the `booking_info_ids` whose reservations
+# changed. Receivers run outside of the booking request.
+booking_info_changed = Signal()
+
+
+@receiver(post_save, sender=RateOverride)
+@receiver(post_delete, sender=RateOverride)
+def rebuild_daily_rates(sender, instance: RateOverride, **kwargs):
+    """
+    Keeps the :model:`listings.DailyRate` rows in sync with the rate overrides.
+    """
+    booking_info = BookingInfo.objects.filter(pk=instance.booking_info_id).first()
+    if booking_info is not None:
+        booking_info.rebuild_daily_rates()
+
+
+@receiver(post_save, sender=BookingReservation)
+@receiver(post_delete, sender=BookingReservation)
+def enqueue_booking_info_changed(sender, instance: BookingReservation, **kwargs):
+    """
+    Defers the work that follows a reservation change to the job queue. The job is
+    inserted in the transaction of the reservation and coalesced per booking info.
+    """
+    jobs.enqueue(
+        jobs.BOOKING_INFO_CHANGED,
+        {"booking_info": instance.booking_info_id},
+        key=str(instance.booking_info_id),
+    )
+
+
+@receiver(post_save, sender=BookingReservation)
+@receiver(post_delete, sender=BookingReservation)
+@receiver(post_save, sender=ReservationHold)
+@receiver(post_delete, sender=ReservationHold)
+@receiver(post_save, sender=RateOverride)
+@receiver(post_delete, sender=RateOverride)
+def record_dates_change(sender, instance, created: bool = True, **kwargs):
+    """
+    Adds the days of a created or deleted reservation, hold or rate override to the
+    change feed. The previous days of an edited one are not known anymore, so every
+    day of the booking info is changed.
+    """
+    kind = (
+        AvailabilityChange.PRICE
+        if sender is RateOverride
+        else AvailabilityChange.AVAILABILITY
+    )
+    if created:
+        changes.record(
+            instance.booking_info_id, kind, instance.start_date, instance.end_date
+        )
+    else:
+        changes.record(instance.booking_info_id, kind)
+
+
+@receiver(post_save, sender=BookingInfo)
+@receiver(post_delete, sender=BookingInfo)
+def record_booking_info_change(
+    sender, instance: BookingInfo, created: bool = True, **kwargs
+):
+    """
+    Adds created and deleted units to the change feed as availability changes, and
+    edited units as price changes.
+    """
+    changes.record(
+        instance.pk,
+        AvailabilityChange.AVAILABILITY if created else AvailabilityChange.PRICE,
+    )
+
+
+@receiver(post_save, sender=HotelRoom)
+@receiver(post_delete, sender=HotelRoom)
+def record_hotel_room_change(
+    sender, instance: HotelRoom, created: bool = True, **kwargs
+):
+    """
+    Adds the room type of a created or deleted hotel room to the change feed.
+    """
+    if not created:
+        return
+
+    booking_info_id = (
+        BookingInfo.objects.filter(hotel_room_type_id=instance.hotel_room_type_id)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if booking_info_id is not None:
+        changes.record(booking_info_id, AvailabilityChange.AVAILABILITY)
+
+
+@receiver(post_save, sender=Allotment)
+@receiver(post_delete, sender=Allotment)
+def update_allotted_rooms(sender, instance: Allotment, **kwargs):
+    """
+    Keeps `BookingInfo.allotted_rooms` in sync with the allotments and adds the
+    booking info to the change feed.
+    """
+    booking_info = BookingInfo.objects.filter(pk=instance.booking_info_id).first()
+    if booking_info is not None:
+        booking_info.update_allotted_rooms()
+        changes.record(booking_info.pk, AvailabilityChange.AVAILABILITY)
+
+
+@receiver(post_save, sender=StayRestriction)
+@receiver(post_delete, sender=StayRestriction)
+def record_restriction_change(sender, instance: StayRestriction, **kwargs):
+    """
+    Adds the day of a created, edited or deleted stay restriction to the change
+    feed.
+    """
+    changes.record(
+        instance.booking_info_id,
+        AvailabilityChange.AVAILABILITY,
+        instance.date,
+        instance.date,
+    )
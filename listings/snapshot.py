@@ -0,0 +1,274 @@
+"""
+An availability snapshot that the API workers share through a memory-mapped file.
+
+`build_snapshot` counts two numbers for every booking info and every day of a date
+range: the reservations that start on or before the day, and the reservations that
+end before it (see `listings.occupancy`). The reservations overlapping a stay from
+`check_in` to `check_out` are those started by `check_out` minus those ended before
+`check_in`. That is exactly what `BookingInfoQuerySet.with_availability` counts, so
+the available rooms of every unit follow from two rows of the snapshot. Only the
+open rooms and the reservations not taken from an allotment are stored, like for a
+search without a channel. The counts are stored day by day, which makes each of
+those rows contiguous.
+
+The file is written next to the current one and renamed over it, so a worker always
+maps a complete generation. Workers map the file read-only, which lets all processes
+share its pages through the page cache and read them without copying. A worker
+notices a new generation when it runs its next search.
+
+Changes made after the snapshot are overlaid from the database. A unit is checked
+again with `check_availability` when it has availability changes in the change feed
+(`listings.changes`) after the snapshot, or active holds, which the snapshot does
+not count.
+"""
+
+import datetime
+import json
+import logging
+import mmap
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .availability import check_availability
+from .models import AvailabilityChange, BookingInfo, BookingReservation, ReservationHold
+from .occupancy import RESERVATION_CHUNK_SIZE, count_started_and_ended
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BOOKING-ENGINE-SNAPSHOT\n"
+VERSION = 2
+# Bytes reserved for the magic line and the JSON header. The arrays follow.
+HEADER_SIZE = 4096
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def build_snapshot(
+    path: str,
+    start_date: datetime.date,
+    days: int,
+    using: str = DEFAULT_DB_ALIAS,
+) -> Dict:
+    """
+    Writes a new generation of the snapshot for the `days` days from `start_date`
+    to `path`, read from the `using` database, and returns its header.
+    """
+    # Read first: changes are numbered in commit order (see `listings.changes`), so
+    # the changes up to this one are committed before the units and reservations
+    # are read, and any change committed later has a greater id and is overlaid.
+    change_id: int = (
+        AvailabilityChange.objects.using(using).aggregate(change_id=Max("id"))[
+            "change_id"
+        ]
+        or 0
+    )
+
+    units = list(
+        BookingInfo.objects.using(using)
+        .with_capacity()
+        .order_by("id")
+        .values_list("id", "open_rooms")
+    )
+    booking_info_ids = numpy.array([unit[0] for unit in units], dtype="<i8")
+    open_rooms = numpy.array([unit[1] for unit in units], dtype="<i4")
+    reservations = (
+        BookingReservation.objects.using(using)
+        .filter(allotted=False)
+        .overlapping(start_date, start_date + datetime.timedelta(days=days - 1))
+        .order_by()
+        .values_list("booking_info_id", "start_date", "end_date")
+        .iterator(chunk_size=RESERVATION_CHUNK_SIZE)
+    )
+    started, ended = count_started_and_ended(
+        booking_info_ids, reservations, start_date, days
+    )
+
+    header = {
+        "version": VERSION,
+        "start_date": start_date.isoformat(),
+        "days": days,
+        "units": len(units),
+        "change_id": change_id,
+        "created_at": timezone.now().isoformat(),
+    }
+    encoded = MAGIC + json.dumps(header).encode()
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(encoded.ljust(HEADER_SIZE, b" "))
+        file.write(booking_info_ids.tobytes())
+        file.write(open_rooms.tobytes())
+        # Day major, so the counts of all units on a day are contiguous
+        file.write(numpy.ascontiguousarray(started.T, dtype="<i4").tobytes())
+        file.write(numpy.ascontiguousarray(ended.T, dtype="<i4").tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+    return header
+
+
+class AvailabilitySnapshot:
+    """
+    A generation of the snapshot, mapped read-only from `path`. The arrays are views
+    of the mapped file.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            self.generation: Tuple[int, int] = (stat.st_ino, stat.st_mtime_ns)
+            if stat.st_size < HEADER_SIZE:
+                raise SnapshotError(f"{path} is not an availability snapshot.")
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        encoded = bytes(self.buffer[:HEADER_SIZE])
+        if not encoded.startswith(MAGIC):
+            raise SnapshotError(f"{path} is not an availability snapshot.")
+        header = json.loads(encoded[len(MAGIC) :])
+        if header["version"] != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {header['version']}.")
+
+        self.start_date = datetime.date.fromisoformat(header["start_date"])
+        self.days: int = header["days"]
+        self.change_id: int = header["change_id"]
+        self.created_at = datetime.datetime.fromisoformat(header["created_at"])
+
+        units: int = header["units"]
+        if len(self.buffer) != HEADER_SIZE + units * (12 + 8 * self.days):
+            raise SnapshotError(f"{path} is truncated.")
+
+        offset = HEADER_SIZE
+        self.booking_info_ids = numpy.frombuffer(
+            self.buffer, dtype="<i8", count=units, offset=offset
+        )
+        offset += 8 * units
+        self.open_rooms = numpy.frombuffer(
+            self.buffer, dtype="<i4", count=units, offset=offset
+        )
+        offset += 4 * units
+        # Reservations started on or before, and ended before, each (day, unit)
+        self.started = numpy.frombuffer(
+            self.buffer, dtype="<i4", count=units * self.days, offset=offset
+        ).reshape(self.days, units)
+        offset += 4 * units * self.days
+        self.ended = numpy.frombuffer(
+            self.buffer, dtype="<i4", count=units * self.days, offset=offset
+        ).reshape(self.days, units)
+
+    def covers(self, check_in: datetime.date, check_out: datetime.date) -> bool:
+        """
+        Returns whether every day of the stay is in the snapshot.
+        """
+        return (
+            self.start_date <= check_in
+            and (check_out - self.start_date).days < self.days
+        )
+
+    def count_available_rooms(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> numpy.ndarray:
+        """
+        Returns the available rooms of every unit of the snapshot for the stay, as of
+        the snapshot.
+        """
+        first = (check_in - self.start_date).days
+        last = (check_out - self.start_date).days
+        return self.open_rooms - (self.started[last] - self.ended[first])
+
+    def get_changed_ids(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> Set[int]:
+        """
+        Returns the ids of the units whose availability for the stay may differ from
+        the snapshot: the units with availability changes after the snapshot on any
+        day of the stay, the edited units (whose overbooking margin may have
+        changed), and the units with active holds on the stay.
+        """
+        changed = (
+            AvailabilityChange.objects.filter(id__gt=self.change_id)
+            .filter(
+                Q(start_date__isnull=True)
+                | Q(
+                    kind=AvailabilityChange.AVAILABILITY,
+                    start_date__lte=check_out,
+                    end_date__gte=check_in,
+                )
+            )
+            .values_list("booking_info_id", flat=True)
+        )
+        held = (
+            ReservationHold.objects.active()
+            .overlapping(check_in, check_out)
+            .values_list("booking_info_id", flat=True)
+        )
+        return {*changed, *held}
+
+    def get_available_ids(
+        self, check_in: datetime.date, check_out: datetime.date
+    ) -> List[int]:
+        """
+        Returns the ids of the units with available rooms for the stay. Units that
+        changed since the snapshot are checked in the database.
+        """
+        available = self.count_available_rooms(check_in, check_out) > 0
+        changed_ids = sorted(self.get_changed_ids(check_in, check_out))
+        if not changed_ids:
+            return self.booking_info_ids[available].tolist()
+
+        available &= ~numpy.isin(self.booking_info_ids, changed_ids)
+        rooms = check_availability(
+            [(booking_info_id, check_in, check_out) for booking_info_id in changed_ids]
+        )
+        return [
+            *self.booking_info_ids[available].tolist(),
+            *(
+                booking_info_id
+                for booking_info_id, available_rooms in zip(changed_ids, rooms)
+                if available_rooms is not None and available_rooms > 0
+            ),
+        ]
+
+
+# Snapshot generation mapped by this process, per path
+_snapshots: Dict[str, AvailabilitySnapshot] = {}
+
+
+def get_snapshot() -> Optional[AvailabilitySnapshot]:
+    """
+    Returns the current generation of the snapshot at `AVAILABILITY_SNAPSHOT_PATH`.
+    The file is mapped once per process, and again after a new generation is
+    swapped in. Returns None when no snapshot is configured or readable, or when it
+    is older than `AVAILABILITY_SNAPSHOT_MAX_AGE`.
+    """
+    path: Optional[str] = settings.AVAILABILITY_SNAPSHOT_PATH
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        # Not built yet
+        return None
+
+    try:
+        snapshot = _snapshots.get(path)
+        if snapshot is None or snapshot.generation != (stat.st_ino, stat.st_mtime_ns):
+            # The previous generation is unmapped once no search uses it anymore
+            snapshot = _snapshots[path] = AvailabilitySnapshot(path)
+    except (OSError, ValueError, SnapshotError):
+        logger.warning("Availability snapshot %s is unavailable", path, exc_info=True)
+        return None
+
+    max_age = datetime.timedelta(seconds=settings.AVAILABILITY_SNAPSHOT_MAX_AGE)
+    if snapshot.created_at < timezone.now() - max_age:
+        return None
+
+    return snapshot
@@ -44,3 +44,12 @@ class BookingReservationFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = "listings.BookingReservation"
+
+
+class RateOverrideFactory(factory.django.DjangoModelFactory):
+    """
+    Factory for :model:`listings.RateOverride`
+    """
+
+    class Meta:
+        model = "listings.RateOverride"
@@ -1,6 +1,12 @@
 import random
+import re
+from contextlib import contextmanager
+from typing import Sequence
 
 from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from faker import Faker
 
@@ -11,6 +17,7 @@ from .factories import (
     HotelRoomFactory,
     HotelRoomTypeFactory,
     ListingFactory,
+    RateOverrideFactory,
 )
 
 
@@ -103,3 +110,94 @@ class ListingsTestMixin:
             )
 
         return BookingReservationFactory.create(**kwargs)
+
+    def create_rate_override(self, **kwargs) -> models.RateOverride:
+        """
+        Creates an instance of :model:`listings.RateOverride` with dummy data.
+        """
+        if "booking_info" not in kwargs:
+            kwargs.update({"booking_info": self.create_booking_info()})
+
+        if "start_date" not in kwargs:
+            kwargs.update({"start_date": timezone.now().date()})
+
+        if "end_date" not in kwargs:
+            kwargs.update(
+                {
+                    "end_date": kwargs.get("start_date")
+                    + relativedelta(days=random.randint(1, 30))
+                }
+            )
+
+        if "price" not in kwargs:
+            kwargs.update({"price": random.randint(50, 500)})
+
+        return RateOverrideFactory.create(**kwargs)
+
+
+class QueryPlanTestMixin:
+    """
+    Assertions on the query plans (`EXPLAIN`) and query counts of hot queries, for
+    SQLite and PostgreSQL.
+
+    On PostgreSQL, sequential scans and sorts are disabled for the test transaction:
+    the planner would otherwise prefer them on the tiny test tables. The assertions
+    then check that the expected indexes are usable by the query. The tables are
+    analyzed first, so the plans do not depend on statistics left by other tests.
+    """
+
+    def get_query_plan(self, queryset: QuerySet) -> str:
+        """
+        Returns the `EXPLAIN` output of the queryset.
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+
+        return queryset.explain()
+
+    def assertUsesIndex(self, plan: str, *index_names: str):
+        """
+        Asserts that the plan uses one of the indexes.
+        """
+        if not any(re.search(rf"\b{name}\b", plan) for name in index_names):
+            self.fail(f"None of {index_names} is used by the query plan:\n{plan}")
+
+    def assertNoFullScan(self, plan: str, allowed_tables: Sequence[str] = ()):
+        """
+        Asserts that the plan reads no table (other than `allowed_tables`) in full.
+        """
+        if connection.vendor == "postgresql":
+            scans = re.findall(r"Seq Scan on (\w+)", plan)
+        else:
+            scans = re.findall(r"\bSCAN (\w+)$", plan, flags=re.MULTILINE)
+
+        scans = [table for table in scans if table not in allowed_tables]
+        if scans:
+            self.fail(f"Full scan of {scans} in query plan:\n{plan}")
+
+    def assertNoSort(self, plan: str):
+        """
+        Asserts that the rows are read in order from an index rather than sorted.
+        """
+        if connection.vendor == "postgresql":
+            sorted_ = re.search(r"(^|->)\s*Sort\b", plan, flags=re.MULTILINE)
+        else:
+            sorted_ = "USE TEMP B-TREE FOR ORDER BY" in plan
+
+        if sorted_:
+            self.fail(f"Rows are sorted in query plan:\n{plan}")
+
+    @contextmanager
+    def assertMaxNumQueries(self, num: int):
+        """
+        Asserts that the block runs at most `num` queries.
+        """
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        if len(context) > num:
+            queries = "\n".join(query["sql"] for query in context.captured_queries)
+            self.fail(f"{len(context)} queries executed, {num} expected:\n{queries}")
@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import EstimatedCountPaginator
+from ..models import BookingReservation, Listing
+from .mixins import ListingsTestMixin
+
+
+class AdminChangelistTests(ListingsTestMixin, TestCase):
+    """
+    Test cases for the admin changelists of large tables
+    """
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        self.client.force_login(user)
+
+    def create_reservations(self, count: int):
+        for _ in range(count):
+            hotel_room_type = self.create_hotel_room_type(
+                hotel=self.create_listing(listing_type=Listing.HOTEL)
+            )
+            self.create_booking_reservation(
+                booking_info=self.create_booking_info(hotel_room_type=hotel_room_type)
+            )
+            self.create_booking_reservation(
+                booking_info=self.create_booking_info(
+                    listing=self.create_listing(listing_type=Listing.APARTMENT)
+                )
+            )
+
+    def get_num_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """
+        Test that the related objects shown in the changelists are fetched with the
+        page instead of once per row.
+        """
+        for name in ("bookingreservation", "bookinginfo"):
+            url = reverse(f"admin:listings_{name}_changelist")
+            self.create_reservations(1)
+            num_queries = self.get_num_queries(url)
+            self.create_reservations(5)
+            self.assertEqual(self.get_num_queries(url), num_queries, name)
+
+    def test_estimated_count(self):
+        """
+        Test that unfiltered changelists of large tables use the estimated count
+        while filtered ones are counted exactly.
+        """
+        self.create_reservations(2)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE listings_bookingreservation")
+        queryset = BookingReservation.objects.all()
+        with mock.patch.object(EstimatedCountPaginator, "threshold", 0):
+            paginator = EstimatedCountPaginator(queryset, 100)
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 4)
+
+            paginator = EstimatedCountPaginator(
+                queryset.filter(booking_info__listing__isnull=False), 100
+            )
+            with mock.patch.object(
+                EstimatedCountPaginator, "get_estimated_count"
+            ) as get_estimated_count:
+                self.assertEqual(paginator.count, 2)
+            get_estimated_count.assert_not_called()
+
+        # Small tables are counted exactly
+        BookingReservation.objects.order_by("id").last().delete()
+        self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 3)
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import availability
+from ..models import BookingInfo, Listing, ReservationHold
+from .mixins import ListingsTestMixin
+
+
+class BatchAvailabilityTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the `units/availability` endpoint
+    (:views:`listings.BookingInfoViewSet.availability`)
+    """
+
+    def setUp(self):
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.apartment_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.hotel_booking = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(2):
+            self.create_hotel_room(hotel_room_type=self.hotel_booking.hotel_room_type)
+
+        self.create_booking_reservation(
+            booking_info=self.apartment_booking,
+            start_date=self.start_date,
+            end_date=self.start_date + relativedelta(days=2),
+        )
+        self.create_booking_reservation(
+            booking_info=self.hotel_booking,
+            start_date=self.start_date,
+            end_date=self.start_date + relativedelta(days=2),
+        )
+        ReservationHold.objects.create(
+            booking_info=self.hotel_booking,
+            start_date=self.start_date + relativedelta(days=2),
+            end_date=self.start_date + relativedelta(days=4),
+            expires_at=timezone.now() + relativedelta(minutes=5),
+        )
+
+    def get_check(self, booking_info_id: int, offset: int, nights: int = 1):
+        check_in = self.start_date + relativedelta(days=offset)
+        return {
+            "booking_info": booking_info_id,
+            "check_in": check_in.strftime("%Y-%m-%d"),
+            "check_out": (check_in + relativedelta(days=nights)).strftime("%Y-%m-%d"),
+        }
+
+    def post(self, checks):
+        return self.client.post(
+            reverse("units-availability"), {"checks": checks}, format="json"
+        )
+
+    def test_batch_availability(self):
+        """
+        Test that every pair is answered in input order and matches the available
+        rooms of `BookingInfoQuerySet.with_availability`.
+        """
+        checks = [
+            self.get_check(booking_info.id, offset, nights)
+            for offset in range(-2, 6)
+            for nights in (1, 3)
+            for booking_info in (self.hotel_booking, self.apartment_booking)
+        ]
+        checks.append(self.get_check(0, 0))
+
+        response = self.post(checks)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), len(checks))
+
+        for check, result in zip(checks[:-1], response.data):
+            self.assertEqual(
+                {key: result[key] for key in check}, check, "results out of order"
+            )
+            expected = (
+                BookingInfo.objects.with_availability(
+                    check["check_in"], check["check_out"]
+                )
+                .values_list("available_rooms", flat=True)
+                .get(pk=check["booking_info"])
+            )
+            self.assertEqual(result["available_rooms"], expected, check)
+            self.assertEqual(result["available"], expected > 0)
+
+        self.assertIsNone(response.data[-1]["available_rooms"])
+        self.assertFalse(response.data[-1]["available"])
+
+    def test_batch_availability_query_count(self):
+        """
+        Test that the pairs are answered with one query per chunk.
+        """
+        checks = [
+            self.get_check(self.hotel_booking.id, offset % 10) for offset in range(25)
+        ]
+        with mock.patch.object(
+            availability, "AVAILABILITY_CHECK_CHUNK_SIZE", 10
+        ), CaptureQueriesContext(connection) as queries:
+            response = self.post(checks)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 3)
+
+    def test_batch_availability_query_parameter_limit(self):
+        """
+        Test that the chunks stay within the query parameter limit of the database.
+        """
+        checks = [
+            self.get_check(self.hotel_booking.id, offset % 10) for offset in range(25)
+        ]
+        expected = self.post(checks).data
+        with mock.patch.object(
+            connection.features, "max_query_params", 41
+        ), CaptureQueriesContext(connection) as queries:
+            response = self.post(checks)
+        self.assertEqual(response.data, expected)
+        self.assertEqual(len(queries), 3)
+
+    def test_batch_availability_invalid_range(self):
+        """
+        Test raising ValidationError when a check in date is later than its check
+        out date.
+        """
+        check = self.get_check(self.apartment_booking.id, 3)
+        check["check_in"], check["check_out"] = check["check_out"], check["check_in"]
+
+        response = self.post([check])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post([]).status_code, status.HTTP_400_BAD_REQUEST)
@@ -54,6 +54,25 @@ class BookingInfoTests(ListingsTestMixin, APITestCase):
             )
             previous_unit = unit
 
+    def test_list_booking_info_paginated(self):
+        """
+        Test paginating the list of units in price order through `page_size`.
+        """
+        units: List[BookingInfo] = [self.create_booking_info() for _ in range(5)]
+
+        query_params: str = urllib.parse.urlencode({"page_size": 2})
+        url: str = f"{reverse('units-list')}?{query_params}"
+        unit_ids: List[int] = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            unit_ids.extend(unit["id"] for unit in response.data["results"])
+            url = response.data["next"]
+
+        expected = sorted(units, key=lambda unit: (unit.price, unit.id))
+        self.assertEqual(unit_ids, [unit.id for unit in expected])
+
     def test_filter_max_price(self):
         """
         Test successful response in filtering units by `max_price` in the list endpoint.
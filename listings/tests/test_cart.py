@@ -0,0 +1,229 @@
+import threading
+import unittest
+from typing import Dict, List
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+
+from ..jobs import BOOKING_INFO_CHANGED
+from ..models import BookingInfo, BookingReservation, Job, Listing
+from ..serializers import CartSerializer
+from .mixins import ListingsTestMixin, QueryPlanTestMixin
+
+
+class CartTestMixin(ListingsTestMixin):
+    def setUp(self):
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+        self.apartment = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.room_type = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(2):
+            self.create_hotel_room(hotel_room_type=self.room_type.hotel_room_type)
+
+    def get_item(self, booking_info: BookingInfo, days: int = 0) -> Dict:
+        return {
+            "booking_info": booking_info.id,
+            "start_date": (self.start_date + relativedelta(days=days)).strftime(
+                "%Y-%m-%d"
+            ),
+            "end_date": (self.end_date + relativedelta(days=days)).strftime("%Y-%m-%d"),
+        }
+
+
+class CartTests(QueryPlanTestMixin, CartTestMixin, APITestCase):
+    """
+    Test cases for the `reservations/cart` endpoint
+    (:views:`listings.BookingReservationViewSet`)
+    """
+
+    def book(self, items: List[Dict]):
+        return self.client.post(
+            reverse("reservations-cart"), {"items": items}, format="json"
+        )
+
+    def test_book_cart(self):
+        """
+        Test that every reservation of the cart is created with a single insert and
+        that the deferred work is queued once per unit.
+        """
+        items = [
+            self.get_item(self.apartment),
+            self.get_item(self.room_type),
+            self.get_item(self.room_type),
+        ]
+        with self.assertMaxNumQueries(11):
+            response = self.book(items)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [
+                (reservation["booking_info"], reservation["start_date"])
+                for reservation in response.data
+            ],
+            [(item["booking_info"], item["start_date"]) for item in items],
+        )
+        reservations = BookingReservation.objects.in_bulk(
+            [reservation["id"] for reservation in response.data]
+        )
+        self.assertEqual(
+            sorted(
+                (reservation.booking_info_id, reservation.exclusive)
+                for reservation in reservations.values()
+            ),
+            sorted(
+                [
+                    (self.apartment.id, True),
+                    (self.room_type.id, False),
+                    (self.room_type.id, False),
+                ]
+            ),
+        )
+        self.assertEqual(
+            sorted(
+                Job.objects.filter(name=BOOKING_INFO_CHANGED).values_list(
+                    "key", flat=True
+                )
+            ),
+            sorted([str(self.apartment.id), str(self.room_type.id)]),
+        )
+
+    def test_cart_is_all_or_nothing(self):
+        """
+        Test that no reservation is created when any item is not available.
+        """
+        self.create_booking_reservation(
+            booking_info=self.apartment,
+            start_date=self.start_date,
+            end_date=self.start_date,
+        )
+
+        response = self.book(
+            [self.get_item(self.room_type), self.get_item(self.apartment)]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["items"]), [1])
+        self.assertEqual(BookingReservation.objects.count(), 1)
+
+    def test_items_of_the_same_unit(self):
+        """
+        Test that the items of a cart count against each other when they overlap on
+        the same unit.
+        """
+        response = self.book([self.get_item(self.room_type)] * 3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["items"]), [0, 1, 2])
+
+        response = self.book(
+            [self.get_item(self.apartment), self.get_item(self.apartment, days=3)]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_chained_items_of_the_same_unit(self):
+        """
+        Test that items are counted on their busiest day, so a chain of stays where
+        only neighbours overlap fits in two rooms.
+        """
+        items = [
+            {
+                "booking_info": self.room_type.id,
+                "start_date": (self.start_date + relativedelta(days=start)).strftime(
+                    "%Y-%m-%d"
+                ),
+                "end_date": (self.start_date + relativedelta(days=start + 1)).strftime(
+                    "%Y-%m-%d"
+                ),
+            }
+            for start in range(3)
+        ]
+        response = self.book(items)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(BookingReservation.objects.count(), 3)
+
+    def test_invalid_cart(self):
+        """
+        Test raising ValidationError for empty carts, unknown units, invalid dates
+        and sales channels.
+        """
+        self.assertEqual(self.book([]).status_code, status.HTTP_400_BAD_REQUEST)
+
+        item = self.get_item(self.apartment)
+        for invalid_item in (
+            {**item, "booking_info": 0},
+            {**item, "start_date": item["end_date"], "end_date": item["start_date"]},
+            {**item, "booking_info": self.room_type.id, "channel": "partner"},
+        ):
+            response = self.book([item, invalid_item])
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(list(response.data["items"]), [1])
+
+        self.assertFalse(BookingReservation.objects.exists())
+
+    def test_locked_database(self):
+        """
+        Test that carts and reservations that cannot lock their units return a
+        conflict instead of a server error.
+        """
+        locked = OperationalError("database is locked")
+        with mock.patch("listings.serializers.lock_booking_infos", side_effect=locked):
+            response = self.book([self.get_item(self.apartment)])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["detail"].code, "lock_timeout")
+
+        with mock.patch("listings.serializers.lock_booking_info", side_effect=locked):
+            response = self.client.post(
+                reverse("reservations-list"), self.get_item(self.apartment)
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(BookingReservation.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class ConcurrentCartTests(CartTestMixin, TransactionTestCase):
+    """
+    Test cases for concurrent carts sharing units
+    """
+
+    def test_overlapping_carts(self):
+        """
+        Test that concurrent carts locking the same units in opposite orders neither
+        deadlock nor overbook.
+        """
+        units = [self.apartment, self.room_type]
+        results: List[str] = []
+
+        def book(items: List[Dict]):
+            try:
+                serializer = CartSerializer(data={"items": items})
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+                results.append("booked")
+            except serializers.ValidationError:
+                results.append("rejected")
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(
+                target=book,
+                args=([self.get_item(unit) for unit in units[:: 1 if i % 2 else -1]],),
+            )
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Only one cart can have the apartment
+        self.assertEqual(sorted(results), ["booked"] + ["rejected"] * 7)
+        self.assertEqual(BookingReservation.objects.count(), 2)
@@ -0,0 +1,220 @@
+import csv
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from typing import Dict, List
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..catalogue import CatalogueImporter
+from ..geo import get_grid_cell
+from ..models import BookingInfo, HotelRoom, HotelRoomType, Listing
+from .mixins import ListingsTestMixin
+
+RECORDS = [
+    {
+        "external_id": "apartment-1",
+        "listing_type": "apartment",
+        "title": "Flat in Soho",
+        "country": "UK",
+        "city": "London",
+        "price": "120",
+    },
+    {
+        "external_id": "hotel-1",
+        "listing_type": "hotel",
+        "title": "Hotel Lux",
+        "country": "UK",
+        "city": "London",
+        "room_type": "Double",
+        "price": "80",
+        "room_number": "101",
+    },
+    {
+        "external_id": "hotel-1",
+        "listing_type": "hotel",
+        "title": "Hotel Lux",
+        "country": "UK",
+        "city": "London",
+        "room_type": "Double",
+        "price": "80",
+        "room_number": "102",
+    },
+    {
+        "external_id": "hotel-1",
+        "listing_type": "hotel",
+        "title": "Hotel Lux",
+        "country": "UK",
+        "city": "London",
+        "room_type": "Suite",
+        "price": "200",
+        "room_number": "201",
+    },
+]
+
+
+class ImportCatalogueTests(ListingsTestMixin, TestCase):
+    """
+    Test cases for the `import_catalogue` management command
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_csv(self, records: List[Dict], name: str = "catalogue.csv") -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(RECORDS[1]))
+            writer.writeheader()
+            writer.writerows(records)
+        return path
+
+    def write_jsonl(self, records: List[Dict], name: str = "catalogue.jsonl") -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+        return path
+
+    def import_catalogue(self, path: str, **options) -> str:
+        stdout = StringIO()
+        call_command("import_catalogue", path, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def assert_catalogue(self):
+        apartment = Listing.objects.get(external_id="apartment-1")
+        self.assertEqual(apartment.booking_info.price, Decimal(120))
+        self.assertEqual(apartment.booking_info.lowest_price, Decimal(120))
+
+        hotel = Listing.objects.get(external_id="hotel-1")
+        self.assertEqual(hotel.listing_type, Listing.HOTEL)
+        self.assertEqual(
+            {
+                room_type.title: (
+                    room_type.booking_info.price,
+                    sorted(room_type.hotel_rooms.values_list("room_number", flat=True)),
+                )
+                for room_type in hotel.hotel_room_types.all()
+            },
+            {
+                "Double": (Decimal(80), ["101", "102"]),
+                "Suite": (Decimal(200), ["201"]),
+            },
+        )
+
+    def test_import_csv(self):
+        """
+        Test that listings, room types, rooms and booking info are created from a
+        CSV file.
+        """
+        output = self.import_catalogue(self.write_csv(RECORDS))
+        self.assertIn("Imported 4 records.", output)
+        self.assert_catalogue()
+
+    def test_import_jsonl(self):
+        """
+        Test that JSON Lines files are imported and that records spanning several
+        batches are linked to the same parents.
+        """
+        self.import_catalogue(self.write_jsonl(RECORDS), batch_size=1)
+        self.assert_catalogue()
+        self.assertEqual(Listing.objects.count(), 2)
+        self.assertEqual(HotelRoomType.objects.count(), 2)
+
+    def test_import_is_an_upsert(self):
+        """
+        Test that importing again updates changed listings and prices without
+        creating duplicates, and keeps the rate overrides in the lowest price.
+        """
+        path = self.write_csv(RECORDS)
+        self.import_catalogue(path)
+        apartment = BookingInfo.objects.get(listing__external_id="apartment-1")
+        self.create_rate_override(booking_info=apartment, price=100)
+
+        records = [dict(record) for record in RECORDS]
+        records[0].update(title="Loft in Soho", price="90")
+        records[3].update(price="250")
+        output = self.import_catalogue(self.write_csv(records, "updated.csv"))
+        self.assertIn("listings updated: 1", output)
+        self.assertIn("booking info updated: 2", output)
+        self.assertNotIn("created", output)
+
+        apartment.refresh_from_db()
+        self.assertEqual(apartment.listing.title, "Loft in Soho")
+        self.assertEqual(apartment.price, Decimal(90))
+        self.assertEqual(apartment.lowest_price, Decimal(90))
+        self.assertEqual(
+            BookingInfo.objects.get(hotel_room_type__title="Suite").price, Decimal(250)
+        )
+        self.assertEqual(Listing.objects.count(), 2)
+        self.assertEqual(HotelRoom.objects.count(), 3)
+
+    def test_resume_from_checkpoint(self):
+        """
+        Test that an interrupted import resumes after the last committed batch.
+        """
+        path = self.write_csv(RECORDS)
+        checkpoint = os.path.join(self.directory.name, "checkpoint")
+        import_batch = CatalogueImporter.import_batch
+
+        def interrupt_second_batch(importer, records):
+            if records[-1]["room_number"] == "201":
+                raise KeyboardInterrupt
+            import_batch(importer, records)
+
+        with mock.patch.object(
+            CatalogueImporter, "import_batch", interrupt_second_batch
+        ), self.assertRaises(KeyboardInterrupt):
+            self.import_catalogue(path, batch_size=2, checkpoint=checkpoint)
+
+        with open(checkpoint) as file:
+            self.assertEqual(file.read(), "2")
+        self.assertFalse(HotelRoomType.objects.filter(title="Suite").exists())
+
+        output = self.import_catalogue(path, batch_size=2, checkpoint=checkpoint)
+        self.assertIn("Resuming after 2 records.", output)
+        self.assertIn("Imported 2 records.", output)
+        self.assertFalse(os.path.exists(checkpoint))
+        self.assert_catalogue()
+
+    def test_import_coordinates(self):
+        """
+        Test that listing coordinates are imported along with their grid cell, and
+        that importing them again changes nothing.
+        """
+        records = [dict(record) for record in RECORDS]
+        for record in records[1:]:
+            record.update(latitude="51.5074", longitude="-0.1278")
+        path = self.write_jsonl(records)
+        self.import_catalogue(path)
+
+        hotel = Listing.objects.get(external_id="hotel-1")
+        self.assertEqual(
+            (hotel.latitude, hotel.longitude), (Decimal("51.5074"), Decimal("-0.1278"))
+        )
+        self.assertEqual(hotel.grid_cell, get_grid_cell(51.5074, -0.1278))
+        self.assertIsNone(Listing.objects.get(external_id="apartment-1").grid_cell)
+        self.assertNotIn("updated", self.import_catalogue(path))
+
+        records[1]["latitude"] = "91"
+        with self.assertRaisesMessage(CommandError, "Record 2: invalid latitude '91'."):
+            self.import_catalogue(self.write_jsonl(records, "invalid.jsonl"))
+
+    def test_invalid_record(self):
+        """
+        Test that invalid records abort the import with the record number.
+        """
+        records = [dict(record) for record in RECORDS]
+        records[1]["room_type"] = ""
+        with self.assertRaisesMessage(
+            CommandError, "Record 2: room_type is required for hotels."
+        ):
+            self.import_catalogue(self.write_csv(records))
+
+        self.assertFalse(Listing.objects.exists())
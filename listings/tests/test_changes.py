@@ -0,0 +1,360 @@
+import datetime
+import json
+import threading
+import unittest
+from io import StringIO
+from typing import Dict, List
+
+from asgiref.testing import ApplicationCommunicator
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import changes
+from ..changes import ChangeStream
+from ..models import AvailabilityChange, Listing
+from .mixins import ListingsTestMixin
+
+
+class ChangeFeedTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the `changes` endpoint (:views:`listings.AvailabilityChangeViewSet`)
+    """
+
+    def setUp(self):
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+        self.apartment = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.room_type = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        self.create_hotel_room(hotel_room_type=self.room_type.hotel_room_type)
+        self.since = AvailabilityChange.objects.latest("id").id
+
+    def get_changes(self, **params) -> Dict:
+        response = self.client.get(reverse("changes-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def get_deltas(self, changes: List[Dict]) -> List[tuple]:
+        return [
+            (
+                change["booking_info"],
+                change["kind"],
+                change["start_date"],
+                change["end_date"],
+            )
+            for change in changes
+        ]
+
+    def test_record_changes(self):
+        """
+        Test that reservations, holds, rate overrides, prices and rooms add their
+        changes to the feed, in order.
+        """
+        start_date = self.start_date.strftime("%Y-%m-%d")
+        end_date = self.end_date.strftime("%Y-%m-%d")
+        dates = {"start_date": start_date, "end_date": end_date}
+        response = self.client.post(
+            reverse("reservations-list"), {"booking_info": self.apartment.id, **dates}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(
+            reverse("holds-list"), {"booking_info": self.room_type.id, **dates}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.create_rate_override(
+            booking_info=self.apartment,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        self.room_type.price += 10
+        self.room_type.save()
+        self.create_hotel_room(hotel_room_type=self.room_type.hotel_room_type)
+
+        changes = self.get_changes(since=self.since)
+        self.assertEqual(
+            self.get_deltas(changes["results"]),
+            [
+                (
+                    self.apartment.id,
+                    AvailabilityChange.AVAILABILITY,
+                    start_date,
+                    end_date,
+                ),
+                (
+                    self.room_type.id,
+                    AvailabilityChange.AVAILABILITY,
+                    start_date,
+                    end_date,
+                ),
+                (self.apartment.id, AvailabilityChange.PRICE, start_date, end_date),
+                (self.room_type.id, AvailabilityChange.PRICE, None, None),
+                (self.room_type.id, AvailabilityChange.AVAILABILITY, None, None),
+            ],
+        )
+        self.assertEqual(changes["since"], changes["results"][-1]["id"])
+        self.assertFalse(changes["more"])
+
+    def test_cart_changes(self):
+        """
+        Test that every reservation of a cart adds a change.
+        """
+        items = [
+            {
+                "booking_info": booking_info.id,
+                "start_date": self.start_date.strftime("%Y-%m-%d"),
+                "end_date": self.end_date.strftime("%Y-%m-%d"),
+            }
+            for booking_info in (self.apartment, self.room_type)
+        ]
+        response = self.client.post(
+            reverse("reservations-cart"), {"items": items}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(
+            self.get_deltas(self.get_changes(since=self.since)["results"]),
+            [
+                (
+                    item["booking_info"],
+                    AvailabilityChange.AVAILABILITY,
+                    item["start_date"],
+                    item["end_date"],
+                )
+                for item in items
+            ],
+        )
+
+    def test_since_cursor(self):
+        """
+        Test reading the feed in pages with the returned `since`.
+        """
+        for days in range(5):
+            self.create_booking_reservation(
+                booking_info=self.room_type,
+                start_date=self.start_date + relativedelta(days=days),
+                end_date=self.start_date + relativedelta(days=days),
+            )
+
+        ids = []
+        since = self.since
+        while True:
+            changes = self.get_changes(since=since, limit=2)
+            ids.extend(change["id"] for change in changes["results"])
+            since = changes["since"]
+            if not changes["more"]:
+                break
+
+        self.assertEqual(
+            ids,
+            list(
+                AvailabilityChange.objects.filter(id__gt=self.since).values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(self.get_changes(since=since), {**changes, "results": []})
+
+    def test_big_booking_info_id(self):
+        """
+        Test that changes of booking infos with ids past 32 bits are recorded.
+        """
+        booking_info_id = 2**31
+        changes.record(booking_info_id, AvailabilityChange.PRICE)
+
+        results = self.get_changes(since=self.since)["results"]
+        self.assertEqual(
+            [change["booking_info"] for change in results], [booking_info_id]
+        )
+
+    def test_invalid_feed(self):
+        """
+        Test raising ValidationError for invalid cursors and limits.
+        """
+        for params in ({"since": -1}, {"since": "a"}, {"limit": 0}, {"limit": 1001}):
+            response = self.client.get(reverse("changes-list"), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_changes_command(self):
+        """
+        Test that the `prune_changes` command deletes the changes older than the
+        retention.
+        """
+        pruned = AvailabilityChange.objects.update(
+            created_at=timezone.now() - datetime.timedelta(days=8)
+        )
+        self.create_booking_reservation(booking_info=self.room_type)
+
+        stdout = StringIO()
+        call_command("prune_changes", days=7, stdout=stdout)
+        self.assertIn(f"Deleted {pruned} changes.", stdout.getvalue())
+        self.assertEqual(AvailabilityChange.objects.count(), 1)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class ConcurrentChangeFeedTests(ListingsTestMixin, TransactionTestCase):
+    """
+    Test cases for changes recorded by concurrent transactions
+    """
+
+    def test_late_commit(self):
+        """
+        Test that a change committed after a later one was recorded is still served
+        after the changes already read, instead of being skipped.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        since = AvailabilityChange.objects.latest("id").id
+        recorded = threading.Event()
+        release = threading.Event()
+
+        def record_slowly():
+            try:
+                with transaction.atomic():
+                    changes.record(booking_info.id, AvailabilityChange.AVAILABILITY)
+                    recorded.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        def record():
+            try:
+                changes.record(booking_info.id, AvailabilityChange.PRICE)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=record_slowly),
+            threading.Thread(target=record),
+        ]
+        threads[0].start()
+        recorded.wait(5)
+        threads[1].start()
+        # Long enough for the second change to commit if it did not wait
+        threads[1].join(0.5)
+
+        served = changes.get_changes(since, 100)
+        release.set()
+        for thread in threads:
+            thread.join()
+        served += changes.get_changes(served[-1].id if served else since, 100)
+
+        self.assertEqual(
+            [change.kind for change in served],
+            [AvailabilityChange.AVAILABILITY, AvailabilityChange.PRICE],
+        )
+
+
+class ChangeStreamTests(ListingsTestMixin, TransactionTestCase):
+    """
+    Test cases for the server-sent events of the change feed
+    (:class:`listings.changes.ChangeStream`). The stream reads the changes from
+    another thread, which only sees committed rows.
+    """
+
+    def setUp(self):
+        self.booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.since = AvailabilityChange.objects.latest("id").id
+        start_date = timezone.now().date() + relativedelta(days=3)
+        for days in (0, 3):
+            self.create_booking_reservation(
+                booking_info=self.booking_info,
+                start_date=start_date + relativedelta(days=days),
+                end_date=start_date + relativedelta(days=days + 1),
+            )
+        self.changes = list(AvailabilityChange.objects.filter(id__gt=self.since))
+
+    async def django_application(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    def get_communicator(
+        self, path: str = "/api/changes/stream/", method: str = "GET", **kwargs
+    ) -> ApplicationCommunicator:
+        scope = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+            **kwargs,
+        }
+        return ApplicationCommunicator(
+            ChangeStream(self.django_application, poll_interval=0.01), scope
+        )
+
+    def parse_events(self, body: bytes) -> List[Dict]:
+        events = []
+        for event in body.decode().strip().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in event.split("\n"))
+            events.append({"id": int(fields["id"]), **json.loads(fields["data"])})
+        return events
+
+    async def test_stream_changes(self):
+        """
+        Test that the stream sends the changes after `since` as events.
+        """
+        communicator = self.get_communicator(
+            query_string=f"since={self.since}".encode()
+        )
+        await communicator.send_input({"type": "http.request"})
+        start = await communicator.receive_output(1)
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), start["headers"])
+
+        body = await communicator.receive_output(1)
+        self.assertTrue(body["more_body"])
+        events = self.parse_events(body["body"])
+        self.assertEqual(
+            [(event["id"], event["booking_info"]) for event in events],
+            [(change.id, self.booking_info.id) for change in self.changes],
+        )
+
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(1)
+
+    async def test_resume_from_last_event_id(self):
+        """
+        Test that a reconnecting client resumes after its `Last-Event-ID`.
+        """
+        communicator = self.get_communicator(
+            query_string=f"since={self.since}".encode(),
+            headers=[(b"last-event-id", str(self.changes[0].id).encode())],
+        )
+        await communicator.send_input({"type": "http.request"})
+        await communicator.receive_output(1)
+        body = await communicator.receive_output(1)
+        self.assertEqual(
+            [event["id"] for event in self.parse_events(body["body"])],
+            [self.changes[1].id],
+        )
+
+        await communicator.send_input({"type": "http.disconnect"})
+        await communicator.wait(1)
+
+    async def test_other_requests(self):
+        """
+        Test that invalid stream requests are rejected and other paths are passed
+        to the Django application.
+        """
+        for communicator, status_code in (
+            (self.get_communicator(query_string=b"since=a"), 400),
+            (self.get_communicator(method="POST"), 405),
+            (self.get_communicator(path="/api/units/"), 204),
+        ):
+            await communicator.send_input({"type": "http.request"})
+            start = await communicator.receive_output(1)
+            self.assertEqual(start["status"], status_code)
+            await communicator.wait(1)
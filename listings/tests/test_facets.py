@@ -0,0 +1,118 @@
+import urllib
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Listing
+from .mixins import ListingsTestMixin, QueryPlanTestMixin
+
+
+class FacetsTests(QueryPlanTestMixin, ListingsTestMixin, APITestCase):
+    """
+    Test cases for the `units/facets` endpoint(:views:`listings.BookingInfoViewSet`)
+    """
+
+    def setUp(self):
+        self.check_in = timezone.now().date() + relativedelta(days=1)
+        self.check_out = self.check_in + relativedelta(days=2)
+
+        for price in (40, 90, 120):
+            self.create_booking_info(
+                listing=self.create_listing(
+                    listing_type=Listing.APARTMENT, country="UK", city="London"
+                ),
+                price=price,
+            )
+        self.booked = self.create_booking_info(
+            listing=self.create_listing(
+                listing_type=Listing.APARTMENT, country="UK", city="Leeds"
+            ),
+            price=45,
+        )
+        self.create_booking_reservation(
+            booking_info=self.booked,
+            start_date=self.check_in,
+            end_date=self.check_out,
+        )
+
+        hotel = self.create_listing(
+            listing_type=Listing.HOTEL, country="BG", city="Sofia"
+        )
+        for price in (60, 200):
+            booking_info = self.create_booking_info(
+                hotel_room_type=self.create_hotel_room_type(hotel=hotel), price=price
+            )
+            self.create_hotel_room(hotel_room_type=booking_info.hotel_room_type)
+
+    def get_facets(self, **params):
+        with self.assertMaxNumQueries(1):
+            response = self.client.get(
+                f"{reverse('units-facets')}?{urllib.parse.urlencode(params)}"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_facets(self):
+        """
+        Test the counts of every facet, most common values first.
+        """
+        facets = self.get_facets()
+        self.assertEqual(facets["total"], 6)
+        self.assertEqual(
+            facets["country"],
+            [{"value": "UK", "count": 4}, {"value": "BG", "count": 2}],
+        )
+        self.assertEqual(
+            facets["city"],
+            [
+                {"value": "London", "country": "UK", "count": 3},
+                {"value": "Sofia", "country": "BG", "count": 2},
+                {"value": "Leeds", "country": "UK", "count": 1},
+            ],
+        )
+        self.assertEqual(
+            facets["listing_type"],
+            [{"value": "apartment", "count": 4}, {"value": "hotel", "count": 2}],
+        )
+        self.assertEqual(
+            [
+                (bucket["min"], bucket["max"], bucket["count"])
+                for bucket in facets["price"]
+            ],
+            [(0, 50, 2), (50, 100, 2), (100, 150, 1), (200, 250, 1)],
+        )
+
+    def test_facets_of_a_search(self):
+        """
+        Test that the facets count the units matching the availability and price
+        filters, with the prices bucketed by the average nightly price of the stay.
+        """
+        facets = self.get_facets(
+            check_in=self.check_in.strftime("%Y-%m-%d"),
+            check_out=self.check_out.strftime("%Y-%m-%d"),
+            max_price=100,
+            price_bucket=25,
+        )
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(
+            facets["country"],
+            [{"value": "UK", "count": 2}, {"value": "BG", "count": 1}],
+        )
+        self.assertEqual(
+            [(bucket["min"], bucket["count"]) for bucket in facets["price"]],
+            [(Decimal(25), 1), (Decimal(50), 1), (Decimal(75), 1)],
+        )
+
+    def test_invalid_facets(self):
+        """
+        Test raising ValidationError for invalid price buckets or searches.
+        """
+        for params in ({"price_bucket": 0}, {"check_in": "2021-12-09"}):
+            response = self.client.get(
+                f"{reverse('units-facets')}?{urllib.parse.urlencode(params)}"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
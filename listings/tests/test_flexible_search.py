@@ -0,0 +1,188 @@
+import urllib
+
+from dateutil.relativedelta import relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Listing, ReservationHold
+from .mixins import ListingsTestMixin
+
+
+class FlexibleSearchTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the `units/flexible` endpoint
+    (:views:`listings.BookingInfoViewSet.flexible`)
+    """
+
+    def setUp(self):
+        self.window_start = timezone.now().date() + relativedelta(days=1)
+        self.window_end = self.window_start + relativedelta(days=6)
+
+    def search(self, **params):
+        params.setdefault("window_start", self.window_start.strftime("%Y-%m-%d"))
+        params.setdefault("window_end", self.window_end.strftime("%Y-%m-%d"))
+        query_params: str = urllib.parse.urlencode(params)
+        url: str = reverse("units-flexible")
+        return self.client.get(f"{url}?{query_params}")
+
+    def test_flexible_search_apartment(self):
+        """
+        Test that an apartment only returns the check in dates where the whole stay
+        is free of reservations.
+        """
+        apartment_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.create_booking_reservation(
+            booking_info=apartment_booking,
+            start_date=self.window_start + relativedelta(days=3),
+            end_date=self.window_start + relativedelta(days=3),
+        )
+
+        response = self.search(nights=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["id"], apartment_booking.id)
+
+        # Stays checking in on days 0 and 4 to 6 of the window do not touch the
+        # reservation on day 3.
+        expected = [
+            self.window_start,
+            self.window_start + relativedelta(days=4),
+            self.window_start + relativedelta(days=5),
+            self.window_start + relativedelta(days=6),
+        ]
+        self.assertEqual(
+            response.data[0]["check_in_dates"],
+            [day.strftime("%Y-%m-%d") for day in expected],
+        )
+
+    def test_flexible_search_matches_check_in_and_check_out_filter(self):
+        """
+        Test that every returned check in date is also returned by the `check_in` and
+        `check_out` filter, and every other date in the window is not.
+        """
+        booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        [
+            self.create_hotel_room(hotel_room_type=booking_info.hotel_room_type)
+            for _ in range(2)
+        ]
+        self.create_booking_reservation(
+            booking_info=booking_info,
+            start_date=self.window_start,
+            end_date=self.window_start + relativedelta(days=2),
+        )
+        self.create_booking_reservation(
+            booking_info=booking_info,
+            start_date=self.window_start + relativedelta(days=2),
+            end_date=self.window_start + relativedelta(days=4),
+        )
+
+        response = self.search(nights=1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        check_in_dates = response.data[0]["check_in_dates"] if response.data else []
+
+        url: str = reverse("units-list")
+        for offset in range(7):
+            check_in = self.window_start + relativedelta(days=offset)
+            query_params: str = urllib.parse.urlencode(
+                {
+                    "check_in": check_in.strftime("%Y-%m-%d"),
+                    "check_out": (check_in + relativedelta(days=1)).strftime(
+                        "%Y-%m-%d"
+                    ),
+                }
+            )
+            unit_ids = [
+                unit["id"] for unit in self.client.get(f"{url}?{query_params}").data
+            ]
+            self.assertEqual(
+                booking_info.id in unit_ids,
+                check_in.strftime("%Y-%m-%d") in check_in_dates,
+            )
+
+    def test_flexible_search_excludes_fully_booked_units(self):
+        """
+        Test that units without any available check in date are not returned.
+        """
+        apartment_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.create_booking_reservation(
+            booking_info=apartment_booking,
+            start_date=self.window_start,
+            end_date=self.window_end,
+        )
+
+        response = self.search(nights=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+    def test_flexible_search_counts_active_holds(self):
+        """
+        Test that active holds block check in dates like reservations, and expired
+        holds do not.
+        """
+        apartment_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        ReservationHold.objects.create(
+            booking_info=apartment_booking,
+            start_date=self.window_start,
+            end_date=self.window_end,
+            expires_at=timezone.now() + relativedelta(minutes=5),
+        )
+        ReservationHold.objects.create(
+            booking_info=apartment_booking,
+            start_date=self.window_end + relativedelta(days=1),
+            end_date=self.window_end + relativedelta(days=5),
+            expires_at=timezone.now() - relativedelta(minutes=5),
+        )
+
+        response = self.search(nights=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+        response = self.search(
+            nights=3,
+            window_start=(self.window_end + relativedelta(days=1)).strftime("%Y-%m-%d"),
+            window_end=(self.window_end + relativedelta(days=1)).strftime("%Y-%m-%d"),
+        )
+        self.assertEqual(len(response.data), 1)
+
+    def test_flexible_search_max_price(self):
+        """
+        Test that the flexible search honours the `max_price` filter.
+        """
+        cheap_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT), price=50
+        )
+        self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT), price=500
+        )
+
+        response = self.search(nights=3, max_price=100)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([unit["id"] for unit in response.data], [cheap_booking.id])
+
+    def test_flexible_search_invalid_window(self):
+        """
+        Test raising ValidationError when `window_start` is later than `window_end`.
+        """
+        response = self.search(
+            nights=3,
+            window_start=self.window_end.strftime("%Y-%m-%d"),
+            window_end=self.window_start.strftime("%Y-%m-%d"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flexible_search_missing_nights(self):
+        """
+        Test raising ValidationError when `nights` is missing.
+        """
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,233 @@
+import urllib
+from typing import Dict, List
+
+from dateutil.relativedelta import relativedelta
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import geo
+from ..filters import BookingInfoFilter
+from ..models import BookingInfo, Listing
+from ..views import BookingInfoViewSet
+from .mixins import ListingsTestMixin, QueryPlanTestMixin
+
+# Trafalgar Square, London
+LATITUDE, LONGITUDE = 51.508, -0.128
+
+
+class GridTests(TestCase):
+    """
+    Test cases for the grid cells of `listings.geo`
+    """
+
+    def test_bounding_box_cells(self):
+        """
+        Test that the grid cell ranges of a bounding box contain the cells of every
+        point in the box.
+        """
+        bounding_box = geo.get_bounding_box(LATITUDE, LONGITUDE, 30)
+        ranges = geo.get_grid_cell_ranges(bounding_box)
+        self.assertLessEqual(len(ranges), geo.MAX_GRID_ROW_RANGES)
+
+        min_latitude, min_longitude, max_latitude, max_longitude = bounding_box
+        for step in range(11):
+            latitude = min_latitude + (max_latitude - min_latitude) * step / 10
+            for longitude_step in range(11):
+                longitude = (
+                    min_longitude
+                    + (max_longitude - min_longitude) * longitude_step / 10
+                )
+                cell = geo.get_grid_cell(latitude, longitude)
+                self.assertTrue(any(start <= cell <= end for start, end in ranges))
+
+    def test_antimeridian_bounding_box(self):
+        """
+        Test that a bounding box crossing the antimeridian wraps around.
+        """
+        min_latitude, min_longitude, max_latitude, max_longitude = geo.get_bounding_box(
+            -17.7, 179.99, 10
+        )
+        self.assertGreater(min_longitude, 0)
+        self.assertLess(max_longitude, 0)
+
+        ranges = geo.get_grid_cell_ranges(
+            (min_latitude, min_longitude, max_latitude, max_longitude)
+        )
+        for longitude in (179.95, -179.95):
+            cell = geo.get_grid_cell(-17.7, longitude)
+            self.assertTrue(any(start <= cell <= end for start, end in ranges))
+
+    def test_full_width_bounding_box(self):
+        """
+        Test that a bounding box from -180 to 180 covers whole rows of cells.
+        """
+        self.assertEqual(geo.get_grid_cell(0, 180), geo.get_grid_cell(0, 179.99))
+        ranges = geo.get_grid_cell_ranges((-1, -180, 1, 180))
+        for longitude in (-180, -90, 0, 90, 179.99, 180):
+            cell = geo.get_grid_cell(0, longitude)
+            self.assertTrue(any(start <= cell <= end for start, end in ranges))
+
+    def test_large_bounding_box(self):
+        """
+        Test that bounding boxes spanning many rows use a single range.
+        """
+        self.assertEqual(len(geo.get_grid_cell_ranges((30, -10, 60, 30))), 1)
+
+
+class GeoSearchTests(QueryPlanTestMixin, ListingsTestMixin, APITestCase):
+    """
+    Test cases for the proximity filters of the `units` endpoint
+    """
+
+    def setUp(self):
+        # About 1km, 4km and 8km from the center, and one without coordinates
+        self.near = self.create_apartment(51.515, -0.13, price=50)
+        self.hotel = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type(
+                hotel=self.create_listing(
+                    listing_type=Listing.HOTEL, latitude=51.5, longitude=-0.08
+                )
+            ),
+            price=60,
+        )
+        self.create_hotel_room(hotel_room_type=self.hotel.hotel_room_type)
+        self.far = self.create_apartment(51.58, -0.128, price=90)
+        self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+
+    def create_apartment(
+        self, latitude: float, longitude: float, **kwargs
+    ) -> BookingInfo:
+        return self.create_booking_info(
+            listing=self.create_listing(
+                listing_type=Listing.APARTMENT, latitude=latitude, longitude=longitude
+            ),
+            **kwargs,
+        )
+
+    def search(self, **params) -> List[int]:
+        response = self.client.get(
+            f"{reverse('units-list')}?{urllib.parse.urlencode(params)}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(unit["id"] for unit in response.data)
+
+    def test_grid_cell(self):
+        """
+        Test that the grid cell of a listing follows its coordinates.
+        """
+        listing = self.near.listing
+        self.assertEqual(listing.grid_cell, geo.get_grid_cell(51.515, -0.13))
+
+        listing.latitude = None
+        listing.save()
+        self.assertIsNone(listing.grid_cell)
+
+    def test_radius_search(self):
+        """
+        Test that only apartments and hotel room types within the radius are
+        returned.
+        """
+        self.assertEqual(
+            self.search(lat=LATITUDE, lng=LONGITUDE, radius=2), [self.near.id]
+        )
+        self.assertEqual(
+            self.search(lat=LATITUDE, lng=LONGITUDE, radius=5),
+            sorted([self.near.id, self.hotel.id]),
+        )
+        self.assertEqual(
+            self.search(lat=LATITUDE, lng=LONGITUDE, radius=10),
+            sorted([self.near.id, self.hotel.id, self.far.id]),
+        )
+
+    def test_radius_search_across_the_antimeridian(self):
+        """
+        Test that listings on the other side of the antimeridian are found.
+        """
+        east = self.create_apartment(-17.7, 179.98)
+        west = self.create_apartment(-17.7, -179.98)
+        self.assertEqual(
+            self.search(lat=-17.7, lng=179.99, radius=5), sorted([east.id, west.id])
+        )
+
+    def test_radius_search_near_a_pole(self):
+        """
+        Test that a radius search whose bounding box spans every longitude finds
+        the listings around the pole.
+        """
+        polar = self.create_apartment(89.6, 10)
+        self.assertEqual(self.search(lat=89.5, lng=10, radius=100), [polar.id])
+
+    def test_full_width_bounding_box_search(self):
+        """
+        Test that a bounding box from -180 to 180 finds the listings in it.
+        """
+        equator = self.create_apartment(0, 0)
+        self.assertEqual(self.search(bbox="-1,-180,1,180"), [equator.id])
+        self.assertEqual(self.search(bbox="-1,-179.99,1,179.99"), [equator.id])
+
+    def test_bounding_box_search(self):
+        """
+        Test searching the listings in a bounding box.
+        """
+        self.assertEqual(
+            self.search(bbox="51.49,-0.14,51.52,-0.07"),
+            sorted([self.near.id, self.hotel.id]),
+        )
+
+    def test_search_with_availability_and_price(self):
+        """
+        Test that the proximity filters are combined with the availability and
+        price filters.
+        """
+        check_in = timezone.now().date() + relativedelta(days=1)
+        check_out = check_in + relativedelta(days=2)
+        self.create_booking_reservation(
+            booking_info=self.near, start_date=check_in, end_date=check_out
+        )
+        params: Dict = {
+            "lat": LATITUDE,
+            "lng": LONGITUDE,
+            "radius": 10,
+            "check_in": check_in.strftime("%Y-%m-%d"),
+            "check_out": check_out.strftime("%Y-%m-%d"),
+        }
+        self.assertEqual(self.search(**params), sorted([self.hotel.id, self.far.id]))
+
+        self.assertEqual(self.search(**params, max_price=70), [self.hotel.id])
+
+    def test_invalid_location(self):
+        """
+        Test raising ValidationError for incomplete or invalid locations.
+        """
+        for params in (
+            {"lat": LATITUDE, "lng": LONGITUDE},
+            {"lat": LATITUDE, "lng": LONGITUDE, "radius": 0},
+            {"lat": 95, "lng": LONGITUDE, "radius": 5},
+            {"lat": LATITUDE, "lng": LONGITUDE, "radius": 5, "bbox": "1,2,3,4"},
+            {"bbox": "51.52,-0.14,51.49,-0.07"},
+            {"bbox": "north"},
+        ):
+            response = self.client.get(
+                f"{reverse('units-list')}?{urllib.parse.urlencode(params)}"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_radius_search_plan(self):
+        """
+        Test that the listings around the point are found from the grid cell index
+        and their units from the listing and hotel room type indexes.
+        """
+        params = {"lat": LATITUDE, "lng": LONGITUDE, "radius": 5, "max_price": 100}
+        queryset = BookingInfoFilter(
+            params,
+            queryset=BookingInfoViewSet.queryset,
+            request=RequestFactory().get(reverse("units-list"), params),
+        ).qs
+        plan = self.get_query_plan(queryset)
+        self.assertUsesIndex(plan, "listings_listing_grid_cell")
+        self.assertNoFullScan(plan)
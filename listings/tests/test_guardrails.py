@@ -0,0 +1,183 @@
+import urllib
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Listing
+from ..timeouts import is_query_timeout, query_timeout
+from .mixins import ListingsTestMixin
+
+if connection.vendor == "postgresql":
+    SLOW_QUERY = "SELECT pg_sleep(1)"
+else:
+    SLOW_QUERY = (
+        "WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers "
+        "WHERE n < 100000000) SELECT COUNT(*) FROM numbers"
+    )
+
+
+def run_slow_query(*args, **kwargs):
+    with connection.cursor() as cursor:
+        cursor.execute(SLOW_QUERY)
+
+
+class QueryTimeoutTests(TestCase):
+    """
+    Test cases for the statement timeouts of `listings.timeouts`
+    """
+
+    def test_query_timeout(self):
+        """
+        Test that statements running past the timeout fail, and that statements
+        after the block are not limited anymore.
+        """
+        with self.assertRaises(OperationalError) as context:
+            with query_timeout(0.05):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                run_slow_query()
+        self.assertTrue(is_query_timeout(context.exception))
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 "
+                    "FROM numbers WHERE n < 100000) SELECT COUNT(*) FROM numbers"
+                )
+                self.assertEqual(cursor.fetchone(), (100000,))
+
+    def test_no_timeout(self):
+        """
+        Test that an empty timeout does not limit the statements.
+        """
+        with query_timeout(None):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                self.assertEqual(cursor.fetchone(), (1,))
+
+
+class SearchGuardrailTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the limits of the `units` endpoints
+    (:views:`listings.BookingInfoViewSet`)
+    """
+
+    def setUp(self):
+        self.check_in = timezone.now().date() + relativedelta(days=1)
+        for _ in range(3):
+            self.create_booking_info(
+                listing=self.create_listing(listing_type=Listing.APARTMENT)
+            )
+
+    def get(self, name: str = "units-list", **params):
+        return self.client.get(f"{reverse(name)}?{urllib.parse.urlencode(params)}")
+
+    @override_settings(MAX_STAY_NIGHTS=14, MAX_SEARCH_WINDOW_DAYS=30)
+    def test_max_stay(self):
+        """
+        Test raising ValidationError for stays, flexible windows and cart items
+        longer than the limits.
+        """
+        for nights, status_code in (
+            (14, status.HTTP_200_OK),
+            (15, status.HTTP_400_BAD_REQUEST),
+        ):
+            response = self.get(
+                check_in=self.check_in.strftime("%Y-%m-%d"),
+                check_out=(self.check_in + relativedelta(days=nights)).strftime(
+                    "%Y-%m-%d"
+                ),
+            )
+            self.assertEqual(response.status_code, status_code)
+
+            response = self.get(
+                "units-flexible",
+                nights=nights,
+                window_start=self.check_in.strftime("%Y-%m-%d"),
+                window_end=(self.check_in + relativedelta(days=29)).strftime(
+                    "%Y-%m-%d"
+                ),
+            )
+            self.assertEqual(response.status_code, status_code)
+
+        response = self.get(
+            "units-flexible",
+            nights=1,
+            window_start=self.check_in.strftime("%Y-%m-%d"),
+            window_end=(self.check_in + relativedelta(days=30)).strftime("%Y-%m-%d"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        check = {
+            "booking_info": 1,
+            "check_in": self.check_in.strftime("%Y-%m-%d"),
+            "check_out": (self.check_in + relativedelta(days=15)).strftime("%Y-%m-%d"),
+        }
+        response = self.client.post(
+            reverse("units-availability"), {"checks": [check]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        item = {
+            "booking_info": check["booking_info"],
+            "start_date": check["check_in"],
+            "end_date": check["check_out"],
+        }
+        response = self.client.post(
+            reverse("reservations-cart"), {"items": [item]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["items"]), [0])
+
+    def test_max_results(self):
+        """
+        Test that lists without page_size are rejected when they match more units
+        than `MAX_SEARCH_RESULTS`, and that paginated lists are not limited.
+        """
+        with self.settings(MAX_SEARCH_RESULTS=3):
+            response = self.get()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), 3)
+
+        with self.settings(MAX_SEARCH_RESULTS=2):
+            response = self.get()
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            response = self.get(page_size=3)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), 3)
+
+    def test_max_flexible_results(self):
+        """
+        Test that flexible searches are rejected when they match more units than
+        `MAX_SEARCH_RESULTS`.
+        """
+        params = {
+            "nights": 2,
+            "window_start": self.check_in.strftime("%Y-%m-%d"),
+            "window_end": (self.check_in + relativedelta(days=7)).strftime("%Y-%m-%d"),
+        }
+        with self.settings(MAX_SEARCH_RESULTS=3):
+            response = self.get("units-flexible", **params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data), 3)
+
+        with self.settings(MAX_SEARCH_RESULTS=2):
+            response = self.get("units-flexible", **params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SEARCH_QUERY_TIMEOUT=0.05)
+    def test_search_timeout(self):
+        """
+        Test that searches running past `SEARCH_QUERY_TIMEOUT` return a clean error.
+        """
+        with mock.patch("listings.views.count_facets", side_effect=run_slow_query):
+            response = self.get("units-facets")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["detail"].code, "query_timeout")
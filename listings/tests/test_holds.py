@@ -0,0 +1,184 @@
+import datetime
+import urllib
+from io import StringIO
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import BookingInfo, BookingReservation, Listing, ReservationHold
+from .mixins import ListingsTestMixin
+
+
+class ReservationHoldTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for `holds` endpoints(:views:`listings.ReservationHoldViewSet`)
+    """
+
+    def setUp(self):
+        self.booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+        self.payload = {
+            "booking_info": self.booking_info.id,
+            "start_date": self.start_date.strftime("%Y-%m-%d"),
+            "end_date": self.end_date.strftime("%Y-%m-%d"),
+        }
+
+    def create_hold(self, **payload):
+        return self.client.post(reverse("holds-list"), {**self.payload, **payload})
+
+    def create_reservation(self, **payload):
+        return self.client.post(
+            reverse("reservations-list"), {**self.payload, **payload}
+        )
+
+    def search(self):
+        query_params: str = urllib.parse.urlencode(
+            {
+                "check_in": self.start_date.strftime("%Y-%m-%d"),
+                "check_out": self.end_date.strftime("%Y-%m-%d"),
+            }
+        )
+        return self.client.get(f"{reverse('units-list')}?{query_params}")
+
+    def expire(self, hold: ReservationHold):
+        ReservationHold.objects.filter(pk=hold.pk).update(
+            expires_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+
+    def test_hold_blocks_availability(self):
+        """
+        Test that an active hold removes the unit from searches and rejects other
+        holds and reservations.
+        """
+        response = self.create_hold()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn("token", response.data)
+        self.assertIn("expires_at", response.data)
+
+        self.assertEqual(self.search().data, [])
+        self.assertEqual(self.create_hold().status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.create_reservation().status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_expired_hold_does_not_block_availability(self):
+        """
+        Test that expired holds stop counting against availability before they are
+        swept.
+        """
+        self.create_hold()
+        self.expire(ReservationHold.objects.get())
+
+        self.assertEqual(
+            [unit["id"] for unit in self.search().data], [self.booking_info.id]
+        )
+        self.assertEqual(self.create_reservation().status_code, status.HTTP_201_CREATED)
+
+    def test_reservation_with_hold(self):
+        """
+        Test that the guest holding a unit can reserve it, which releases the hold.
+        """
+        token = self.create_hold().data["token"]
+
+        response = self.create_reservation(hold=token)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("hold", response.data)
+        self.assertTrue(BookingReservation.objects.exists())
+        self.assertFalse(ReservationHold.objects.exists())
+
+    def test_reservation_with_invalid_hold(self):
+        """
+        Test raising ValidationError when the hold expired or does not cover the
+        reservation.
+        """
+        token = self.create_hold().data["token"]
+
+        response = self.create_reservation(
+            hold=token,
+            end_date=(self.end_date + relativedelta(days=1)).strftime("%Y-%m-%d"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("hold", response.data)
+
+        self.expire(ReservationHold.objects.get())
+        response = self.create_reservation(hold=token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("hold", response.data)
+
+    def test_release_hold(self):
+        """
+        Test that a released hold frees the unit.
+        """
+        token = self.create_hold().data["token"]
+
+        response = self.client.delete(reverse("holds-detail", args=[token]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(self.search().data), 1)
+
+    def test_expired_hold_is_not_found(self):
+        """
+        Test that a hold cannot be retrieved nor released once the clock passes its
+        expiry.
+        """
+        token = self.create_hold().data["token"]
+        hold = ReservationHold.objects.get()
+        url = reverse("holds-detail", args=[token])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        later = hold.expires_at + datetime.timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            self.assertEqual(
+                self.client.get(url).status_code, status.HTTP_404_NOT_FOUND
+            )
+            self.assertEqual(
+                self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND
+            )
+
+        self.assertTrue(ReservationHold.objects.filter(pk=hold.pk).exists())
+
+    def test_hotel_holds_count_per_room(self):
+        """
+        Test that holds of a hotel room type count against its rooms.
+        """
+        booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(2):
+            self.create_hotel_room(hotel_room_type=booking_info.hotel_room_type)
+
+        for expected_status in (
+            status.HTTP_201_CREATED,
+            status.HTTP_201_CREATED,
+            status.HTTP_400_BAD_REQUEST,
+        ):
+            response = self.create_hold(booking_info=booking_info.id)
+            self.assertEqual(response.status_code, expected_status)
+
+        available_rooms = (
+            BookingInfo.objects.with_availability(self.start_date, self.end_date)
+            .values_list("available_rooms", flat=True)
+            .get(pk=booking_info.pk)
+        )
+        self.assertEqual(available_rooms, 0)
+
+    def test_sweep_holds(self):
+        """
+        Test that the `sweep_holds` command only deletes expired holds.
+        """
+        self.create_hold()
+        self.expire(ReservationHold.objects.get())
+        self.create_hold()
+
+        stdout = StringIO()
+        call_command("sweep_holds", stdout=stdout)
+        self.assertIn("Deleted 1 expired holds.", stdout.getvalue())
+        self.assertEqual(ReservationHold.objects.active().count(), 1)
+        self.assertEqual(ReservationHold.objects.count(), 1)
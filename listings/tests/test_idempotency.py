@@ -0,0 +1,166 @@
+import threading
+import unittest
+from io import StringIO
+from typing import List
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from ..idempotency import REPLAYED_HEADER
+from ..models import BookingReservation, IdempotencyKey
+from .mixins import ListingsTestMixin
+
+
+class IdempotencyTestMixin(ListingsTestMixin):
+    def setUp(self):
+        self.booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(2):
+            self.create_hotel_room(hotel_room_type=self.booking_info.hotel_room_type)
+
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+        self.payload = {
+            "booking_info": self.booking_info.id,
+            "start_date": self.start_date.strftime("%Y-%m-%d"),
+            "end_date": self.end_date.strftime("%Y-%m-%d"),
+        }
+
+    def create_reservation(self, client: APIClient = None, key="retry-1", **payload):
+        return (client or self.client).post(
+            reverse("reservations-list"),
+            {**self.payload, **payload},
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+
+class IdempotencyTests(IdempotencyTestMixin, APITestCase):
+    """
+    Test cases for the `Idempotency-Key` header of the reservation creation
+    (:views:`listings.BookingReservationViewSet.create`)
+    """
+
+    def test_retry_replays_response(self):
+        """
+        Test that a retry returns the response of the first request without
+        validating it again, even once the unit is fully booked.
+        """
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(REPLAYED_HEADER, response)
+        self.create_booking_reservation(
+            booking_info=self.booking_info,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+
+        retry = self.create_reservation()
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry[REPLAYED_HEADER], "true")
+        self.assertEqual(retry.data, response.data)
+        self.assertEqual(BookingReservation.objects.count(), 2)
+
+    def test_keys_are_separate(self):
+        """
+        Test that requests with different keys, or without a key, are not replayed.
+        """
+        self.create_reservation(key="retry-1")
+        response = self.create_reservation(key="retry-2")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(REPLAYED_HEADER, response)
+        self.assertEqual(BookingReservation.objects.count(), 2)
+
+    def test_key_reused_for_different_request(self):
+        """
+        Test that a key sent with a different request is rejected.
+        """
+        self.create_reservation()
+        end_date = self.end_date + relativedelta(days=1)
+
+        response = self.create_reservation(end_date=end_date.strftime("%Y-%m-%d"))
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(BookingReservation.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        """
+        Test that the retry of a failed request runs again.
+        """
+        reservations = [
+            self.create_booking_reservation(
+                booking_info=self.booking_info,
+                start_date=self.start_date,
+                end_date=self.end_date,
+            )
+            for _ in range(2)
+        ]
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        reservations[0].delete()
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_key(self):
+        """
+        Test that a request with an expired key runs again, and that expired keys
+        are pruned.
+        """
+        self.create_reservation()
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(REPLAYED_HEADER, response)
+        self.assertEqual(BookingReservation.objects.count(), 2)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        out = StringIO()
+        call_command("prune_idempotency_keys", stdout=out)
+        self.assertIn("Deleted 1 expired keys.", out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_invalid_key(self):
+        """
+        Test that keys longer than 255 characters are rejected.
+        """
+        response = self.create_reservation(key="k" * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(BookingReservation.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class ConcurrentIdempotencyTests(IdempotencyTestMixin, TransactionTestCase):
+    """
+    Test cases for concurrent requests with the same `Idempotency-Key`
+    """
+
+    def test_concurrent_duplicates(self):
+        """
+        Test that concurrent duplicates wait for the first request and replay its
+        response instead of creating more reservations.
+        """
+        results: List = []
+
+        def create():
+            try:
+                response = self.create_reservation(client=APIClient())
+                results.append((response.status_code, response.data["id"]))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        reservation = BookingReservation.objects.get()
+        self.assertEqual(results, [(status.HTTP_201_CREATED, reservation.id)] * 8)
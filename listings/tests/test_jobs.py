@@ -0,0 +1,167 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import jobs
+from ..models import Job, Listing
+from ..signals import booking_info_changed
+from .mixins import ListingsTestMixin
+
+
+class JobQueueTests(TestCase):
+    """
+    Test cases for the background job queue (:model:`listings.Job`)
+    """
+
+    def setUp(self):
+        self.payloads = []
+        self.handler = mock.Mock(side_effect=self.payloads.append)
+        registry = {
+            "test": jobs.JobType(
+                "test",
+                self.handler,
+                max_attempts=2,
+                retry_delay=datetime.timedelta(seconds=0),
+            )
+        }
+        patcher = mock.patch.object(jobs, "registry", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_coalesce_jobs_with_the_same_key(self):
+        """
+        Test that pending jobs with the same key are run once with the latest
+        payload, and that jobs without a key are all run.
+        """
+        jobs.enqueue("test", {"value": 1}, key="a")
+        jobs.enqueue("test", {"value": 2}, key="a")
+        jobs.enqueue("test", {"value": 3}, key="b")
+        jobs.enqueue("test", {"value": 4})
+        jobs.enqueue("test", {"value": 4})
+
+        self.assertEqual(jobs.work(once=True), 5)
+        self.assertEqual(self.handler.call_count, 1)
+        self.assertEqual(
+            self.payloads[0], [{"value": 2}, {"value": 3}, {"value": 4}, {"value": 4}]
+        )
+        self.assertFalse(Job.objects.exists())
+
+    def test_retry_failed_jobs(self):
+        """
+        Test that failing jobs are retried and kept as failed after `max_attempts`.
+        """
+        self.handler.side_effect = ValueError("Boom")
+        job = jobs.enqueue("test", key="a")
+
+        self.assertEqual(jobs.run_jobs(jobs.claim_jobs("worker", 10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError: Boom", job.last_error)
+
+        jobs.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(self.handler.call_count, 2)
+
+    def test_claim_due_jobs_once(self):
+        """
+        Test that jobs are only claimed when due and by a single worker.
+        """
+        jobs.enqueue("test", run_after=timezone.now() + datetime.timedelta(hours=1))
+        job = jobs.enqueue("test")
+
+        self.assertEqual(jobs.claim_jobs("first", 10), [job])
+        self.assertEqual(jobs.claim_jobs("second", 10), [])
+
+        # Jobs of a dead worker are claimed again once the lease expired
+        Job.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now() - jobs.LEASE - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(jobs.claim_jobs("second", 10), [job])
+
+    def test_run_jobs_command(self):
+        """
+        Test that the `run_jobs` command runs the due jobs and exits with `--once`.
+        """
+        jobs.enqueue("test", {"value": 1})
+        stdout = StringIO()
+        call_command("run_jobs", once=True, stdout=stdout)
+        self.assertIn("Processed 1 jobs.", stdout.getvalue())
+        self.assertEqual(self.payloads, [[{"value": 1}]])
+
+
+class BookingInfoChangedJobTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the jobs deferred by reservation changes
+    """
+
+    def test_reservations_defer_booking_info_changed(self):
+        """
+        Test that creating reservations only enqueues a job and that the worker sends
+        `booking_info_changed` once per booking info.
+        """
+        booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(3):
+            self.create_hotel_room(hotel_room_type=booking_info.hotel_room_type)
+        start_date = timezone.now().date() + relativedelta(days=3)
+
+        receiver = mock.Mock()
+        booking_info_changed.connect(receiver)
+        self.addCleanup(booking_info_changed.disconnect, receiver)
+
+        for _ in range(3):
+            response = self.client.post(
+                reverse("reservations-list"),
+                {
+                    "booking_info": booking_info.id,
+                    "start_date": start_date.strftime("%Y-%m-%d"),
+                    "end_date": start_date.strftime("%Y-%m-%d"),
+                },
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(Job.objects.filter(key=str(booking_info.id)).count(), 3)
+        receiver.assert_not_called()
+
+        jobs.work(once=True)
+        receiver.assert_called_once_with(
+            signal=booking_info_changed,
+            sender=Job,
+            booking_info_ids=[booking_info.id],
+        )
+
+    def test_failed_reservation_does_not_enqueue(self):
+        """
+        Test that no job is left behind when the reservation is rejected.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        start_date = timezone.now().date() + relativedelta(days=3)
+        self.create_booking_reservation(
+            booking_info=booking_info, start_date=start_date, end_date=start_date
+        )
+        Job.objects.all().delete()
+
+        response = self.client.post(
+            reverse("reservations-list"),
+            {
+                "booking_info": booking_info.id,
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "end_date": start_date.strftime("%Y-%m-%d"),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Job.objects.exists())
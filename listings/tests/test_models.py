@@ -1,5 +1,7 @@
 from django.test import TestCase
 
+from ..expressions import InIntegers
+from ..models import BookingInfo, Listing
 from .mixins import ListingsTestMixin
 
 
@@ -15,3 +17,36 @@ class ListingsModelTests(ListingsTestMixin, TestCase):
         hotel_room_type = self.create_hotel_room_type()
         room = self.create_hotel_room(hotel_room_type=hotel_room_type)
         self.assertEqual(str(room), str(room.room_number))
+
+    def test_booking_reservation_exclusive(self):
+        """
+        Test that only apartment reservations are flagged as exclusive.
+        """
+        apartment_reservation = self.create_booking_reservation(
+            booking_info=self.create_booking_info(
+                listing=self.create_listing(listing_type=Listing.APARTMENT)
+            )
+        )
+        hotel_reservation = self.create_booking_reservation(
+            booking_info=self.create_booking_info(
+                hotel_room_type=self.create_hotel_room_type()
+            )
+        )
+        self.assertTrue(apartment_reservation.exclusive)
+        self.assertFalse(hotel_reservation.exclusive)
+
+    def test_in_integers_big_ids(self):
+        """
+        Test that `InIntegers` accepts ids past 32 bits, like the big primary keys.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.assertEqual(
+            list(
+                BookingInfo.objects.filter(
+                    InIntegers("id", [booking_info.id, 2**31, 2**40])
+                ).values_list("id", flat=True)
+            ),
+            [booking_info.id],
+        )
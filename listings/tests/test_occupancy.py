@@ -0,0 +1,161 @@
+import datetime
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+import numpy
+from dateutil.relativedelta import relativedelta
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import BookingReservation, Listing
+from ..occupancy import compute_occupancy, count_booked
+from .mixins import ListingsTestMixin
+
+try:
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class OccupancyTests(ListingsTestMixin, TestCase):
+    """
+    Test cases for the daily occupancy snapshot (:mod:`listings.occupancy`)
+    """
+
+    def setUp(self):
+        self.start_date = timezone.now().date()
+        self.apartment = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT, city="Lisbon")
+        )
+        self.room_type = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type(title="Double")
+        )
+        for _ in range(3):
+            self.create_hotel_room(hotel_room_type=self.room_type.hotel_room_type)
+        self.empty = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+
+        # Starts before and ends after the snapshot, and a one day stay
+        for start, end in ((-3, 1), (4, 4), (8, 20)):
+            self.create_booking_reservation(
+                booking_info=self.apartment,
+                start_date=self.start_date + relativedelta(days=start),
+                end_date=self.start_date + relativedelta(days=end),
+            )
+        for _ in range(6):
+            self.create_booking_reservation(booking_info=self.room_type)
+
+    def get_booked(self, booking_info, days: int):
+        """
+        Counts the reservations covering each day one by one.
+        """
+        reservations = BookingReservation.objects.filter(booking_info=booking_info)
+        return [
+            sum(
+                reservation.start_date <= day <= reservation.end_date
+                for reservation in reservations
+            )
+            for day in (
+                self.start_date + relativedelta(days=offset) for offset in range(days)
+            )
+        ]
+
+    def test_compute_occupancy(self):
+        """
+        Test that the vectorized counts match the reservations covering each day.
+        """
+        occupancy = compute_occupancy(self.start_date, 10)
+        booking_infos = [self.apartment, self.room_type, self.empty]
+        self.assertEqual(
+            occupancy["booking_info_id"].tolist(),
+            [booking_info.id for booking_info in booking_infos],
+        )
+        self.assertEqual(occupancy["total_rooms"].tolist(), [1, 3, 1])
+        self.assertEqual(occupancy["city"][0], "Lisbon")
+        self.assertEqual(occupancy["room_type"].tolist(), [None, "Double", None])
+        self.assertEqual(
+            occupancy["listing_type"].tolist(),
+            [Listing.APARTMENT, Listing.HOTEL, Listing.APARTMENT],
+        )
+        self.assertEqual(occupancy["dates"][0], self.start_date)
+        self.assertEqual(len(occupancy["dates"]), 10)
+        self.assertEqual(
+            occupancy["booked"].tolist(),
+            [self.get_booked(booking_info, 10) for booking_info in booking_infos],
+        )
+        self.assertEqual(
+            occupancy["booked"][0].tolist(), [1, 1, 0, 0, 1, 0, 0, 0, 1, 1]
+        )
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_export_occupancy_command(self):
+        """
+        Test that the `export_occupancy` command writes a row per unit and day.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "occupancy.parquet")
+            stdout = StringIO()
+            call_command(
+                "export_occupancy",
+                path,
+                start_date=self.start_date,
+                days=10,
+                stdout=stdout,
+            )
+            self.assertIn("Wrote 30 rows", stdout.getvalue())
+
+            table = pyarrow.parquet.read_table(path)
+            self.assertFalse(os.path.exists(f"{path}.tmp"))
+
+        self.assertEqual(
+            table.schema.metadata[b"start_date"], self.start_date.isoformat().encode()
+        )
+        rows = table.to_pylist()
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(
+            rows[1],
+            {
+                "date": self.start_date,
+                "booking_info_id": self.room_type.id,
+                "country": self.room_type.hotel_room_type.hotel.country,
+                "city": self.room_type.hotel_room_type.hotel.city,
+                "listing_type": Listing.HOTEL,
+                "room_type": "Double",
+                "total_rooms": 3,
+                "booked": self.get_booked(self.room_type, 1)[0],
+            },
+        )
+        self.assertEqual(
+            [
+                row["booked"]
+                for row in rows
+                if row["booking_info_id"] == self.apartment.id
+            ],
+            self.get_booked(self.apartment, 10),
+        )
+        self.assertEqual(rows[-1]["date"], self.start_date + datetime.timedelta(days=9))
+
+    def test_invalid_days(self):
+        """
+        Test raising CommandError for empty snapshots.
+        """
+        with self.assertRaises(CommandError):
+            call_command("export_occupancy", "occupancy.parquet", days=0)
+
+    def test_reservations_of_unknown_units(self):
+        """
+        Test that reservations of booking infos missing from the units, e.g. created
+        between the two reads, are skipped instead of counted against another unit.
+        """
+        day = self.start_date
+        booked = count_booked(
+            numpy.array([1, 3, 5], dtype=numpy.int64),
+            [(3, day, day), (4, day, day), (6, day, day), (0, day, day)],
+            day,
+            5,
+        )
+        self.assertEqual(booked.tolist(), [[0] * 5, [1, 0, 0, 0, 0], [0] * 5])
@@ -0,0 +1,170 @@
+import urllib
+
+from dateutil.relativedelta import relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..availability import check_availability
+from ..models import Allotment, BookingInfo, BookingReservation
+from .mixins import ListingsTestMixin
+
+
+class OverbookingTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the overbooking margin and the channel allotments of
+    :model:`listings.BookingInfo`
+    """
+
+    def setUp(self):
+        self.booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(10):
+            self.create_hotel_room(hotel_room_type=self.booking_info.hotel_room_type)
+
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+        self.payload = {
+            "booking_info": self.booking_info.id,
+            "start_date": self.start_date.strftime("%Y-%m-%d"),
+            "end_date": self.end_date.strftime("%Y-%m-%d"),
+        }
+
+    def create_reservation(self, **payload):
+        return self.client.post(
+            reverse("reservations-list"), {**self.payload, **payload}
+        )
+
+    def search(self, **params):
+        query_params: str = urllib.parse.urlencode(
+            {
+                "check_in": self.start_date.strftime("%Y-%m-%d"),
+                "check_out": self.end_date.strftime("%Y-%m-%d"),
+                **params,
+            }
+        )
+        return [
+            unit["id"]
+            for unit in self.client.get(f"{reverse('units-list')}?{query_params}").data
+        ]
+
+    def reserve(self, count: int, **kwargs):
+        for _ in range(count):
+            self.create_booking_reservation(
+                booking_info=self.booking_info,
+                start_date=self.start_date,
+                end_date=self.end_date,
+                **kwargs,
+            )
+
+    def test_overbooking_margin(self):
+        """
+        Test that a room type sells its overbooking margin, rounded down to whole
+        rooms, on top of its rooms.
+        """
+        self.booking_info.overbooking_margin = 15
+        self.booking_info.save()
+        self.reserve(10)
+
+        self.assertEqual(self.search(), [self.booking_info.id])
+        self.assertEqual(
+            check_availability(
+                [(self.booking_info.id, self.start_date, self.end_date)]
+            ),
+            [1],
+        )
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.search(), [])
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_apartments_are_not_overbooked(self):
+        """
+        Test that the overbooking margin does not apply to apartments.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type="apartment"),
+            overbooking_margin=100,
+        )
+        self.create_booking_reservation(
+            booking_info=booking_info,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+
+        response = self.create_reservation(booking_info=booking_info.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_allotment_is_only_sold_by_its_channel(self):
+        """
+        Test that the rooms allotted to a channel are left out of the other searches
+        and that its reservations take them first.
+        """
+        Allotment.objects.create(
+            booking_info=self.booking_info, channel="partner", rooms=2
+        )
+        self.booking_info.refresh_from_db()
+        self.assertEqual(self.booking_info.allotted_rooms, 2)
+        self.reserve(8)
+
+        self.assertEqual(self.search(), [])
+        self.assertEqual(self.search(channel="other"), [])
+        self.assertEqual(self.search(channel="partner"), [self.booking_info.id])
+        response = self.create_reservation()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for _ in range(2):
+            response = self.create_reservation(channel="partner")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["channel"], "partner")
+
+        self.assertEqual(BookingReservation.objects.filter(allotted=True).count(), 2)
+        self.assertEqual(self.search(channel="partner"), [])
+        response = self.create_reservation(channel="partner")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_channel_sells_open_rooms_after_its_allotment(self):
+        """
+        Test that a channel sells open rooms once its allotment is sold out, and
+        that its allotted reservations do not count against the open rooms.
+        """
+        Allotment.objects.create(
+            booking_info=self.booking_info, channel="partner", rooms=1
+        )
+        for _ in range(2):
+            response = self.create_reservation(channel="partner")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(
+            list(
+                BookingReservation.objects.order_by("id").values_list(
+                    "allotted", flat=True
+                )
+            ),
+            [True, False],
+        )
+        available_rooms = (
+            BookingInfo.objects.with_availability(self.start_date, self.end_date)
+            .values_list("available_rooms", flat=True)
+            .get(pk=self.booking_info.pk)
+        )
+        self.assertEqual(available_rooms, 8)
+
+    def test_allotment_changes_update_allotted_rooms(self):
+        """
+        Test that `allotted_rooms` follows the allotments of the booking info.
+        """
+        allotment = Allotment.objects.create(
+            booking_info=self.booking_info, channel="partner", rooms=2
+        )
+        Allotment.objects.create(
+            booking_info=self.booking_info, channel="other", rooms=3
+        )
+        allotment.delete()
+
+        self.booking_info.refresh_from_db()
+        self.assertEqual(self.booking_info.allotted_rooms, 3)
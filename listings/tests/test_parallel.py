@@ -0,0 +1,153 @@
+import urllib
+from concurrent.futures import Future
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .. import parallel
+from ..models import Listing
+from .mixins import ListingsTestMixin
+
+
+class InlineExecutor:
+    """
+    Runs the shards in the test process, where they see the test transaction.
+    """
+
+    def __init__(self):
+        self.shards = []
+
+    def submit(self, fn, *args) -> Future:
+        self.shards.append(args[1:3])
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class ParallelSearchTestMixin(ListingsTestMixin):
+    def setUp(self):
+        self.window_start = timezone.now().date() + relativedelta(days=1)
+        self.window_end = self.window_start + relativedelta(days=20)
+        for index in range(12):
+            booking_info = self.create_booking_info(
+                listing=self.create_listing(listing_type=Listing.APARTMENT),
+                # Equal prices across shards are ordered by id
+                price=100 + index % 4,
+            )
+            self.create_booking_reservation(
+                booking_info=booking_info,
+                start_date=self.window_start + relativedelta(days=index),
+                end_date=self.window_start + relativedelta(days=index + 2),
+            )
+        room_type = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type(), price=101
+        )
+        self.create_hotel_room(hotel_room_type=room_type.hotel_room_type)
+
+    def search(self, **params):
+        params = {
+            "nights": 3,
+            "window_start": self.window_start.strftime("%Y-%m-%d"),
+            "window_end": self.window_end.strftime("%Y-%m-%d"),
+            **params,
+        }
+        response = self.client.get(
+            f"{reverse('units-flexible')}?{urllib.parse.urlencode(params)}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+
+@override_settings(SEARCH_WORKERS=3, SEARCH_SHARD_MIN_UNITS=10)
+class ShardedSearchTests(ParallelSearchTestMixin, APITestCase):
+    """
+    Test cases for the sharded evaluation of flexible searches
+    (:mod:`listings.parallel`)
+    """
+
+    def test_sharded_search(self):
+        """
+        Test that sharded searches return the same response as searches evaluated
+        in the request.
+        """
+        for params in ({}, {"max_price": 102}, {"nights": 18}):
+            with self.settings(SEARCH_WORKERS=0):
+                expected = self.search(**params)
+
+            executor = InlineExecutor()
+            with mock.patch.object(parallel, "get_executor", return_value=executor):
+                self.assertEqual(self.search(**params), expected)
+            self.assertEqual(len(executor.shards), 3)
+
+    def test_max_results(self):
+        """
+        Test that sharded searches are rejected when their shards, each within the
+        limit, together match more than `MAX_SEARCH_RESULTS` units.
+        """
+        with self.settings(SEARCH_WORKERS=0):
+            units = len(self.search())
+
+        executor = InlineExecutor()
+        with mock.patch.object(parallel, "get_executor", return_value=executor):
+            with self.settings(MAX_SEARCH_RESULTS=units - 1):
+                response = self.client.get(
+                    reverse("units-flexible"),
+                    {
+                        "nights": 3,
+                        "window_start": self.window_start.strftime("%Y-%m-%d"),
+                        "window_end": self.window_end.strftime("%Y-%m-%d"),
+                    },
+                )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(executor.shards), 3)
+
+    def test_narrow_search(self):
+        """
+        Test that searches spanning fewer than `SEARCH_SHARD_MIN_UNITS` ids are
+        evaluated in the request.
+        """
+        executor = InlineExecutor()
+        with mock.patch.object(parallel, "get_executor", return_value=executor):
+            with self.settings(SEARCH_SHARD_MIN_UNITS=100):
+                self.search()
+        self.assertEqual(executor.shards, [])
+
+    def test_can_merge(self):
+        self.assertTrue(parallel.can_merge(("price", "id")))
+        for ordering in ((), ("-price", "id"), ("listing__city", "id")):
+            self.assertFalse(parallel.can_merge(ordering))
+
+
+@override_settings(SEARCH_WORKERS=2, SEARCH_SHARD_MIN_UNITS=10)
+class ProcessPoolSearchTests(ParallelSearchTestMixin, TransactionTestCase):
+    """
+    Test cases for flexible searches evaluated by worker processes, which only see
+    committed rows
+    """
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Worker processes can not open the in-memory test database")
+        super().setUp()
+
+    def tearDown(self):
+        if parallel._executor is not None:
+            parallel._executor.shutdown()
+            parallel._executor = None
+
+    def test_process_pool_search(self):
+        """
+        Test that searches evaluated by the process pool return the same response as
+        searches evaluated in the request.
+        """
+        with self.settings(SEARCH_WORKERS=0):
+            expected = self.search()
+
+        self.assertEqual(self.search(), expected)
+        self.assertIsNotNone(parallel._executor)
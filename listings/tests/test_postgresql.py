@@ -0,0 +1,95 @@
+import unittest
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from ..models import BookingReservation, Listing
+from ..serializers import BookingReservationSerializer
+from .mixins import ListingsTestMixin
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class PostgreSQLReservationTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the PostgreSQL specific range indexes and constraints of
+    :model:`listings.BookingReservation`
+    """
+
+    def setUp(self):
+        self.start_date = timezone.now().date() + relativedelta(days=3)
+        self.end_date = self.start_date + relativedelta(days=2)
+
+    def test_exclusion_constraint_rejects_double_booked_apartment(self):
+        """
+        Test that overlapping reservations of an apartment are rejected by the
+        database.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.create_booking_reservation(
+            booking_info=booking_info,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_booking_reservation(
+                booking_info=booking_info,
+                start_date=self.end_date,
+                end_date=self.end_date + relativedelta(days=2),
+            )
+
+    def test_exclusion_constraint_allows_hotel_rooms(self):
+        """
+        Test that overlapping reservations of a hotel room type are left to the
+        availability checks.
+        """
+        booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(2):
+            self.create_booking_reservation(
+                booking_info=booking_info,
+                start_date=self.start_date,
+                end_date=self.end_date,
+            )
+
+        self.assertEqual(booking_info.reservations.count(), 2)
+
+    def test_concurrent_reservation_returns_validation_error(self):
+        """
+        Test that a reservation which passed validation before a conflicting
+        reservation was inserted fails with a ValidationError.
+        """
+        booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        serializer = BookingReservationSerializer(
+            data={
+                "booking_info": booking_info.id,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+            }
+        )
+        self.assertTrue(serializer.is_valid())
+
+        self.create_booking_reservation(
+            booking_info=booking_info,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+
+    def test_overlapping_uses_daterange_operator(self):
+        """
+        Test that overlap searches use the daterange overlap operator.
+        """
+        queryset = BookingReservation.objects.overlapping(
+            self.start_date, self.end_date
+        )
+        self.assertIn("&&", str(queryset.query))
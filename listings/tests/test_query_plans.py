@@ -0,0 +1,182 @@
+import urllib
+
+from dateutil.relativedelta import relativedelta
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..filters import BookingInfoFilter
+from ..models import BookingInfo, Listing, ReservationHold
+from ..views import BookingInfoViewSet
+from .mixins import ListingsTestMixin, QueryPlanTestMixin
+
+
+class QueryPlanTests(QueryPlanTestMixin, ListingsTestMixin, APITestCase):
+    """
+    Query plan regression tests for the hot queries: the availability search of
+    `BookingInfoFilter`, the overlap check of `BookingReservationSerializer.validate`
+    and the units list.
+    """
+
+    def setUp(self):
+        self.check_in = timezone.now().date() + relativedelta(days=3)
+        self.check_out = self.check_in + relativedelta(days=2)
+        for _ in range(3):
+            apartment_booking = self.create_booking_info(
+                listing=self.create_listing(listing_type=Listing.APARTMENT)
+            )
+            hotel_booking = self.create_booking_info(
+                hotel_room_type=self.create_hotel_room_type()
+            )
+            self.create_hotel_room(hotel_room_type=hotel_booking.hotel_room_type)
+            self.create_hotel_room(hotel_room_type=hotel_booking.hotel_room_type)
+            self.create_booking_reservation(booking_info=hotel_booking)
+            self.create_rate_override(booking_info=apartment_booking)
+            ReservationHold.objects.create(
+                booking_info=apartment_booking,
+                start_date=self.check_in,
+                end_date=self.check_out,
+                expires_at=timezone.now() + relativedelta(minutes=5),
+            )
+
+    def search(self, **params) -> BookingInfoFilter:
+        params.update(
+            {
+                "check_in": self.check_in.strftime("%Y-%m-%d"),
+                "check_out": self.check_out.strftime("%Y-%m-%d"),
+            }
+        )
+        return BookingInfoFilter(
+            params,
+            queryset=BookingInfoViewSet.queryset,
+            request=RequestFactory().get(reverse("units-list"), params),
+        ).qs
+
+    def assertUsesAvailabilityIndexes(self, plan: str):
+        self.assertUsesIndex(
+            plan, "listings_reservation_overlap", "listings_reservation_period"
+        )
+        self.assertUsesIndex(
+            plan,
+            "listings_hold_active",
+            "listings_reservationhold_booking_info_id_d25f99dd",
+        )
+        self.assertUsesIndex(plan, "listings_hotelroom_hotel_room_type_id_e2ba716e")
+
+    def test_availability_search_plan(self):
+        """
+        Test that the availability search counts rooms, reservations, holds and daily
+        rates through their indexes. Every unit has to be priced, so only the booking
+        info table may be read in full.
+        """
+        plan = self.get_query_plan(self.search())
+        self.assertUsesAvailabilityIndexes(plan)
+        self.assertUsesIndex(
+            plan, "listings_dailyrate_covering", "listings_dailyrate_unique_date"
+        )
+        self.assertNoFullScan(plan, allowed_tables=["listings_bookinginfo"])
+
+    def test_availability_search_max_price_plan(self):
+        """
+        Test that the availability search with a `max_price` reads a range of the
+        lowest price index instead of the whole booking info table.
+        """
+        plan = self.get_query_plan(self.search(max_price=100))
+        self.assertUsesAvailabilityIndexes(plan)
+        self.assertUsesIndex(plan, "listings_bookinginfo_lowest")
+        self.assertNoFullScan(plan)
+
+    def test_channel_availability_search_plan(self):
+        """
+        Test that a search for a channel counts the reservations of its allotment
+        through the same indexes and reads its allotment by the unique index.
+        """
+        plan = self.get_query_plan(self.search(channel="partner"))
+        self.assertUsesAvailabilityIndexes(plan)
+        self.assertUsesIndex(
+            plan,
+            "listings_allotment_unique_channel",
+            "sqlite_autoindex_listings_allotment_1",
+            "listings_allotment_booking_info_id_99578e56",
+        )
+        self.assertNoFullScan(plan, allowed_tables=["listings_bookinginfo"])
+
+    def test_restriction_check_plan(self):
+        """
+        Test that the stay restrictions of a search are read by seeking the check in
+        and check out days in the restriction index.
+        """
+        plan = self.get_query_plan(
+            BookingInfo.objects.allowing_stay(self.check_in, self.check_out)
+        )
+        self.assertUsesIndex(
+            plan,
+            "listings_restriction_covering",
+            "listings_restriction_unique_date",
+            "sqlite_autoindex_listings_stayrestriction_1",
+            "listings_stayrestriction_booking_info_id_b7a61d2d",
+        )
+
+    def test_reservation_validation_plan(self):
+        """
+        Test that the overlap check of the reservation validation only reads the
+        booking info by its primary key and its reservations and holds by index.
+        """
+        booking_info = BookingInfo.objects.filter(listing__isnull=False).first()
+        plan = self.get_query_plan(
+            BookingInfo.objects.with_availability(self.check_in, self.check_out)
+            .values_list("available_rooms", flat=True)
+            .filter(pk=booking_info.pk)
+        )
+        self.assertUsesAvailabilityIndexes(plan)
+        self.assertNoFullScan(plan)
+
+    def test_units_list_plan(self):
+        """
+        Test that the units list walks the price index in order and stops after a
+        page, with or without `max_price`.
+        """
+        for queryset in (
+            BookingInfoViewSet.queryset,
+            BookingInfoViewSet.queryset.filter(price__lte=100),
+        ):
+            plan = self.get_query_plan(queryset[:20])
+            self.assertUsesIndex(plan, "listings_bookinginfo_price")
+            self.assertNoFullScan(plan)
+            self.assertNoSort(plan)
+
+    def test_units_list_query_count(self):
+        """
+        Test that listing units runs a single query, whatever the number of units.
+        """
+        url: str = reverse("units-list")
+        stay: str = urllib.parse.urlencode(
+            {
+                "check_in": self.check_in.strftime("%Y-%m-%d"),
+                "check_out": self.check_out.strftime("%Y-%m-%d"),
+            }
+        )
+        for query_params in ("", stay, "page_size=2", f"{stay}&page_size=2"):
+            with self.assertMaxNumQueries(1):
+                response = self.client.get(f"{url}?{query_params}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.data)
+
+    def test_create_reservation_query_count(self):
+        """
+        Test the number of queries of a reservation.
+        """
+        booking_info = BookingInfo.objects.filter(listing__isnull=False).first()
+        start_date = self.check_out + relativedelta(days=10)
+        payload = {
+            "booking_info": booking_info.id,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": start_date.strftime("%Y-%m-%d"),
+        }
+        # Booking info lookup, availability check, lock and availability check
+        # again, reservation, job and change feed inserts
+        with self.assertMaxNumQueries(9):
+            response = self.client.post(reverse("reservations-list"), payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,189 @@
+import urllib
+from decimal import Decimal
+
+from dateutil.relativedelta import MO, relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import BookingInfo, DailyRate, Listing
+from .mixins import ListingsTestMixin
+
+
+class RateTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for date based pricing (:model:`listings.RateOverride`)
+    """
+
+    def setUp(self):
+        # Monday of next week. The stay below covers Monday to Sunday.
+        self.check_in = timezone.now().date() + relativedelta(weekday=MO(+2))
+        self.check_out = self.check_in + relativedelta(days=7)
+
+    def search(self, **params):
+        params.update(
+            {
+                "check_in": self.check_in.strftime("%Y-%m-%d"),
+                "check_out": self.check_out.strftime("%Y-%m-%d"),
+            }
+        )
+        query_params: str = urllib.parse.urlencode(params)
+        url: str = reverse("units-list")
+        return self.client.get(f"{url}?{query_params}")
+
+    def create_apartment_booking(self, price: int) -> BookingInfo:
+        return self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT), price=price
+        )
+
+    def test_daily_rates_weekend_override_precedence(self):
+        """
+        Test that weekend overrides take precedence over seasonal overrides and that
+        the daily rates follow changes to the overrides.
+        """
+        booking_info = self.create_apartment_booking(price=100)
+        seasonal = self.create_rate_override(
+            booking_info=booking_info,
+            start_date=self.check_in,
+            end_date=self.check_in + relativedelta(days=6),
+            price=120,
+        )
+        self.create_rate_override(
+            booking_info=booking_info,
+            start_date=self.check_in,
+            end_date=self.check_in + relativedelta(days=6),
+            weekends_only=True,
+            price=150,
+        )
+
+        rates = dict(booking_info.daily_rates.values_list("date", "price"))
+        self.assertEqual(len(rates), 7)
+        self.assertEqual(rates[self.check_in], Decimal(120))
+        self.assertEqual(rates[self.check_in + relativedelta(days=4)], Decimal(150))
+        self.assertEqual(rates[self.check_in + relativedelta(days=5)], Decimal(150))
+        self.assertEqual(rates[self.check_in + relativedelta(days=6)], Decimal(120))
+
+        seasonal.delete()
+        self.assertEqual(
+            list(booking_info.daily_rates.values_list("price", flat=True)),
+            [Decimal(150), Decimal(150)],
+        )
+
+    def test_lowest_price(self):
+        """
+        Test that the lowest nightly price follows the base price and the overrides.
+        """
+        booking_info = self.create_apartment_booking(price=100)
+        self.assertEqual(booking_info.lowest_price, Decimal(100))
+
+        override = self.create_rate_override(booking_info=booking_info, price=80)
+        booking_info.refresh_from_db()
+        self.assertEqual(booking_info.lowest_price, Decimal(80))
+
+        booking_info.price = 70
+        booking_info.save()
+        booking_info.refresh_from_db()
+        self.assertEqual(booking_info.lowest_price, Decimal(70))
+
+        booking_info.price = 120
+        booking_info.save()
+        override.delete()
+        booking_info.refresh_from_db()
+        self.assertEqual(booking_info.lowest_price, Decimal(120))
+
+    def test_total_price(self):
+        """
+        Test that the total price of a stay combines the base price and the daily
+        rates of the overridden nights.
+        """
+        booking_info = self.create_apartment_booking(price=100)
+        self.create_rate_override(
+            booking_info=booking_info,
+            start_date=self.check_in - relativedelta(days=10),
+            end_date=self.check_in + relativedelta(days=1),
+            price=80,
+        )
+        self.create_rate_override(
+            booking_info=booking_info,
+            start_date=self.check_in,
+            end_date=self.check_out + relativedelta(days=10),
+            weekends_only=True,
+            price=130,
+        )
+
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+        # 2 nights at 80, 2 weekend nights at 130 and 3 nights at the base price
+        self.assertEqual(
+            Decimal(response.data[0]["total_price"]), Decimal(2 * 80 + 2 * 130 + 300)
+        )
+        self.assertEqual(Decimal(response.data[0]["price"]), Decimal(100))
+
+    def test_sort_and_filter_by_total_price(self):
+        """
+        Test that searching with a check in / check out range sorts by the total price
+        of the stay and filters `max_price` by its average nightly price.
+        """
+        discounted_booking = self.create_apartment_booking(price=120)
+        self.create_rate_override(
+            booking_info=discounted_booking,
+            start_date=self.check_in,
+            end_date=self.check_out,
+            price=60,
+        )
+        regular_booking = self.create_apartment_booking(price=90)
+        peak_booking = self.create_apartment_booking(price=80)
+        self.create_rate_override(
+            booking_info=peak_booking,
+            start_date=self.check_in,
+            end_date=self.check_out,
+            price=200,
+        )
+
+        response = self.search()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [unit["id"] for unit in response.data],
+            [discounted_booking.id, regular_booking.id, peak_booking.id],
+        )
+
+        response = self.search(max_price=100)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [unit["id"] for unit in response.data],
+            [discounted_booking.id, regular_booking.id],
+        )
+
+    def test_total_price_is_computed_in_the_database(self):
+        """
+        Test that pricing the stays does not add queries per unit.
+        """
+        for price in range(50, 60):
+            booking_info = self.create_apartment_booking(price=price)
+            self.create_rate_override(
+                booking_info=booking_info,
+                start_date=self.check_in,
+                end_date=self.check_out,
+            )
+
+        self.assertEqual(DailyRate.objects.count(), 10 * 8)
+
+        queryset = BookingInfo.objects.with_total_price(self.check_in, self.check_out)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                len([unit.total_price for unit in queryset]),
+                10,
+            )
+
+    def test_list_without_range_has_no_total_price(self):
+        """
+        Test that the total price is only returned when searching with a range.
+        """
+        self.create_apartment_booking(price=100)
+        url: str = reverse("units-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("total_price", response.data[0])
@@ -0,0 +1,93 @@
+import unittest
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import Listing
+from .mixins import ListingsTestMixin
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class CompactRendererTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the compact renderers of the `units` endpoints.
+    """
+
+    def setUp(self):
+        self.apartment_booking = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT),
+            price=40,
+        )
+        self.hotel_booking = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type(),
+            price=60,
+        )
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_list_units_msgpack(self):
+        """
+        Test rendering the list of units as MessagePack through the `Accept` header.
+        """
+        url: str = reverse("units-list")
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+
+        units = msgpack.unpackb(response.content)
+        self.assertEqual(
+            [unit["id"] for unit in units],
+            [self.apartment_booking.id, self.hotel_booking.id],
+        )
+        self.assertEqual(units[0]["listing"]["id"], self.apartment_booking.listing_id)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_list_units_arrow(self):
+        """
+        Test rendering the list of units as an Arrow IPC stream through the `Accept`
+        header.
+        """
+        url: str = reverse("units-list")
+        response = self.client.get(
+            url, HTTP_ACCEPT="application/vnd.apache.arrow.stream"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        self.assertEqual(
+            table.column("id").to_pylist(),
+            [self.apartment_booking.id, self.hotel_booking.id],
+        )
+        self.assertEqual(table.column("price").to_pylist(), ["40.00", "60.00"])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_retrieve_unit_arrow_format_suffix(self):
+        """
+        Test rendering a single unit as an Arrow IPC stream through `?format=arrow`.
+        """
+        url: str = reverse("units-detail", args=(self.hotel_booking.id,))
+        response = self.client.get(f"{url}?format=arrow")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table.column("id").to_pylist(), [self.hotel_booking.id])
+
+    def test_list_units_defaults_to_json(self):
+        """
+        Test that clients which do not ask for a compact format still receive JSON.
+        """
+        url: str = reverse("units-list")
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(len(response.json()), 2)
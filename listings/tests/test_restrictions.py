@@ -0,0 +1,173 @@
+import urllib
+
+from dateutil.relativedelta import relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import BookingReservation, Listing, StayRestriction
+from .mixins import ListingsTestMixin
+
+
+class StayRestrictionTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the :model:`listings.StayRestriction` checks of searches,
+    reservations and carts
+    """
+
+    def setUp(self):
+        self.booking_info = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.check_in = timezone.now().date() + relativedelta(days=3)
+
+    def restrict(self, days: int = 0, **kwargs) -> StayRestriction:
+        return StayRestriction.objects.create(
+            booking_info=self.booking_info,
+            date=self.check_in + relativedelta(days=days),
+            **kwargs,
+        )
+
+    def search(self, nights: int):
+        query_params: str = urllib.parse.urlencode(
+            {
+                "check_in": self.check_in.strftime("%Y-%m-%d"),
+                "check_out": (self.check_in + relativedelta(days=nights)).strftime(
+                    "%Y-%m-%d"
+                ),
+            }
+        )
+        return [
+            unit["id"]
+            for unit in self.client.get(f"{reverse('units-list')}?{query_params}").data
+        ]
+
+    def test_min_and_max_stay(self):
+        """
+        Test that the minimum and maximum stay of the check in day limit the nights
+        of the stays found.
+        """
+        self.restrict(min_stay=3, max_stay=5)
+
+        self.assertEqual(self.search(nights=2), [])
+        self.assertEqual(self.search(nights=3), [self.booking_info.id])
+        self.assertEqual(self.search(nights=5), [self.booking_info.id])
+        self.assertEqual(self.search(nights=6), [])
+
+    def test_restrictions_of_other_days_are_ignored(self):
+        """
+        Test that only the check in day restricts the length of the stay.
+        """
+        self.restrict(days=1, min_stay=7, closed_to_arrival=True)
+
+        self.assertEqual(self.search(nights=2), [self.booking_info.id])
+
+    def test_closed_to_arrival_and_departure(self):
+        """
+        Test that stays cannot check in on days closed to arrival nor check out on
+        days closed to departure.
+        """
+        restriction = self.restrict(closed_to_arrival=True)
+        self.restrict(days=4, closed_to_departure=True)
+        self.assertEqual(self.search(nights=2), [])
+
+        restriction.delete()
+        self.assertEqual(self.search(nights=2), [self.booking_info.id])
+        self.assertEqual(self.search(nights=4), [])
+
+    def test_reservation_rejects_restricted_stay(self):
+        """
+        Test that reservations and holds are rejected when the restrictions do not
+        allow the stay.
+        """
+        self.restrict(min_stay=3)
+        payload = {
+            "booking_info": self.booking_info.id,
+            "start_date": self.check_in.strftime("%Y-%m-%d"),
+            "end_date": (self.check_in + relativedelta(days=2)).strftime("%Y-%m-%d"),
+        }
+
+        for url in (reverse("reservations-list"), reverse("holds-list")):
+            response = self.client.post(url, payload)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload["end_date"] = (self.check_in + relativedelta(days=3)).strftime(
+            "%Y-%m-%d"
+        )
+        response = self.client.post(reverse("reservations-list"), payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def book_cart(self, nights: int):
+        """
+        Books a cart of the booking info and of an unrestricted apartment.
+        """
+        other = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        return self.client.post(
+            reverse("reservations-cart"),
+            {
+                "items": [
+                    {
+                        "booking_info": booking_info.id,
+                        "start_date": self.check_in.strftime("%Y-%m-%d"),
+                        "end_date": (
+                            self.check_in + relativedelta(days=nights)
+                        ).strftime("%Y-%m-%d"),
+                    }
+                    for booking_info in (other, self.booking_info)
+                ]
+            },
+            format="json",
+        )
+
+    def test_cart_rejects_stay_shorter_than_min_stay(self):
+        """
+        Test that a cart is rejected when the minimum stay of an item's unit does
+        not allow its stay.
+        """
+        self.restrict(min_stay=3)
+
+        response = self.book_cart(nights=2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["items"]), [1])
+        self.assertFalse(BookingReservation.objects.exists())
+
+        self.assertEqual(self.book_cart(nights=3).status_code, status.HTTP_201_CREATED)
+
+    def test_cart_rejects_stay_closed_to_arrival(self):
+        """
+        Test that a cart is rejected when an item checks in on a day closed to
+        arrival of its unit.
+        """
+        self.restrict(closed_to_arrival=True)
+
+        response = self.book_cart(nights=2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["items"]), [1])
+        self.assertFalse(BookingReservation.objects.exists())
+
+    def test_flexible_search_skips_restricted_check_ins(self):
+        """
+        Test that the flexible search leaves out the check in dates whose stay the
+        restrictions reject.
+        """
+        self.restrict(closed_to_arrival=True)
+        self.restrict(days=1, min_stay=3)
+        self.restrict(days=4, closed_to_departure=True)
+        query_params: str = urllib.parse.urlencode(
+            {
+                "nights": 2,
+                "window_start": self.check_in.strftime("%Y-%m-%d"),
+                "window_end": (self.check_in + relativedelta(days=3)).strftime(
+                    "%Y-%m-%d"
+                ),
+            }
+        )
+        response = self.client.get(f"{reverse('units-flexible')}?{query_params}")
+
+        self.assertEqual(
+            response.data[0]["check_in_dates"],
+            [(self.check_in + relativedelta(days=3)).strftime("%Y-%m-%d")],
+        )
@@ -0,0 +1,127 @@
+import urllib
+from typing import Dict, List
+
+from dateutil.relativedelta import relativedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import BookingInfo, Listing
+from .mixins import ListingsTestMixin
+
+
+class RoomSearchTests(ListingsTestMixin, APITestCase):
+    """
+    Test cases for the `rooms` and `occupancy` filters of the `units` endpoint
+    """
+
+    def setUp(self):
+        self.check_in = timezone.now().date() + relativedelta(days=1)
+        self.check_out = self.check_in + relativedelta(days=2)
+
+        hotel = self.create_listing(listing_type=Listing.HOTEL)
+        self.single = self.create_room_type(hotel, price=40, rooms=2, max_occupancy=1)
+        self.double = self.create_room_type(hotel, price=60, rooms=3)
+        self.suite = self.create_room_type(hotel, price=200, rooms=2, max_occupancy=4)
+        self.create_booking_reservation(
+            booking_info=self.single, start_date=self.check_in, end_date=self.check_out
+        )
+
+        self.small_hotel = self.create_room_type(
+            self.create_listing(listing_type=Listing.HOTEL), price=50, rooms=2
+        )
+        self.apartment = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT), price=30
+        )
+
+    def create_room_type(self, hotel: Listing, rooms: int, **kwargs) -> BookingInfo:
+        booking_info = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type(hotel=hotel), **kwargs
+        )
+        for _ in range(rooms):
+            self.create_hotel_room(hotel_room_type=booking_info.hotel_room_type)
+        return booking_info
+
+    def search(self, **params) -> Dict[int, int]:
+        response = self.get(**params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return self.get_rooms(response.data)
+
+    def get(self, **params):
+        params.update(
+            check_in=self.check_in.strftime("%Y-%m-%d"),
+            check_out=self.check_out.strftime("%Y-%m-%d"),
+        )
+        return self.client.get(
+            f"{reverse('units-list')}?{urllib.parse.urlencode(params)}"
+        )
+
+    def get_rooms(self, units: List[Dict]) -> Dict[int, int]:
+        return {unit["id"]: unit.get("rooms") for unit in units}
+
+    def test_cheapest_combination(self):
+        """
+        Test that hotels are returned with the cheapest room types that add up to the
+        requested rooms.
+        """
+        self.assertEqual(self.search(rooms=3), {self.single.id: 1, self.double.id: 2})
+        self.assertEqual(
+            self.search(rooms=6),
+            {self.single.id: 1, self.double.id: 3, self.suite.id: 2},
+        )
+        self.assertEqual(self.search(rooms=7), {})
+
+    def test_single_room(self):
+        """
+        Test that searching a single room returns every available unit.
+        """
+        self.assertEqual(
+            set(self.search(rooms=1)),
+            {
+                self.apartment.id,
+                self.single.id,
+                self.double.id,
+                self.suite.id,
+                self.small_hotel.id,
+            },
+        )
+
+    def test_rooms_with_occupancy_and_price(self):
+        """
+        Test that room types which sleep too few guests or cost too much do not count
+        towards the rooms of their hotel.
+        """
+        self.assertEqual(
+            self.search(rooms=4, occupancy=2),
+            {self.double.id: 3, self.suite.id: 1},
+        )
+        self.assertEqual(self.search(rooms=5, max_price=100), {})
+        self.assertEqual(self.search(rooms=6, occupancy=3), {})
+        self.assertEqual(set(self.search(occupancy=3)), {self.suite.id})
+
+    def test_paginated_rooms(self):
+        """
+        Test that the rooms of a combination do not depend on the page.
+        """
+        units = []
+        response = self.get(rooms=3, page_size=1)
+        while True:
+            units.extend(response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(self.get_rooms(units), {self.single.id: 1, self.double.id: 2})
+
+    def test_invalid_rooms(self):
+        """
+        Test raising ValidationError for invalid room searches.
+        """
+        response = self.client.get(f"{reverse('units-list')}?rooms=2")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for params in ({"rooms": 0}, {"rooms": 1.5}, {"occupancy": 0}):
+            self.assertEqual(
+                self.get(**params).status_code, status.HTTP_400_BAD_REQUEST
+            )
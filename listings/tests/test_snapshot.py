@@ -0,0 +1,270 @@
+import datetime
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib
+from io import StringIO
+
+from dateutil.relativedelta import relativedelta
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from ..models import BookingInfo, BookingReservation, Listing
+from ..snapshot import AvailabilitySnapshot, SnapshotError, build_snapshot, get_snapshot
+from .mixins import ListingsTestMixin
+
+
+class SnapshotTestMixin(ListingsTestMixin):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "availability.snapshot")
+        self.today = timezone.now().date()
+
+        self.apartment = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        self.room_type = self.create_booking_info(
+            hotel_room_type=self.create_hotel_room_type()
+        )
+        for _ in range(3):
+            self.create_hotel_room(hotel_room_type=self.room_type.hotel_room_type)
+        for start, end in ((2, 4), (9, 9)):
+            self.create_booking_reservation(
+                booking_info=self.apartment,
+                start_date=self.today + relativedelta(days=start),
+                end_date=self.today + relativedelta(days=end),
+            )
+        for _ in range(8):
+            self.create_booking_reservation(booking_info=self.room_type)
+
+    def date(self, days: int) -> datetime.date:
+        return self.today + relativedelta(days=days)
+
+
+class AvailabilitySnapshotTests(SnapshotTestMixin, TestCase):
+    """
+    Test cases for the memory-mapped availability snapshot (:mod:`listings.snapshot`)
+    """
+
+    def test_count_available_rooms(self):
+        """
+        Test that the snapshot counts the same available rooms as the search query
+        for every stay.
+        """
+        build_snapshot(self.path, self.today, 40)
+        snapshot = AvailabilitySnapshot(self.path)
+        self.assertEqual(
+            snapshot.booking_info_ids.tolist(), [self.apartment.id, self.room_type.id]
+        )
+        self.assertTrue(snapshot.covers(self.today, self.date(39)))
+        self.assertFalse(snapshot.covers(self.today, self.date(40)))
+        self.assertFalse(snapshot.covers(self.date(-1), self.today))
+
+        for _ in range(30):
+            check_in = self.date(random.randint(0, 30))
+            check_out = check_in + relativedelta(days=random.randint(0, 9))
+            expected = dict(
+                BookingInfo.objects.with_availability(check_in, check_out).values_list(
+                    "id", "available_rooms"
+                )
+            )
+            self.assertEqual(
+                snapshot.count_available_rooms(check_in, check_out).tolist(),
+                [expected[self.apartment.id], expected[self.room_type.id]],
+            )
+
+    def test_overlay_changes(self):
+        """
+        Test that reservations, holds and units added after the snapshot are checked
+        in the database.
+        """
+        build_snapshot(self.path, self.today, 40)
+        snapshot = AvailabilitySnapshot(self.path)
+        # After the random reservations of the room type
+        check_in, check_out = self.date(36), self.date(38)
+        self.assertEqual(
+            snapshot.get_available_ids(check_in, check_out),
+            [self.apartment.id, self.room_type.id],
+        )
+
+        self.create_booking_reservation(
+            booking_info=self.apartment, start_date=check_out, end_date=self.date(39)
+        )
+        new_unit = self.create_booking_info(
+            listing=self.create_listing(listing_type=Listing.APARTMENT)
+        )
+        with self.assertNumQueries(3):
+            self.assertEqual(
+                snapshot.get_available_ids(check_in, check_out),
+                [self.room_type.id, new_unit.id],
+            )
+
+        # Changes on other days do not need a check
+        self.assertEqual(
+            snapshot.get_changed_ids(self.date(30), self.date(31)), {new_unit.id}
+        )
+
+    def test_snapshot_generations(self):
+        """
+        Test that workers map a rebuilt snapshot, and ignore missing, invalid and
+        outdated ones.
+        """
+        with self.settings(AVAILABILITY_SNAPSHOT_PATH=self.path):
+            self.assertIsNone(get_snapshot())
+
+            build_snapshot(self.path, self.today, 10)
+            snapshot = get_snapshot()
+            self.assertEqual(snapshot.days, 10)
+            self.assertIs(get_snapshot(), snapshot)
+
+            build_snapshot(self.path, self.today, 20)
+            self.assertEqual(get_snapshot().days, 20)
+            self.assertFalse(
+                [name for name in os.listdir(self.directory) if name.endswith(".tmp")]
+            )
+            # The previous generation stays readable
+            self.assertEqual(
+                len(snapshot.count_available_rooms(self.today, self.today)), 2
+            )
+
+            with self.settings(AVAILABILITY_SNAPSHOT_MAX_AGE=-1):
+                self.assertIsNone(get_snapshot())
+
+            with open(self.path, "wb") as file:
+                file.write(b"not a snapshot" * 1000)
+            with self.assertLogs("listings.snapshot", "WARNING"):
+                self.assertIsNone(get_snapshot())
+            with self.assertRaises(SnapshotError):
+                AvailabilitySnapshot(self.path)
+
+    def test_build_snapshot_command(self):
+        """
+        Test that the `build_snapshot` command writes the snapshot.
+        """
+        stdout = StringIO()
+        with self.settings(AVAILABILITY_SNAPSHOT_PATH=self.path):
+            call_command("build_snapshot", days=30, stdout=stdout)
+        self.assertIn("Wrote the snapshot of 2 units", stdout.getvalue())
+        self.assertEqual(AvailabilitySnapshot(self.path).days, 30)
+
+        with self.assertRaises(CommandError):
+            call_command("build_snapshot", days=30)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+class ConcurrentSnapshotTests(SnapshotTestMixin, TransactionTestCase):
+    """
+    Test cases for snapshots built while a reservation is being committed
+    """
+
+    def test_reservation_committed_after_the_snapshot(self):
+        """
+        Test that a reservation whose transaction was open while the snapshot was
+        built is overlaid once it commits.
+        """
+        check_in, check_out = self.date(36), self.date(38)
+        recorded = threading.Event()
+        release = threading.Event()
+
+        def reserve():
+            try:
+                with transaction.atomic():
+                    self.create_booking_reservation(
+                        booking_info=self.apartment,
+                        start_date=check_in,
+                        end_date=check_out,
+                    )
+                    recorded.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=reserve)
+        thread.start()
+        recorded.wait(5)
+        build_snapshot(self.path, self.today, 40)
+        release.set()
+        thread.join()
+
+        snapshot = AvailabilitySnapshot(self.path)
+        self.assertIn(self.apartment.id, snapshot.get_changed_ids(check_in, check_out))
+        self.assertEqual(
+            snapshot.get_available_ids(check_in, check_out), [self.room_type.id]
+        )
+
+
+class SnapshotSearchTests(SnapshotTestMixin, APITestCase):
+    """
+    Test cases for unit searches read from the availability snapshot
+    (:views:`listings.BookingInfoViewSet`)
+    """
+
+    def search(self, check_in: datetime.date, check_out: datetime.date, **params):
+        params.update(
+            check_in=check_in.strftime("%Y-%m-%d"),
+            check_out=check_out.strftime("%Y-%m-%d"),
+        )
+        response = self.client.get(
+            f"{reverse('units-list')}?{urllib.parse.urlencode(params)}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [unit["id"] for unit in response.data]
+
+    def test_search(self):
+        """
+        Test that searches with a snapshot return the same units as without, before
+        and after new reservations.
+        """
+        build_snapshot(self.path, self.today, 40)
+        stays = [(self.date(days), self.date(days + 2)) for days in range(0, 35, 3)]
+
+        for reserve in (False, True):
+            if reserve:
+                for _ in range(3):
+                    self.create_booking_reservation(booking_info=self.room_type)
+                self.create_booking_reservation(
+                    booking_info=self.apartment,
+                    start_date=self.date(30),
+                    end_date=self.date(31),
+                )
+
+            for check_in, check_out in stays:
+                expected = self.search(check_in, check_out)
+                with self.settings(AVAILABILITY_SNAPSHOT_PATH=self.path):
+                    self.assertEqual(self.search(check_in, check_out), expected)
+
+        # The units are read from the snapshot instead of counting the reservations,
+        # on days without changes since the snapshot
+        with self.settings(AVAILABILITY_SNAPSHOT_PATH=self.path):
+            with CaptureQueriesContext(connection) as queries:
+                self.search(self.date(36), self.date(37))
+        self.assertFalse(
+            [
+                query
+                for query in queries
+                if BookingReservation._meta.db_table in query["sql"]
+            ]
+        )
+
+        # Stays outside of the snapshot, and room searches, are counted in the query
+        with self.settings(AVAILABILITY_SNAPSHOT_PATH=self.path):
+            self.assertEqual(
+                set(self.search(self.date(38), self.date(42))),
+                {
+                    unit.id
+                    for unit in BookingInfo.objects.with_availability(
+                        self.date(38), self.date(42)
+                    ).filter(available_rooms__gt=0)
+                },
+            )
+            self.search(self.date(3), self.date(5), rooms=2)
@@ -0,0 +1,34 @@
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Requires SQLite")
+class SQLiteConnectionTests(TestCase):
+    """
+    Test cases for the connection initialization of `booking_engine.db.sqlite3`
+    """
+
+    def get_pragma(self, name: str):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied(self):
+        """
+        Test that the pragmas configured in the database options are applied to the
+        connection.
+        """
+        pragmas = connection.settings_dict["OPTIONS"]["pragmas"]
+        self.assertEqual(self.get_pragma("cache_size"), pragmas["cache_size"])
+        # NORMAL
+        self.assertEqual(self.get_pragma("synchronous"), 1)
+        # Django's own connection setup still runs
+        self.assertEqual(self.get_pragma("foreign_keys"), 1)
+
+    def test_pragmas_are_not_connect_arguments(self):
+        """
+        Test that the pragmas are not passed on to `sqlite3.connect()`.
+        """
+        self.assertNotIn("pragmas", connection.get_connection_params())
@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+from rest_framework import status
+
+# Runs in a new interpreter with the API settings. Prints the lazily imported modules
+# that are loaded after serving a request, and the response. `django.contrib.admin`
+# is left out: `rest_framework.views` imports it through the schema generators.
+CHILD = """
+import json, sys
+
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+get_wsgi_application()
+response = Client(HTTP_HOST="localhost").get("/api/")
+print(json.dumps({
+    "modules": [
+        module
+        for module in ("drf_yasg", "listings.admin", "pyarrow", "msgpack", "numpy")
+        if module in sys.modules
+    ],
+    "status": response.status_code,
+    "content_type": response["Content-Type"],
+}))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Test cases for the worker boot of the settings profiles
+    """
+
+    def test_api_settings(self):
+        """
+        Test that the API profile serves JSON without loading the admin, the schema
+        views or the optional renderers.
+        """
+        process = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "booking_engine.settings_api"},
+            stdout=subprocess.PIPE,
+            check=True,
+            universal_newlines=True,
+        )
+        result = json.loads(process.stdout.splitlines()[-1])
+        self.assertEqual(result["modules"], [])
+        self.assertEqual(result["status"], status.HTTP_200_OK)
+        self.assertEqual(result["content_type"], "application/json")
+
+    def test_swagger_view(self):
+        """
+        Test that the lazily built schema view is served by the default profile.
+        """
+        response = self.client.get("/swagger/?format=openapi")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("paths", response.json())
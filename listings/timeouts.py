@@ -0,0 +1,129 @@
+"""
+Statement timeouts, so that a single expensive search cannot keep a worker and the
+database busy.
+
+`query_timeout` limits every statement run in its block to a number of seconds:
+PostgreSQL cancels the statements itself (`statement_timeout`, set along with each
+statement), while SQLite statements are interrupted from a progress handler once
+their deadline has passed.
+Either way the statement fails with an `OperationalError` that `is_query_timeout`
+recognizes, and that the search views return as a `QueryTimeout` error.
+
+Writes waiting too long for a lock fail the same way: `is_lock_timeout` recognizes
+them, and the booking views return them as a `LockTimeout` error.
+"""
+
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterator, Optional
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Number of SQLite virtual machine instructions between two deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+# SQLSTATE of cancelled PostgreSQL statements
+QUERY_CANCELED = "57014"
+
+# SQLSTATE of PostgreSQL statements that could not take a lock
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class QueryTimeout(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = _("The search took too long, please narrow it down.")
+    default_code = "query_timeout"
+
+
+class LockTimeout(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _("The units are being booked by another request, please retry.")
+    default_code = "lock_timeout"
+
+
+def is_query_timeout(exc: Exception) -> bool:
+    """
+    Returns whether `exc` is raised by a statement that ran past its timeout.
+    """
+    if not isinstance(exc, OperationalError):
+        return False
+
+    # `str` of the `sqlite3.OperationalError` raised for interrupted statements
+    return str(exc) == "interrupted" or (
+        getattr(exc.__cause__, "pgcode", None) == QUERY_CANCELED
+    )
+
+
+def is_lock_timeout(exc: Exception) -> bool:
+    """
+    Returns whether `exc` is raised by a write that could not take its lock, e.g.
+    once SQLite gave up waiting for the database lock held by another writer.
+    """
+    if not isinstance(exc, OperationalError):
+        return False
+
+    # `str` of the `sqlite3.OperationalError` raised when the database stays locked
+    return str(exc) == "database is locked" or (
+        getattr(exc.__cause__, "pgcode", None) == LOCK_NOT_AVAILABLE
+    )
+
+
+def set_statement_timeout(milliseconds: int, execute, sql, params, many, context):
+    """
+    Execute wrapper prepending `SET LOCAL statement_timeout` to the statement. Both
+    are sent at once and run in the same (implicit) transaction, so the timeout
+    costs no round trip and does not outlive the statement outside of transactions.
+    """
+    # Server-side cursors (`QuerySet.iterator()`) and `executemany` only take a
+    # single statement
+    if many or getattr(context["cursor"].cursor, "name", None):
+        return execute(sql, params, many, context)
+
+    return execute(
+        f"SET LOCAL statement_timeout = {milliseconds}; {sql}", params, many, context
+    )
+
+
+@contextmanager
+def query_timeout(
+    seconds: Optional[float], using: str = DEFAULT_DB_ALIAS
+) -> Iterator[None]:
+    """
+    Limits the statements run in the block to `seconds` each. No-op when `seconds`
+    is empty or on other databases.
+    """
+    connection = connections[using]
+    if not seconds or connection.vendor not in ("postgresql", "sqlite"):
+        yield
+        return
+
+    if connection.vendor == "postgresql":
+        with connection.execute_wrapper(
+            partial(set_statement_timeout, int(seconds * 1000))
+        ):
+            yield
+        return
+
+    # SQLite has no statement timeout. The deadline is moved on every statement,
+    # and the handler stays installed while its rows are fetched.
+    deadline = [time.monotonic() + seconds]
+
+    def start_statement(execute, sql, params, many, context):
+        deadline[0] = time.monotonic() + seconds
+        return execute(sql, params, many, context)
+
+    def interrupt() -> bool:
+        return time.monotonic() > deadline[0]
+
+    connection.ensure_connection()
+    connection.connection.set_progress_handler(interrupt, SQLITE_PROGRESS_STEPS)
+    try:
+        with connection.execute_wrapper(start_statement):
+            yield
+    finally:
+        if connection.connection is not None:
+            connection.connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
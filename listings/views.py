@@ -1,12 +1,40 @@
 from django_filters import rest_framework as filters
-from rest_framework import mixins, viewsets
+from django_filters import utils
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from .availability import check_availability
+from .changes import get_changes
+from .facets import count_facets
 from .filters import BookingInfoFilter
-from .models import BookingInfo, BookingReservation
-from .serializers import BookingInfoSerializer, BookingReservationSerializer
+from .mixins import IdempotentCreateMixin, LockTimeoutMixin, QueryTimeoutMixin
+from .models import (
+    AvailabilityChange,
+    BookingInfo,
+    BookingReservation,
+    ReservationHold,
+)
+from .pagination import UnitCursorPagination
+from .parallel import search_flexible
+from .renderers import get_optional_renderer_classes
+from .serializers import (
+    AvailabilityChangeSerializer,
+    AvailabilityCheckSerializer,
+    BatchAvailabilitySerializer,
+    BookingInfoSerializer,
+    BookingReservationSerializer,
+    CartSerializer,
+    ChangeFeedSerializer,
+    FacetSearchSerializer,
+    FlexibleSearchSerializer,
+    ReservationHoldSerializer,
+)
 
 
-class BookingInfoViewSet(viewsets.ReadOnlyModelViewSet):
+class BookingInfoViewSet(QueryTimeoutMixin, viewsets.ReadOnlyModelViewSet):
     """
     retrieve:
         Retrieves a :model:`listings.BookingInfo` instance.
@@ -14,18 +42,106 @@ class BookingInfoViewSet(viewsets.ReadOnlyModelViewSet):
     list:
         Returns a list of :model:`listings.BookingInfo` objects.
 
+    flexible:
+        Returns the :model:`listings.BookingInfo` objects that can be booked for
+        `nights` consecutive nights with a check in date between `window_start` and
+        `window_end`, along with the available check in dates. Searches matching
+        more than `MAX_SEARCH_RESULTS` units are rejected.
+
+    facets:
+        Returns the number of units matching the search per country, city, listing
+        type and `price_bucket` wide price range.
+
+    availability:
+        Checks the availability of many (`booking_info`, `check_in`, `check_out`)
+        pairs at once. Returns the available rooms of every pair in the order of
+        `checks`, or null for unknown booking info.
+
     """
 
-    queryset = BookingInfo.objects.order_by("price")
+    # The serializer reads the title, country and city from the related listing
+    queryset = BookingInfo.objects.select_related(
+        "listing", "hotel_room_type__hotel"
+    ).order_by("price", "id")
     serializer_class = BookingInfoSerializer
+    # Compact binary/columnar formats for high-volume clients, selected through the
+    # `Accept` header (or `?format=msgpack` / `?format=arrow`).
+    renderer_classes = (
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        *get_optional_renderer_classes(),
+    )
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = BookingInfoFilter
+    pagination_class = UnitCursorPagination
+
+    @action(detail=False, methods=["get"])
+    def flexible(self, request: Request) -> Response:
+        params = FlexibleSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            search_flexible(
+                queryset,
+                context=self.get_serializer_context(),
+                **params.validated_data,
+            )
+        )
+
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def facets(self, request: Request) -> Response:
+        params = FacetSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        # Filter like `filter_queryset`, but keep the filterset to know whether the
+        # search is for a stay.
+        filterset = filters.DjangoFilterBackend().get_filterset(
+            request, self.get_queryset(), self
+        )
+        if not filterset.is_valid():
+            raise utils.translate_validation(filterset.errors)
+
+        queryset = filterset.qs
+        return Response(
+            count_facets(
+                queryset, params.validated_data["price_bucket"], filterset.stay_nights
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=BatchAvailabilitySerializer,
+        pagination_class=None,
+    )
+    def availability(self, request: Request) -> Response:
+        params = BatchAvailabilitySerializer(data=request.data)
+        params.is_valid(raise_exception=True)
 
+        checks = params.validated_data["checks"]
+        available_rooms = check_availability(
+            [
+                (check["booking_info"], check["check_in"], check["check_out"])
+                for check in checks
+            ]
+        )
+        for check, rooms in zip(checks, available_rooms):
+            check["available_rooms"] = rooms
 
-class BookingReservationViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+        return Response(AvailabilityCheckSerializer(checks, many=True).data)
+
+
+class BookingReservationViewSet(
+    LockTimeoutMixin,
+    IdempotentCreateMixin,
+    mixins.CreateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """
     create:
-        Creates a :model:`listings.BookingReservation` object.
+        Creates a :model:`listings.BookingReservation` object. Retries sent with
+        the same `Idempotency-Key` header return the response of the first request
+        instead of creating another reservation.
 
     retrieve:
         Retrieves a :model:`listings.BookingReservation` instance.
@@ -33,7 +149,85 @@ class BookingReservationViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelV
     list:
         Returns a list of :model:`listings.BookingReservation` objects.
 
+    cart:
+        Creates the :model:`listings.BookingReservation` objects of several `items`
+        at once. Either every reservation is created or none is. Carts only book
+        open rooms: items with a `channel` are rejected, the rooms allotted to a
+        channel are reserved one by one with `create`. Bookings that wait too long
+        for the units locked by other bookings fail with a 409 error and can be
+        retried.
+
     """
 
     queryset = BookingReservation.objects.all()
     serializer_class = BookingReservationSerializer
+
+    @action(detail=False, methods=["post"], serializer_class=CartSerializer)
+    def cart(self, request: Request) -> Response:
+        serializer = CartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservations = serializer.save()
+
+        return Response(
+            BookingReservationSerializer(
+                reservations, many=True, context=self.get_serializer_context()
+            ).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ReservationHoldViewSet(
+    LockTimeoutMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    create:
+        Holds a unit for `RESERVATION_HOLD_TTL` seconds. Pass the returned `token` as
+        `hold` when creating the :model:`listings.BookingReservation`.
+
+    retrieve:
+        Retrieves an active :model:`listings.ReservationHold` by its token.
+
+    destroy:
+        Releases an active :model:`listings.ReservationHold`.
+
+    """
+
+    serializer_class = ReservationHoldSerializer
+    lookup_field = "token"
+
+    def get_queryset(self):
+        # Evaluated per request, so holds stop being found once they expire
+        return ReservationHold.objects.active()
+
+
+class AvailabilityChangeViewSet(viewsets.GenericViewSet):
+    """
+    list:
+        Returns up to `limit` :model:`listings.AvailabilityChange` objects after the
+        change `since`, in sequence order. Pass the returned `since` to the next
+        request; `more` tells whether further changes can be read right away.
+
+    """
+
+    queryset = AvailabilityChange.objects.all()
+    serializer_class = AvailabilityChangeSerializer
+    pagination_class = None
+
+    def list(self, request: Request) -> Response:
+        params = ChangeFeedSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        since: int = params.validated_data["since"]
+        limit: int = params.validated_data["limit"]
+        changes = get_changes(since, limit)
+        return Response(
+            {
+                "since": changes[-1].id if changes else since,
+                "more": len(changes) == limit,
+                "results": self.get_serializer(changes, many=True).data,
+            }
+        )